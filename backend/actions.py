@@ -0,0 +1,118 @@
+# backend/actions.py
+# Buffered writer for the lead-action event log (lead_actions in leads.db).
+#
+# Requests hand their actions to one writer thread and wait for the commit.
+# While a transaction is being written, newly submitted actions queue up and
+# go into the next one, so under load many requests share a commit (group
+# commit, one executemany each, up to ACTION_BATCH_ROWS rows); when idle, an
+# action is written straight away. Queued actions are bounded: past
+# ACTION_MAX_PENDING, submissions are refused (ActionLogFull, a 503 with
+# Retry-After) instead of queueing without limit.
+
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+from metrics import stage
+from store import lead_store
+
+ACTION_BATCH_ROWS = int(os.environ.get("ACTION_BATCH_ROWS", "5000"))
+ACTION_MAX_PENDING = int(os.environ.get("ACTION_MAX_PENDING", "100000"))
+
+
+class ActionLogFull(Exception):
+    pass
+
+
+class ActionLog:
+
+    def __init__(self, store, batch_rows, max_pending):
+        self.store = store
+        self.batch_rows = batch_rows
+        self.max_pending = max_pending
+        self._queue = deque()   # (rows, future) per submission, oldest first
+        self._cond = threading.Condition()
+        self._writer = None
+        self.pending = 0
+        self.accepted = 0
+        self.committed = 0
+        self.commits = 0
+        self.rejected = 0
+        self.failed = 0
+
+    def submit(self, rows):
+
+        # rows: store.ACTION_COLUMNS tuples. The future resolves to the number
+        # of rows once they are committed.
+        future = Future()
+        if not rows:
+            future.set_result(0)
+            return future
+
+        with self._cond:
+            if self.pending + len(rows) > self.max_pending:
+                self.rejected += len(rows)
+                raise ActionLogFull(f"{self.pending} actions waiting to be written")
+            self._queue.append((rows, future))
+            self.pending += len(rows)
+            self.accepted += len(rows)
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write, name="lead-actions", daemon=True
+                )
+                self._writer.start()
+            self._cond.notify()
+        return future
+
+    def _take(self):
+
+        # Whole submissions, oldest first, up to batch_rows rows (always at
+        # least one submission)
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            batch = [self._queue.popleft()]
+            rows = len(batch[0][0])
+            while self._queue and rows + len(self._queue[0][0]) <= self.batch_rows:
+                rows += len(self._queue[0][0])
+                batch.append(self._queue.popleft())
+        return batch
+
+    def _write(self):
+        while True:
+            batch = self._take()
+            rows = [row for submitted, _ in batch for row in submitted]
+            try:
+                with stage("lead_actions.commit"):
+                    self.store.append_actions(rows)
+            except Exception as exc:
+                with self._cond:
+                    self.pending -= len(rows)
+                    self.failed += len(rows)
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+
+            with self._cond:
+                self.pending -= len(rows)
+                self.committed += len(rows)
+                self.commits += 1
+            for submitted, future in batch:
+                future.set_result(len(submitted))
+
+    def stats(self):
+        with self._cond:
+            return {
+                "batch_rows": self.batch_rows,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "accepted": self.accepted,
+                "committed": self.committed,
+                "commits": self.commits,
+                "rejected": self.rejected,
+                "failed": self.failed,
+            }
+
+
+action_log = ActionLog(lead_store, ACTION_BATCH_ROWS, ACTION_MAX_PENDING)
@@ -1,21 +1,71 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
 from fastapi.middleware.cors import CORSMiddleware
-import pandas as pd
-
+from actions import ActionLogFull, action_log
+from cache import CACHE_CONTROL, etag, etag_matches, response_cache
+from executor import WORK_RETRY_AFTER, WorkPoolFull, work_pool
+from metrics import CONTENT_TYPE, RequestMetrics, profiler, render, stage, stats_lines
+from serialize import (
+    RESPONSE_FORMATS,
+    RESPONSE_JSON,
+    columns_json,
+    ndjson_lines,
+    records_json,
+    standard_json,
+)
+from data import DATA_PATH, file_signature, load_trade_data
 from model import (
-    generate_lead_scores,
+    LEAD_PAGE_MAX,
+    LEAD_STORE,
+    MODEL_PATH,
+    current_lead_snapshot,
+    get_lead_snapshot,
+    get_risk_table,
+    ingest_news,
+    iter_lead_scores,
+    lead_action_rows,
+    lead_data_version,
+    lead_score_page,
+    lead_score_page_sql,
+    refresh_lead_snapshot,
+    risk_table,
+    snapshot_info,
+    upsert_exporter_rows,
+    warm_up,
+    readiness,
     get_feature_importance,
     get_exporter_dashboard,
+    get_exporter_dashboards,
     recommend_safe_regions
 )
-from matchmaking import generate_matches
+from matchmaking import (
+    MATCH_MAX_BUYERS,
+    MATCH_MAX_K,
+    generate_matches,
+    industry_subset,
+    match_live_body,
+)
+from store import lead_store
 
 
 # -----------------------------
 # App Initialization
+# (model and snapshot load in the background after startup)
 # -----------------------------
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    yield
+    work_pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS (for React frontend)
 app.add_middleware(
@@ -24,13 +74,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
-# -----------------------------
-# Load Dataset
-# -----------------------------
-df = pd.read_csv("trade_data_processed_cleaned.csv")
-
+# Outermost: request latency per route, and per-request profiles when on
+app.add_middleware(RequestMetrics)
 
 # -----------------------------
 # Request Models
@@ -43,42 +91,336 @@ class BuyerRequest(BaseModel):
     intent_score: float
 
 
+class BuyerBatchRequest(BaseModel):
+    requests: List[BuyerRequest] = Field(..., min_length=1, max_length=MATCH_MAX_BUYERS)
+    k: int = Field(5, ge=1, le=MATCH_MAX_K)
+
+
+class ExporterBatchRequest(BaseModel):
+    exporter_ids: List[str]
+
+
+class ExporterUpsertRequest(BaseModel):
+    rows: List[Dict[str, Any]]
+
+
+class NewsIngestRequest(BaseModel):
+    rows: List[Dict[str, Any]]
+
+
+class LeadAction(BaseModel):
+    exporter_id: str
+    status: str
+    industry: Optional[str] = None
+    state: Optional[str] = None
+    score: Optional[float] = None
+
+
+class LeadActionBatch(BaseModel):
+    actions: List[LeadAction]
+
+
+# -----------------------------
+# Offloaded Work
+# (CPU-heavy work runs on the bounded work pool, see executor.py; a full
+# pool answers 503)
+# -----------------------------
+@app.exception_handler(WorkPoolFull)
+@app.exception_handler(ActionLogFull)
+async def server_busy(request, exc):
+    return JSONResponse(
+        {"detail": f"Server busy: {exc}"},
+        status_code=503,
+        headers={"Retry-After": str(WORK_RETRY_AFTER)},
+    )
+
+
+async def lead_snapshot():
+    # Up to date: straight from memory. Otherwise one rebuild on the work
+    # pool, shared by every request waiting for it.
+    snapshot = current_lead_snapshot()
+    if snapshot is None:
+        snapshot = await work_pool.run(("lead-snapshot",), get_lead_snapshot)
+    return snapshot
+
+
+async def lead_version():
+    snapshot = await lead_snapshot()
+    if LEAD_STORE == "sqlite":
+        # A leads.db read; never on the event loop
+        return await work_pool.run(None, lead_data_version)
+    return snapshot["version"]
+
+
+async def news_version():
+    if not risk_table.is_current():
+        await work_pool.run(("risk-table",), get_risk_table)
+    return risk_table.version
+
+
+@app.get("/work")
+async def work_stats():
+    return work_pool.stats()
+
+
+# -----------------------------
+# Metrics / Profiling
+# (see metrics.py)
+# -----------------------------
+@app.get("/metrics")
+async def metrics():
+    body = render(
+        stats_lines(
+            "tradeswipe_response_cache", response_cache.stats(),
+            {"hits", "misses", "not_modified", "expired", "evictions"},
+        ),
+        stats_lines(
+            "tradeswipe_work", work_pool.stats(),
+            {"submitted", "coalesced", "rejected", "failed"},
+        ),
+        stats_lines(
+            "tradeswipe_lead_actions", action_log.stats(),
+            {"accepted", "committed", "commits", "rejected", "failed"},
+        ),
+    )
+    return Response(body, media_type=CONTENT_TYPE)
+
+
+@app.get("/profiling")
+async def profiling_state():
+    return profiler.state()
+
+
+@app.post("/profiling")
+async def profiling(enabled: bool):
+    return profiler.set_enabled(enabled)
+
+
+# -----------------------------
+# Cached Responses
+# (read-only payloads keyed by endpoint, params and the version of the data
+# they come from; ETag + If-None-Match gives 304s)
+# -----------------------------
+def file_version(path):
+    return file_signature(path) if path.exists() else None
+
+
+def cache_headers(key):
+    return {"ETag": etag(key), "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(request, headers):
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        response_cache.count_not_modified()
+        return Response(status_code=304, headers=headers)
+    return None
+
+
+def build_body(key, build, encode):
+    return response_cache.put(key, encode(build()))
+
+
+async def cached_json(request, endpoint, params, version, build, encode=standard_json):
+
+    key = (endpoint, params, version)
+    headers = cache_headers(key)
+
+    response = not_modified(request, headers)
+    if response is not None:
+        return response
+
+    # Misses are built on the work pool; concurrent misses on a key share
+    # one build
+    body = response_cache.get(key)
+    if body is None:
+        body = await work_pool.run(key, build_body, key, build, encode)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+# -----------------------------
+# DataFrame Responses
+# (format=records is the default row-record body; format=columns is the
+# compact columnar one, see serialize.py)
+# -----------------------------
+ResponseFormat = Literal[RESPONSE_FORMATS]
+
+
+def frame_encoder(format):
+    if format == "columns":
+        return columns_json
+    if RESPONSE_JSON == "orjson":
+        return records_json
+    return lambda df: standard_json(df.to_dict(orient="records"))
+
+
+def json_body(body):
+    return Response(body, media_type="application/json")
+
+
+def lead_filters(industry, state, lead_category):
+    values = {"Industry": industry, "State": state, "lead_category": lead_category}
+    return {column: value for column, value in values.items() if value is not None}
+
+
+@app.get("/cache")
+async def cache_stats():
+    return response_cache.stats()
+
+
 # -----------------------------
 # Basic Route
 # -----------------------------
 @app.get("/")
-def home():
+async def home():
     return {"message": "TradeSwipe AI Running 🚀"}
 
 
+# -----------------------------
+# Readiness
+# -----------------------------
+@app.get("/ready")
+async def ready():
+    status = readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
 # -----------------------------
 # Industries
 # -----------------------------
 @app.get("/industries")
-def get_industries():
-    industries = df["industry"].dropna().unique().tolist()
+async def get_industries(request: Request):
 
-    return [
-        {"id": str(i), "name": industry}
-        for i, industry in enumerate(industries)
-    ]
+    def build():
+        df = load_trade_data(["Industry"])
+        industries = df["Industry"].dropna().unique().tolist()
+
+        return [
+            {"id": str(i), "name": industry}
+            for i, industry in enumerate(industries)
+        ]
+
+    return await cached_json(request, "industries", (), file_version(DATA_PATH), build)
 
 
 # -----------------------------
 # Lead Scores
 # -----------------------------
+def lead_score_body(key, limit, cursor, filters, min_score, max_score, format):
+
+    # The page's body (cached) and the cursor for the next page
+    if LEAD_STORE == "sqlite":
+        page, next_cursor = lead_score_page_sql(limit, cursor, filters, min_score, max_score)
+        build = lambda: page
+    else:
+        snapshot = get_lead_snapshot()
+        ranks, next_cursor = lead_score_page(
+            snapshot, limit, cursor, filters, min_score, max_score
+        )
+        build = lambda: snapshot["scores"].iloc[ranks]
+
+    body = response_cache.get(key)
+    if body is None:
+        body = build_body(key, build, frame_encoder(format))
+    return body, next_cursor
+
+
 @app.get("/lead-scores")
-def lead_scores(limit: int = 50):
-    data = generate_lead_scores()
-    return data.head(limit).to_dict(orient="records")
+async def lead_scores(
+    request: Request,
+    limit: int = Query(50, ge=0, le=LEAD_PAGE_MAX),
+    cursor: Optional[str] = None,
+    industry: Optional[str] = None,
+    state: Optional[str] = None,
+    lead_category: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    format: ResponseFormat = "records",
+):
+    # Rows in rank order, at most LEAD_PAGE_MAX per page. Pass the
+    # X-Next-Cursor response header back as `cursor` for the next page; it is
+    # absent on the last page (and on 304s, which reuse the stored response's
+    # headers). Every matching row at once: /lead-scores/export.
+    filters = lead_filters(industry, state, lead_category)
+    key = (
+        "lead-scores",
+        (limit, cursor, tuple(filters.items()), min_score, max_score, format),
+        await lead_version(),
+    )
+    headers = cache_headers(key)
+
+    response = not_modified(request, headers)
+    if response is not None:
+        return response
+
+    # Identical concurrent requests (dashboards polling the first page)
+    # share one page build
+    try:
+        body, next_cursor = await work_pool.run(
+            key, lead_score_body, key, limit, cursor, filters, min_score, max_score, format
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = next_cursor
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@app.get("/lead-scores/export")
+async def lead_scores_export(
+    industry: Optional[str] = None,
+    state: Optional[str] = None,
+    lead_category: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+):
+    # Every matching row as NDJSON, streamed a chunk at a time from one
+    # snapshot; the full result is never held in memory
+    snapshot = await lead_snapshot()
+    chunks = iter_lead_scores(
+        snapshot, lead_filters(industry, state, lead_category), min_score, max_score
+    )
+
+    return StreamingResponse(
+        (ndjson_lines(chunk) for chunk in chunks),
+        media_type="application/x-ndjson",
+        headers={"X-Snapshot-Version": snapshot["version"]},
+    )
+
+
+# -----------------------------
+# Lead Score Snapshot
+# -----------------------------
+@app.get("/snapshot")
+async def snapshot():
+    return snapshot_info(await lead_snapshot())
+
+
+@app.post("/snapshot/refresh")
+async def snapshot_refresh():
+    return snapshot_info(await work_pool.run(None, refresh_lead_snapshot))
+
+
+# -----------------------------
+# Exporter Upserts (incremental re-scoring)
+# -----------------------------
+@app.post("/exporters/upsert")
+async def exporters_upsert(request: ExporterUpsertRequest):
+    try:
+        return await work_pool.run(None, upsert_exporter_rows, request.rows)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
 
 
 # -----------------------------
 # Feature Importance
 # -----------------------------
 @app.get("/feature-importance")
-def feature_importance():
-    return get_feature_importance().to_dict(orient="records")
+async def feature_importance(request: Request):
+    return await cached_json(
+        request, "feature-importance", (), file_version(MODEL_PATH),
+        lambda: get_feature_importance().to_dict(orient="records"),
+    )
 
 
 # -----------------------------
@@ -86,11 +428,31 @@ def feature_importance():
 # (FIXED 422 by making exporter_id optional)
 # -----------------------------
 @app.get("/exporter-dashboard")
-def exporter_dashboard(exporter_id: str = "EXP001"):
-    result = get_exporter_dashboard(exporter_id)
-    if result is None:
-        return {"message": "Exporter not found."}
-    return result
+async def exporter_dashboard(request: Request, exporter_id: str = "EXP001", ids: Optional[str] = None):
+
+    def build():
+        if ids is not None:
+            return get_exporter_dashboards(
+                [i.strip() for i in ids.split(",") if i.strip()]
+            )
+
+        result = get_exporter_dashboard(exporter_id)
+        if result is None:
+            return {"message": "Exporter not found."}
+        return result
+
+    return await cached_json(
+        request, "exporter-dashboard", (exporter_id, ids),
+        await lead_version(), build,
+    )
+
+
+@app.post("/exporter-dashboard/batch")
+async def exporter_dashboard_batch(request: ExporterBatchRequest):
+    return await work_pool.run(
+        ("exporter-dashboard/batch", tuple(request.exporter_ids), await lead_version()),
+        get_exporter_dashboards, request.exporter_ids,
+    )
 
 
 # -----------------------------
@@ -98,64 +460,123 @@ def exporter_dashboard(exporter_id: str = "EXP001"):
 # (FIXED 422 by making exporter_id optional)
 # -----------------------------
 @app.get("/safe-export-regions")
-def safe_export_regions(exporter_id: str = "EXP001"):
-    result = recommend_safe_regions(exporter_id)
-    if result is None:
-        return {"message": "Exporter not found."}
-    return result
+async def safe_export_regions(request: Request, exporter_id: str = "EXP001"):
+
+    def build():
+        result = recommend_safe_regions(exporter_id)
+        if result is None:
+            return {"message": "Exporter not found."}
+        return result
+
+    return await cached_json(
+        request, "safe-export-regions", (exporter_id,),
+        ((await lead_snapshot())["version"], await news_version()), build,
+    )
 
 
 # -----------------------------
-# Live Matchmaking
+# News Ingestion (folded into the regional risk table)
 # -----------------------------
-@app.post("/match-live")
-def match_live(buyer: BuyerRequest):
+@app.post("/news/ingest")
+async def news_ingest(request: NewsIngestRequest):
+    try:
+        return await work_pool.run(None, ingest_news, request.rows)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
 
-    exporters = generate_lead_scores()
 
-    # Filter by industry
-    candidates = exporters[
-        exporters["Industry"].str.contains(buyer.industry, case=False, na=False)
-    ].copy()
-    candidates = exporters[
-    exporters["Industry"].str.strip().str.lower() ==
-    buyer.industry.strip().lower()
-].copy()
+# -----------------------------
+# Lead Actions
+# (an event log in leads.db: concurrent requests share commits through the
+# action log, see actions.py; reads come from its compacted tables)
+# -----------------------------
+async def record_actions(actions):
+    snapshot = await lead_snapshot()
+    rows = lead_action_rows(snapshot, [action.model_dump() for action in actions])
+    await asyncio.wrap_future(action_log.submit(rows))
+    return {"accepted": len(rows)}
+
+
+@app.post("/lead-actions")
+async def lead_action(action: LeadAction):
+    return await record_actions([action])
+
+
+@app.post("/lead-actions/batch")
+async def lead_action_batch(request: LeadActionBatch):
+    return await record_actions(request.actions)
+
+
+@app.get("/lead-actions/latest")
+async def lead_actions_latest(
+    exporter_id: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = Query(100, ge=0, le=10_000),
+):
+    # exporter_id: one or more, comma-separated; or every exporter whose
+    # latest status is `status`, most recent first
+    if exporter_id is None and status is None:
+        raise HTTPException(status_code=422, detail="Give exporter_id or status.")
+    ids = None
+    if exporter_id is not None:
+        ids = [i.strip() for i in exporter_id.split(",") if i.strip()]
+    return await work_pool.run(None, lead_store.latest_actions, ids, status, limit)
+
+
+@app.get("/lead-actions/summary")
+async def lead_actions_summary(request: Request):
+    return await cached_json(
+        request, "lead-actions/summary", (),
+        await work_pool.run(None, lead_store.actions_version), lead_store.action_summary,
+    )
+
 
+# -----------------------------
+# Live Matchmaking
+# (scored on the work pool, in a worker process with WORK_EXECUTOR=process;
+# identical concurrent requests share one result)
+# -----------------------------
+async def match_live_response(buyers, k, format, single=False):
 
-    if candidates.empty:
-        return []
+    with stage("match_live.snapshot"):
+        snapshot = await lead_snapshot()
 
-    # Quantity match score
-    candidates["quantity_diff"] = abs(
-        candidates["Quantity_Tons"] - buyer.required_quantity
+    key = (
+        "match-live", snapshot["version"],
+        tuple(tuple(buyer.values()) for buyer in buyers), k, format, single,
     )
-    candidates["quantity_score"] = 1 / (1 + candidates["quantity_diff"])
+    with stage("match_live.subset"):
+        industry_index = industry_subset(snapshot["industry_index"], buyers)
 
-    # Intent alignment
-    candidates["intent_alignment"] = buyer.intent_score / 100
+    # Pool wait shows up as the work.queue stage; scoring, top-k sort and
+    # encoding as match_live.* stages (in this process, thread executor only)
+    return json_body(await work_pool.run(
+        key, match_live_body, industry_index, buyers, k, format, single,
+        process_safe=True,
+    ))
 
-    # Risk adjustment
-    risk_map = {"Low": 0.05, "Medium": 0.10, "High": 0.20}
-    risk_penalty = risk_map.get(buyer.risk_tolerance, 0.10)
 
-    # Final match score
-    candidates["match_score"] = (
-        0.5 * candidates["lead_score"] +
-        0.3 * candidates["quantity_score"] * 100 +
-        0.2 * candidates["intent_alignment"] * 100
-    ) * (1 - risk_penalty)
-
-    return candidates.sort_values(
-        by="match_score", ascending=False
-    ).head(5).to_dict(orient="records")
+@app.post("/match-live")
+async def match_live(
+    buyer: BuyerRequest,
+    k: int = Query(5, ge=1, le=MATCH_MAX_K),
+    format: ResponseFormat = "records",
+):
+    return await match_live_response([buyer.model_dump()], k, format, single=True)
+
+
+@app.post("/match-live/batch")
+async def match_live_batch(request: BuyerBatchRequest, format: ResponseFormat = "records"):
+    return await match_live_response(
+        [buyer.model_dump() for buyer in request.requests], request.k, format
+    )
 
 
 # -----------------------------
 # Matchmaking Endpoint (FIXED Flask issue)
 # -----------------------------
 @app.get("/matchmaking")
-def matchmaking():
+async def matchmaking():
 
     exporter = {
         "industry": "Automotive",
@@ -0,0 +1,1503 @@
+# backend/benchmark.py
+# Offline benchmarks for the backend hot paths. Timing only: that the fast
+# paths give the same results as the ones they replace is checked by the
+# tests (python -m pytest tests). The synthetic data and the replaced
+# implementations come from tests/reference.py.
+#
+#   python benchmark.py match-batch --buyers 1000
+#   python benchmark.py match-index --sizes 12000 1000000 10000000 --buyers 500
+#   python benchmark.py matches --sizes 1000 100000 1000000
+#   python benchmark.py memory
+#   python benchmark.py startup
+#   python benchmark.py import-time --budget-ms 1500
+#   python benchmark.py forest --batches 1 100 12000
+#   python benchmark.py upsert --batches 1 100 1000
+#   python benchmark.py scoring --sizes 100000 1000000 --chunksize 100000
+#   python benchmark.py region-features --sizes 10000 1000000 10000000
+#   python benchmark.py parallel --sizes 1000000 --workers 1 2 4 8 16
+#   python benchmark.py cache
+#   python benchmark.py json --batches 50 1000 10000
+#   python benchmark.py pages --sizes 12000 1000000
+#   python benchmark.py regions --sizes 1000000 --batches 1 100 10000
+#   python benchmark.py store --sizes 12000 1000000 --workers 1 4
+#   python benchmark.py concurrency --batches 1 16 64
+#   python benchmark.py metrics --buyers 300
+#   python benchmark.py actions --sizes 10000 200000 --clients 1 16 64
+#   python benchmark.py reasons --sizes 12000 1000000 --rules 3 15
+#   python benchmark.py suite --sizes 12000 1000000 10000000 --clients 1 8 32
+#   python benchmark.py suite --sizes 12000 --compare bench_results/<earlier run>.json
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from tests.reference import (
+    NEWS_REGIONS,
+    TRADE_INDUSTRIES,
+    TRADE_STATES,
+    cleaned_feed,
+    concat_labels,
+    random_actions,
+    random_news,
+    raw_feed,
+    region_features_per_group,
+    safe_regions_per_request,
+    synthetic_trade
+)
+
+
+def _timed(fn, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _random_buyers(industries, n, seed=42):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "industry": str(rng.choice(industries)),
+            "required_quantity": float(rng.uniform(50, 5000)),
+            "budget": float(rng.uniform(1e4, 1e6)),
+            "risk_tolerance": str(rng.choice(["Low", "Medium", "High"])),
+            "intent_score": float(rng.uniform(0, 100)),
+        }
+        for _ in range(n)
+    ]
+
+
+# -------------------------
+# /match-live: single vs batch
+# -------------------------
+def bench_match_batch(args):
+    from model import get_lead_snapshot
+    from matchmaking import match_live_exporters, match_live_exporters_batch
+
+    index = get_lead_snapshot()["industry_index"]
+    buyers = _random_buyers(sorted(index), args.buyers)
+
+    def single():
+        return [
+            match_live_exporters(
+                index,
+                b["industry"],
+                b["required_quantity"],
+                b["intent_score"],
+                b["risk_tolerance"],
+                k=args.k,
+            )
+            for b in buyers
+        ]
+
+    def batch():
+        return match_live_exporters_batch(index, buyers, k=args.k)
+
+    single_time, _ = _timed(single)
+    batch_time, _ = _timed(batch)
+
+    print(f"buyers={len(buyers)} k={args.k}")
+    print(f"single: {single_time:.3f}s  {len(buyers) / single_time:,.0f} req/s")
+    print(f"batch:  {batch_time:.3f}s  {len(buyers) / batch_time:,.0f} req/s")
+    print(f"speedup: {single_time / batch_time:.1f}x")
+
+
+# -------------------------
+# /match-live: exhaustive vs indexed top-k
+# -------------------------
+def bench_match_index(args):
+    import pandas as pd
+
+    import matchmaking
+    from model import get_lead_snapshot
+
+    # Lead scores drawn from the real snapshot, so ties are as common
+    real_scores = get_lead_snapshot()["rows"]["lead_score"].to_numpy()
+    rng = np.random.default_rng(3)
+    min_rows = matchmaking.MATCH_INDEX_MIN_ROWS
+
+    for n in args.sizes:
+        scores = pd.DataFrame({
+            "Exporter_ID": np.char.add(
+                "EXP_", rng.integers(1000, 1000 + max(9_000, n // 2), n).astype(str)
+            ),
+            "Industry": pd.Categorical.from_codes(
+                rng.integers(0, len(TRADE_INDUSTRIES), n), TRADE_INDUSTRIES
+            ),
+            "Quantity_Tons": np.round(rng.uniform(55, 4_952, n), 2),
+            "lead_score": rng.choice(real_scores, n),
+        })
+        index = matchmaking.build_industry_index(scores)
+        buyers = _random_buyers(sorted(index), args.buyers, seed=n)
+        queries = [
+            (
+                index[matchmaking.normalize_industry(b["industry"])],
+                b["required_quantity"],
+                np.float64(b["intent_score"]) / 100,
+                matchmaking.RISK_PENALTY.get(b["risk_tolerance"], 0.10),
+            )
+            for b in buyers
+        ]
+
+        def scan(partition, required, intent_alignment, risk_penalty):
+            # The exhaustive path for one buyer: every exporter scored
+            quantity_score = 1 / (1 + np.abs(partition["quantity"] - required))
+            match_score = (
+                0.5 * partition["lead_score"] +
+                0.3 * quantity_score * 100 +
+                0.2 * intent_alignment * 100
+            ) * (1 - risk_penalty)
+            return matchmaking.top_k_indices(match_score, args.k)
+
+        def per_query(fn):
+            latencies, tops = [], []
+            for query in queries:
+                start = time.perf_counter()
+                tops.append(fn(*query))
+                latencies.append(time.perf_counter() - start)
+            return np.percentile(latencies, [50, 99]) * 1000, tops
+
+        (scan_p50, scan_p99), exhaustive = per_query(scan)
+        (exact_p50, exact_p99), exact = per_query(
+            lambda *query: matchmaking.indexed_top_k(*query, args.k)[0]
+        )
+        (_, _), approximate = per_query(
+            lambda *query: matchmaking.indexed_top_k(*query, args.k, exact=False)[0]
+        )
+
+        # Recall@k against the exhaustive top k: the checked answer, and one
+        # unchecked candidate pass (the approximate answer)
+        def recall(tops):
+            hits = sum(len(np.intersect1d(a, b)) for a, b in zip(tops, exhaustive))
+            return hits / max(1, sum(len(b) for b in exhaustive))
+
+        def batch(min_rows):
+            matchmaking.MATCH_INDEX_MIN_ROWS = min_rows
+            return matchmaking.match_live_exporters_batch(index, buyers, k=args.k)
+
+        scan_batch, _ = _timed(lambda: batch(float("inf")), repeat=1)
+        index_batch, _ = _timed(lambda: batch(0), repeat=1)
+
+        print(
+            f"rows={n:>11,}  top-{args.k} per buyer: exhaustive p50 {scan_p50:8.3f} ms "
+            f"p99 {scan_p99:8.3f} ms  indexed p50 {exact_p50:6.3f} ms p99 {exact_p99:6.3f} ms "
+            f"({scan_p50 / exact_p50:6.1f}x)  recall {recall(exact):.3f} "
+            f"(unchecked pass {recall(approximate):.3f})  "
+            f"batch of {len(buyers)}: {scan_batch:7.3f}s -> {index_batch:6.3f}s"
+        )
+
+    matchmaking.MATCH_INDEX_MIN_ROWS = min_rows
+
+
+# -------------------------
+# generate_matches: buyer dicts vs a buyer DataFrame (top k)
+# -------------------------
+def _random_buyer_pool(n, seed=7):
+    rng = np.random.default_rng(seed)
+    return {
+        "name": np.char.add("BUYER_", np.arange(n).astype(str)),
+        "region": rng.choice(["Western Europe", "Southeast Asia", "Central Africa"], n),
+        "industry": rng.choice(["Automotive", "automotive", "Textiles", "Chemicals"], n),
+        "risk_level": rng.choice(["Low", "Medium", "High", "low"], n),
+        "trade_volume": rng.integers(10_000, 1_000_000, n),
+        "success_rate": rng.integers(0, 16, n),
+    }
+
+
+def bench_matches(args):
+    import pandas as pd
+    from matchmaking import generate_matches
+
+    exporter = {"industry": "Automotive", "trade_volume": 200000, "lead_score": 87}
+
+    for n in args.sizes:
+        frame = pd.DataFrame(_random_buyer_pool(n))
+        records = frame.to_dict(orient="records")
+
+        records_time, _ = _timed(lambda: generate_matches(exporter, records), repeat=1)
+        frame_time, _ = _timed(lambda: generate_matches(exporter, frame, k=args.k))
+
+        print(
+            f"buyers={n:>9,}  dicts, all {records_time:8.3f}s  "
+            f"DataFrame, top {args.k} {frame_time:8.4f}s"
+        )
+
+
+# -------------------------
+# Dataset load: default read_csv vs typed schema
+# -------------------------
+def bench_memory(args):
+    import pandas as pd
+    from data import (
+        DATA_PATH,
+        FEATURES,
+        SCORING_COLUMNS,
+        load_trade_data
+    )
+
+    # The exporter -> industry lookup's columns, as read before the snapshot
+    # served it
+    exporter_columns = ["Exporter_ID", "Industry"]
+
+    def megabytes(df):
+        return df.memory_usage(deep=True).sum() / 1e6
+
+    default_time, default_df = _timed(lambda: pd.read_csv(DATA_PATH))
+    print(f"{'default read_csv':<28} {megabytes(default_df):7.2f} MB  {default_time * 1000:7.1f} ms")
+
+    consumers = [
+        ("schema, all columns", None),
+        ("schema, scoring", SCORING_COLUMNS),
+        ("schema, features", FEATURES),
+        ("schema, exporter lookup", exporter_columns),
+    ]
+    for label, columns in consumers:
+        elapsed, df = _timed(lambda: load_trade_data(columns))
+        print(f"{label:<28} {megabytes(df):7.2f} MB  {elapsed * 1000:7.1f} ms")
+
+
+# -------------------------
+# Cold start: CSV vs binary columnar cache
+# -------------------------
+def bench_startup(args):
+    from data import SCORING_COLUMNS, load_trade_data, write_trade_cache
+
+    write_trade_cache()
+
+    for label, columns in [("all columns", None), ("scoring", SCORING_COLUMNS)]:
+        csv_time, _ = _timed(lambda: load_trade_data(columns, use_cache=False))
+        cache_time, _ = _timed(lambda: load_trade_data(columns))
+        print(
+            f"{label:<12} csv {csv_time * 1000:7.1f} ms  "
+            f"binary {cache_time * 1000:7.1f} ms  "
+            f"speedup {csv_time / cache_time:5.1f}x"
+        )
+
+
+# -------------------------
+# Import-time budget for the API module
+# -------------------------
+def bench_import_time(args):
+
+    # -X importtime writes "self | cumulative | module" (microseconds) to stderr
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=Path(__file__).resolve().parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    cumulative = {}
+    direct = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line[len("import time:"):].split("|")
+        if not total.strip().isdigit():
+            continue
+        # Nested imports are indented two spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        cumulative[name.strip()] = int(total) / 1000
+        if depth == 1:
+            direct[name.strip()] = int(total) / 1000
+
+    print("imports made by app:")
+    for name, ms in sorted(direct.items(), key=lambda x: -x[1])[:10]:
+        print(f"{ms:9.1f} ms  {name}")
+
+    total_ms = cumulative["app"]
+    eager = sorted(n for n in cumulative if n.split(".")[0] in ("sklearn", "joblib"))
+
+    print(f"import app: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    if eager:
+        print(f"eagerly imported: {', '.join(eager[:5])}")
+    if total_ms > args.budget_ms or eager:
+        sys.exit(1)
+
+
+# -------------------------
+# Lead model: sklearn vs flattened forest
+# -------------------------
+def bench_forest(args):
+    import joblib
+    from data import FEATURES, MODEL_PATH, load_trade_data
+    from forest import FlatForest, export_flat_forest, flat_model_path
+
+    pickle_time, model = _timed(lambda: joblib.load(MODEL_PATH), repeat=1)
+    export_flat_forest(model, MODEL_PATH)
+    flat_time, forest = _timed(lambda: FlatForest.load(flat_model_path(MODEL_PATH)))
+
+    X = load_trade_data(FEATURES)[FEATURES]
+
+    print(f"load:  pickle {pickle_time * 1000:8.1f} ms  flat {flat_time * 1000:8.1f} ms")
+    print(
+        f"size:  pickle {MODEL_PATH.stat().st_size / 1e6:8.1f} MB  "
+        f"flat {flat_model_path(MODEL_PATH).stat().st_size / 1e6:8.1f} MB "
+        f"({forest.nbytes / 1e6:.1f} MB in memory)"
+    )
+
+    for batch in args.batches:
+        rows = X.iloc[np.arange(batch) % len(X)]
+        repeat = max(1, min(50, 2000 // batch))
+        sk_time, _ = _timed(lambda: model.predict_proba(rows), repeat=repeat)
+        flat_time, _ = _timed(lambda: forest.predict_proba(rows), repeat=repeat)
+        print(
+            f"batch={batch:>6}  sklearn {batch / sk_time:12,.0f} rows/s  "
+            f"flat {batch / flat_time:12,.0f} rows/s"
+        )
+
+
+# -------------------------
+# Incremental upserts vs full rebuild
+# -------------------------
+def bench_upsert(args):
+    import model
+
+    rows = model.get_lead_snapshot()["rows"]
+    record_ids = rows["Record_ID"].to_numpy()
+    rng = np.random.default_rng(3)
+
+    rebuild_time, _ = _timed(model.refresh_lead_snapshot, repeat=1)
+    print(f"full rebuild: {rebuild_time * 1000:8.1f} ms")
+
+    for batch in args.batches:
+        batches = [
+            [
+                {"Record_ID": int(r), "Intent_Score": float(rng.uniform(0, 1))}
+                for r in rng.choice(record_ids, batch, replace=False)
+            ]
+            for _ in range(5)
+        ]
+        start = time.perf_counter()
+        for records in batches:
+            model.upsert_exporter_rows(records)
+        elapsed = (time.perf_counter() - start) / len(batches)
+        print(
+            f"upsert batch={batch:>6}  {elapsed * 1000:8.1f} ms/batch  "
+            f"{batch / elapsed:10,.0f} rows/s"
+        )
+
+
+# -------------------------
+# scoring.py: whole file vs streaming chunks
+# -------------------------
+def _run_measured(cmd):
+
+    # Wall time and peak RSS of one child process
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        cmd,
+        cwd=Path(__file__).resolve().parent,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    if status != 0:
+        raise RuntimeError(f"{' '.join(cmd)} exited with status {status}")
+    # ru_maxrss is in KB on Linux
+    return elapsed, usage.ru_maxrss / 1024
+
+
+def bench_scoring(args):
+
+    # Everything heavy runs in child processes: ru_maxrss survives exec, so
+    # a fat benchmark process would inflate the children's peak RSS
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            source = os.path.join(tmp, f"feed_{n}.csv")
+            subprocess.run(
+                [
+                    sys.executable, "-c",
+                    f"from tests.reference import raw_feed; raw_feed({n}).to_csv({source!r}, index=False)",
+                ],
+                cwd=Path(__file__).resolve().parent,
+                check=True,
+            )
+
+            outputs = []
+            for label, extra in [
+                ("whole file", []),
+                (f"chunks of {args.chunksize:,}", ["--chunksize", str(args.chunksize)]),
+            ]:
+                output = os.path.join(tmp, f"out_{n}_{len(outputs)}.csv")
+                elapsed, peak_mb = _run_measured(
+                    [sys.executable, "scoring.py", "--input", source, "--output", output] + extra
+                )
+                outputs.append(output)
+                print(f"rows={n:>10,}  {label:<20} {elapsed:8.2f}s  peak RSS {peak_mb:8.1f} MB")
+
+            for output in outputs:
+                os.remove(output)
+            os.remove(source)
+
+
+# -------------------------
+# scoring.py region features: per-group apply vs grouped vectorized
+# -------------------------
+def bench_region_features(args):
+    from scoring import add_region_features
+
+    for n in args.sizes:
+        df = cleaned_feed(n)
+        repeat = 3 if n <= 1_000_000 else 1
+        apply_time, _ = _timed(lambda: region_features_per_group(df), repeat=repeat)
+        vector_time, _ = _timed(lambda: add_region_features(df), repeat=repeat)
+
+        print(
+            f"rows={n:>10,}  per-group apply {apply_time:8.3f}s  "
+            f"vectorized {vector_time:8.3f}s  speedup {apply_time / vector_time:5.1f}x"
+        )
+
+
+# -------------------------
+# Process-pool scaling: scoring.py cleaning and lead scoring
+# -------------------------
+def bench_parallel(args):
+    from data import SCORING_COLUMNS, load_trade_data
+    from model import score_rows
+    from scoring import clean
+
+    print(f"cpus available: {len(os.sched_getaffinity(0))}")
+
+    for n in args.sizes:
+        feed = raw_feed(n)
+        baseline = None
+        for workers in args.workers:
+            elapsed, _ = _timed(lambda: clean(feed, workers), repeat=1)
+            baseline = baseline or elapsed
+            print(
+                f"clean  rows={n:>10,}  workers={workers:>2}  {elapsed:8.2f}s  "
+                f"speedup {baseline / elapsed:4.1f}x"
+            )
+
+    rows = load_trade_data(SCORING_COLUMNS)
+    for n in args.sizes:
+        block = rows.iloc[np.arange(n) % len(rows)]
+        baseline = None
+        for workers in args.workers:
+            elapsed, _ = _timed(lambda: score_rows(block, workers), repeat=1)
+            baseline = baseline or elapsed
+            print(
+                f"score  rows={n:>10,}  workers={workers:>2}  {elapsed:8.2f}s  "
+                f"speedup {baseline / elapsed:4.1f}x"
+            )
+
+
+# -------------------------
+# Response cache: rebuilt vs cached vs 304
+# -------------------------
+CACHED_ENDPOINTS = [
+    "/industries",
+    "/feature-importance",
+    "/lead-scores?limit=50",
+    "/lead-scores?limit=10000",
+    "/exporter-dashboard?exporter_id=EXP_5094",
+    "/safe-export-regions?exporter_id=EXP_5094",
+]
+
+
+def bench_cache(args):
+    from fastapi.testclient import TestClient
+
+    import app
+    from cache import response_cache
+
+    client = TestClient(app.app)
+    client.get("/ready")
+
+    def uncached(url):
+        response_cache.clear()
+        return client.get(url)
+
+    for url in CACHED_ENDPOINTS:
+        cold, response = _timed(lambda: uncached(url), repeat=5)
+        warm, _ = _timed(lambda: client.get(url), repeat=20)
+        tag = {"If-None-Match": response.headers["etag"]}
+        revalidate, _ = _timed(lambda: client.get(url, headers=tag), repeat=20)
+        print(
+            f"{url:<42} {len(response.content):>9,} B  rebuilt {cold * 1000:8.2f} ms  "
+            f"cached {warm * 1000:6.2f} ms  304 {revalidate * 1000:6.2f} ms"
+        )
+
+    print(response_cache.stats())
+
+
+# -------------------------
+# Response encoding: row records vs orjson vs columnar
+# -------------------------
+def bench_json(args):
+    from fastapi.testclient import TestClient
+
+    import app
+    import model
+    from cache import response_cache
+    from serialize import columns_json, records_json
+
+    scores = model.get_lead_snapshot()["scores"]
+    client = TestClient(app.app)
+
+    encoders = {
+        "records": lambda df: app.standard_json(df.to_dict(orient="records")),
+        "orjson": records_json,
+        "columns": columns_json,
+    }
+
+    for n in args.batches:
+        page = scores.head(n)
+
+        for name, encode in encoders.items():
+            elapsed, body = _timed(lambda: encode(page), repeat=5)
+            print(
+                f"encode  rows={n:>6,}  {name:<8} {elapsed * 1000:8.2f} ms  "
+                f"{n / elapsed:12,.0f} rows/s  {len(body):>10,} B"
+            )
+
+        # Whole request through FastAPI, response cache bypassed (pages stop
+        # at LEAD_PAGE_MAX rows)
+        if n > model.LEAD_PAGE_MAX:
+            continue
+        for name in ("records", "columns"):
+            url = f"/lead-scores?limit={n}&format={name}"
+
+            def request():
+                response_cache.clear()
+                return client.get(url)
+
+            elapsed, _ = _timed(request, repeat=5)
+            print(
+                f"request rows={n:>6,}  {name:<8} {elapsed * 1000:8.2f} ms  "
+                f"{n / elapsed:12,.0f} rows/s"
+            )
+
+
+# -------------------------
+# /lead-scores pages: keyset cursor vs offset, and the NDJSON export
+# -------------------------
+def _synthetic_snapshot(n, seed=0):
+    import pandas as pd
+
+    import model
+
+    scores = model.get_lead_snapshot()["scores"]
+    rng = np.random.default_rng(seed)
+    scores = scores.iloc[rng.integers(0, len(scores), n)]
+    scores = scores.sort_values("lead_score", ascending=False, kind="stable")
+    scores = scores.reset_index(drop=True)
+
+    order = rng.permutation(n)
+    rows = pd.DataFrame({"lead_score": np.empty(n)})
+    rows.loc[order, "lead_score"] = scores["lead_score"].to_numpy()
+    return {
+        "rows": rows,
+        "scores": scores,
+        "order": order,
+        "rank": model._rank_table(order),
+        "filter_index": model.build_filter_index(scores),
+    }
+
+
+def bench_pages(args):
+    import tracemalloc
+
+    import model
+    from serialize import ndjson_lines
+
+    limit = 50
+    filters = {"Industry": "Solar", "lead_category": "High Potential"}
+
+    for n in args.sizes:
+        snapshot = _synthetic_snapshot(n)
+        scores = snapshot["scores"]
+
+        # The cursor for each depth comes from walking the pages once
+        cursors, cursor = {}, None
+        depths = [1, 10, 100, 500]
+        mask = (scores["Industry"] == "Solar") & (scores["lead_category"] == "High Potential")
+        matches = int(mask.sum())
+        for page in range(1, min(max(depths), matches // limit) + 1):
+            if page in depths:
+                cursors[page] = cursor
+            _, cursor = model.lead_score_page(snapshot, limit, cursor, filters)
+
+        for page, cursor in cursors.items():
+            keyset, _ = _timed(
+                lambda: model.lead_score_page(snapshot, limit, cursor, filters), repeat=20
+            )
+
+            def offset_page():
+                mask = (scores["Industry"] == "Solar") & (scores["lead_category"] == "High Potential")
+                return scores[mask.to_numpy()].iloc[(page - 1) * limit:page * limit]
+
+            offset, _ = _timed(offset_page, repeat=5)
+            print(
+                f"rows={n:>10,}  page {page:>5}  keyset {keyset * 1000:7.3f} ms  "
+                f"mask+offset {offset * 1000:8.2f} ms"
+            )
+
+        export = lambda: sum(len(ndjson_lines(c)) for c in model.iter_lead_scores(snapshot))
+        elapsed, written = _timed(export, repeat=1)
+
+        tracemalloc.start()
+        export()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(
+            f"rows={n:>10,}  export {written / 1e6:8.1f} MB NDJSON in {elapsed:6.2f}s  "
+            f"peak traced {peak / 1e6:6.1f} MB"
+        )
+
+
+# -------------------------
+# /safe-export-regions: risk table vs per-request groupby
+# -------------------------
+def bench_regions(args):
+    import shutil
+
+    import pandas as pd
+
+    from model import NEWS_PATH
+    from regions import RegionRiskTable
+
+    news = pd.read_csv(NEWS_PATH)
+    industries = sorted(news["Affected_Industry"].str.lower().unique())
+    regions = sorted(news["Region"].unique())
+
+    # news_data.csv itself, then the same padded with synthetic rows
+    for size in [len(news)] + [n for n in args.sizes if n > len(news)]:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "news_data.csv"
+            shutil.copy(NEWS_PATH, path)
+            if size > len(news):
+                extra = pd.DataFrame(random_news(size - len(news), industries, regions, 99))
+                extra.insert(0, "News_ID", np.arange(len(news), size))
+                extra.to_csv(path, mode="a", header=False, index=False)
+
+            build, table = _timed(lambda: RegionRiskTable(path).refresh(), repeat=1)
+            per_request, _ = _timed(
+                lambda: [safe_regions_per_request(path, i) for i in industries[:3]], repeat=1
+            )
+            lookup, _ = _timed(lambda: [table.top_regions(i) for i in industries], repeat=3)
+            print(
+                f"news={size:>10,}  build {build * 1000:9.2f} ms  per request: "
+                f"groupby {per_request / 3 * 1000:9.3f} ms, table {lookup / len(industries) * 1e6:6.2f} us"
+            )
+
+            for seed, batch in enumerate(args.batches):
+                rows = random_news(batch, industries, regions, seed)
+                ingest, _ = _timed(lambda: table.ingest(rows), repeat=1)
+                rebuild, _ = _timed(lambda: RegionRiskTable(path).refresh(), repeat=1)
+                print(
+                    f"news={size:>10,}  ingest batch={batch:>6}  {ingest * 1000:9.2f} ms  "
+                    f"(re-reading the file instead: {rebuild * 1000:9.2f} ms)"
+                )
+
+
+# -------------------------
+# SQLite lead store vs scanning a scored-leads CSV
+# -------------------------
+def _scored_rows(n, seed=0):
+    import model
+
+    rows = model.get_lead_snapshot()["rows"]
+    rng = np.random.default_rng(seed)
+    rows = rows.iloc[rng.integers(0, len(rows), n)].reset_index(drop=True)
+    rows["Record_ID"] = np.arange(n, dtype=np.int64)
+    rows["Exporter_ID"] = [f"EXP_{i % (n // 2 + 1)}" for i in range(n)]
+    return rows
+
+
+def bench_store(args):
+    import threading
+
+    import pandas as pd
+
+    from model import SCORE_COLUMNS
+    from store import LeadStore
+
+    for n in args.sizes:
+        rows = _scored_rows(n)
+        exporters = rows["Exporter_ID"].sample(200, random_state=1).tolist()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = Path(tmp) / "lead_scores.csv"
+            rows[["Record_ID"] + SCORE_COLUMNS].to_csv(csv_path, index=False)
+
+            store = LeadStore(Path(tmp) / "leads.db", max(args.workers))
+            write, _ = _timed(lambda: store.replace_leads(rows, "bench"), repeat=1)
+            print(f"rows={n:>10,}  sqlite full write {write:7.2f}s")
+
+            def csv_dashboard(exporter_id):
+                df = pd.read_csv(csv_path)
+                df = df.sort_values(["lead_score", "Record_ID"], ascending=[False, True])
+                best = df[df["Exporter_ID"] == exporter_id].iloc[0]
+                return int((df["Record_ID"] == best["Record_ID"]).to_numpy().argmax()) + 1
+
+            def csv_page():
+                df = pd.read_csv(csv_path)
+                df = df[(df["Industry"] == "Solar") & (df["State"] == "Gujarat")]
+                return df.sort_values(["lead_score", "Record_ID"], ascending=[False, True]).head(50)
+
+            queries = {
+                "dashboard": (
+                    lambda: csv_dashboard(exporters[0]),
+                    lambda: [store.exporter_rank(e) for e in exporters],
+                    len(exporters),
+                ),
+                "filtered page": (
+                    csv_page,
+                    lambda: store.lead_page(50, None, {"Industry": "Solar", "State": "Gujarat"}),
+                    1,
+                ),
+                "top 50": (
+                    lambda: pd.read_csv(csv_path).sort_values("lead_score", ascending=False).head(50),
+                    lambda: store.lead_page(50),
+                    1,
+                ),
+            }
+            for name, (csv_query, sql_query, calls) in queries.items():
+                csv_time, _ = _timed(csv_query, repeat=1)
+                sql_time, _ = _timed(sql_query, repeat=3)
+                print(
+                    f"rows={n:>10,}  {name:<14} csv {csv_time * 1000:9.2f} ms  "
+                    f"sqlite {sql_time / calls * 1000:8.3f} ms"
+                )
+
+            # Concurrent dashboard reads through the pool
+            for workers in args.workers:
+                def read():
+                    for exporter_id in exporters:
+                        store.exporter_rank(exporter_id)
+
+                threads = [threading.Thread(target=read) for _ in range(workers)]
+                start = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                elapsed = time.perf_counter() - start
+                print(
+                    f"rows={n:>10,}  {workers:>2} reader threads  "
+                    f"{workers * len(exporters) / elapsed:10,.0f} dashboards/s"
+                )
+
+
+# -------------------------
+# Concurrent requests: coalescing, head-of-line latency, admission
+# -------------------------
+def _concurrent(calls, threads):
+    from concurrent.futures import ThreadPoolExecutor
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(lambda call: call(), calls))
+    return time.perf_counter() - start, results
+
+
+def bench_concurrency(args):
+    from fastapi.testclient import TestClient
+
+    import app
+    from cache import response_cache
+    from executor import work_pool
+
+    # One client, one event loop: concurrent requests can meet in flight
+    with TestClient(app.app) as client:
+        index = app.get_lead_snapshot()["industry_index"]
+        ttl = response_cache.ttl
+        response_cache.ttl = 0  # every request is a miss
+
+        for n in args.batches:
+            for url in ("/lead-scores?limit=50", "/lead-scores?limit=10000"):
+                before = work_pool.stats()["submitted"]
+                elapsed, _ = _concurrent([lambda: client.get(url)] * n, min(n, 64))
+                builds = work_pool.stats()["submitted"] - before
+                print(
+                    f"{n:>4} identical {url:<26} {elapsed * 1000:8.1f} ms  "
+                    f"{builds:>4} builds"
+                )
+
+        # A cheap route's latency while distinct /match-live/batch requests
+        # keep the pool busy; it never waits behind them
+        buyers = _random_buyers(sorted(index), 2000)
+        heavy = [
+            lambda i=i: client.post(
+                "/match-live/batch", json={"requests": buyers[i::8], "k": args.k}
+            )
+            for i in range(8)
+        ] * 4
+
+        def probe():
+            latencies = []
+            for _ in range(50):
+                start = time.perf_counter()
+                client.get("/ready")
+                latencies.append(time.perf_counter() - start)
+                time.sleep(0.005)
+            return np.percentile(latencies, [50, 99]) * 1000
+
+        idle = probe()
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(9) as pool:
+            load = pool.submit(_concurrent, heavy, 8)
+            busy = pool.submit(probe).result()
+            load_time, _ = load.result()
+        print(
+            f"/ready p50/p99  idle {idle[0]:6.2f}/{idle[1]:6.2f} ms  "
+            f"under {len(heavy)} batch requests ({load_time:.1f}s) "
+            f"{busy[0]:6.2f}/{busy[1]:6.2f} ms"
+        )
+
+        # Admission: past max_pending, distinct requests are refused with
+        # 503 + Retry-After instead of queueing
+        max_pending = work_pool.max_pending
+        work_pool.max_pending = 4
+        _, responses = _concurrent(heavy, len(heavy))
+        refused = [r for r in responses if r.status_code == 503]
+        print(
+            f"admission max_pending=4  {len(heavy)} requests  "
+            f"{len(responses) - len(refused)} served  {len(refused)} refused (503)"
+        )
+
+        work_pool.max_pending = max_pending
+        response_cache.ttl = ttl
+        print(work_pool.stats())
+
+
+# -------------------------
+# Instrumentation overhead: stage timers, /metrics, the profiler
+# -------------------------
+def bench_metrics(args):
+    from fastapi.testclient import TestClient
+
+    import app
+    import metrics
+
+    def timers(n=200_000):
+        start = time.perf_counter()
+        for _ in range(n):
+            with metrics.stage("bench"):
+                pass
+        return (time.perf_counter() - start) / n
+
+    for enabled in (False, True):
+        metrics.METRICS = enabled
+        print(f"stage() METRICS={int(enabled)}  {timers() * 1e9:8.0f} ns per timed block")
+
+    buyer = {
+        "industry": "Textiles", "required_quantity": 2000, "budget": 1,
+        "risk_tolerance": "Low", "intent_score": 70,
+    }
+    with TestClient(app.app) as client, tempfile.TemporaryDirectory() as tmp:
+        metrics.profiler.directory = Path(tmp)
+        client.post("/match-live", json=buyer)
+
+        modes = {
+            "metrics off": (False, False),
+            "metrics on": (True, False),
+            "profiler on": (True, True),
+        }
+        for name, (enabled, profiling) in modes.items():
+            metrics.METRICS = enabled
+            metrics.profiler.set_enabled(profiling)
+            elapsed, _ = _timed(
+                lambda: [client.post("/match-live", json=buyer) for _ in range(args.buyers)],
+                repeat=3,
+            )
+            print(f"/match-live  {name:<12} {elapsed / args.buyers * 1000:7.3f} ms per request")
+
+        metrics.profiler.set_enabled(False)
+        elapsed, response = _timed(lambda: client.get("/metrics"), repeat=20)
+        print(
+            f"/metrics  {elapsed * 1000:6.2f} ms  {len(response.content):,} B  "
+            f"{len(list(Path(tmp).iterdir()))} profiles written"
+        )
+
+
+def bench_reasons(args):
+    import model
+
+    base_rules = list(model.REASON_RULES)
+    numeric = [
+        "Revenue_Size_USD", "Team_Size", "LinkedIn_Activity", "Shipment_Value_USD",
+        "Quantity_Tons", "Tariff_Impact", "StockMarket_Impact", "Currency_Shift",
+    ]
+
+    for n in args.sizes:
+        df = synthetic_trade(n)
+        df["lead_score"] = np.random.default_rng(1).uniform(0, 100, n)
+
+        for count in args.rules:
+            # Extra rules cycle over numeric columns, at their medians
+            model.REASON_RULES[:] = base_rules + [
+                (numeric[i % len(numeric)], lambda values: values.median(), f"Signal {i}")
+                for i in range(max(0, count - len(base_rules)))
+            ]
+            model.REASON_DTYPE = np.min_scalar_type((1 << len(model.REASON_RULES)) - 1)
+
+            def engine():
+                rows = df.copy()
+                model.label_rows(rows, model.reason_flags(rows, model.reason_thresholds(rows)))
+                return rows
+
+            def concatenated():
+                rows = df.copy()
+                concat_labels(rows)
+                return rows
+
+            new_s, new = _timed(engine, repeat=3)
+            old_s, _ = _timed(concatenated, repeat=1)
+
+            page_s, _ = _timed(lambda: new["ai_reason"].iloc[:50].tolist(), repeat=20)
+            print(
+                f"rows={n:>10,}  rules={count:>3}  string concat {old_s * 1000:9.1f} ms  "
+                f"rule engine {new_s * 1000:8.1f} ms  ({old_s / new_s:5.1f}x)  "
+                f"{len(new['ai_reason'].cat.categories):>6} distinct texts  "
+                f"50-row page text {page_s * 1e6:6.1f} us"
+            )
+
+    model.REASON_RULES[:] = base_rules
+    model.REASON_DTYPE = np.min_scalar_type((1 << len(base_rules)) - 1)
+
+
+# -------------------------
+# Lead actions: per-action commits vs the group-committed log
+# -------------------------
+def bench_actions(args):
+    import threading
+
+    from actions import ActionLog
+    from store import LeadStore
+
+    def run_clients(clients, actions, write):
+        # Each client writes one action at a time and waits for it, like a
+        # request would
+        threads = [
+            threading.Thread(
+                target=lambda share: [write(action) for action in share],
+                args=(actions[i::clients],),
+            )
+            for i in range(clients)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return len(actions) / (time.perf_counter() - start)
+
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            actions = random_actions(n)
+
+            for clients in args.clients:
+                # One transaction per request
+                direct = LeadStore(Path(tmp) / f"direct_{clients}.db")
+                direct_rate = run_clients(
+                    clients, actions[:min(n, 20_000)], lambda a: direct.append_actions([a])
+                )
+
+                # Requests sharing commits through the action log
+                store = LeadStore(Path(tmp) / f"log_{clients}.db")
+                log = ActionLog(store, 5_000, 1_000_000)
+                log_rate = run_clients(clients, actions, lambda a: log.submit([a]).result())
+                stats = log.stats()
+
+                print(
+                    f"actions={n:>9,}  clients={clients:>3}  a transaction per action "
+                    f"{direct_rate:8,.0f}/s  action log {log_rate:8,.0f}/s  "
+                    f"({log_rate / direct_rate:5.1f}x)  {stats['commits']:>7,} commits, "
+                    f"{n / stats['commits']:6.1f} actions each"
+                )
+
+            # The summary's queries run against the log itself
+            with store.connection() as conn:
+                def scanned_summary():
+                    conn.execute(
+                        "SELECT status, industry, COUNT(*) FROM lead_actions GROUP BY 1, 2"
+                    ).fetchall()
+                    conn.execute(
+                        "SELECT status, COUNT(*) FROM lead_actions WHERE id IN "
+                        "(SELECT MAX(id) FROM lead_actions GROUP BY exporter_id) GROUP BY 1"
+                    ).fetchall()
+
+                scan_s, _ = _timed(scanned_summary, repeat=3)
+            summary_s, _ = _timed(store.action_summary, repeat=3)
+            ids = [action[0] for action in actions[:100]]
+            latest_s, _ = _timed(lambda: store.latest_actions(ids), repeat=3)
+
+            # Rows written before the compacted tables existed are folded in
+            # on first use
+            with store.connection() as conn, conn:
+                conn.execute("DELETE FROM lead_status")
+                conn.execute("DELETE FROM lead_action_counts")
+                conn.execute("DELETE FROM store_meta WHERE key = 'actions_folded'")
+            start = time.perf_counter()
+            with LeadStore(store.pool.path).connection():
+                fold_s = time.perf_counter() - start
+
+            print(
+                f"actions={n:>9,}  summary from compacted tables {summary_s * 1000:8.2f} ms  "
+                f"(scanning the log {scan_s * 1000:8.1f} ms)  latest for 100 exporters "
+                f"{latest_s * 1000:6.2f} ms  folding the whole log {fold_s:6.2f}s"
+            )
+
+
+# -------------------------
+# Benchmark suite: synthetic datasets, micro-benchmarks and an in-process
+# load test, saved as JSON to compare commits
+# -------------------------
+SUITE_CHUNK_ROWS = 1_000_000
+
+# Timing differences smaller than this are noise, whatever the ratio
+SUITE_NOISE_S = 0.001
+
+
+def _synthetic_news(n, seed=0):
+
+    # Shaped like news_data.csv: industry names in two spellings
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    industries = np.array(TRADE_INDUSTRIES + [i.lower() for i in TRADE_INDUSTRIES])
+    return pd.DataFrame({
+        "News_ID": np.arange(n),
+        "Region": rng.choice(NEWS_REGIONS, n),
+        "Affected_Industry": industries[rng.integers(0, len(industries), n)],
+        "Tariff_Change": np.round(rng.uniform(-1, 1, n), 2),
+        "War_Flag": rng.integers(0, 2, n),
+        "Natural_Calamity_Flag": rng.integers(0, 2, n),
+        "Currency_Shift": np.round(rng.uniform(-1, 1, n), 2),
+    })
+
+
+def _suite_data(directory, n, seed):
+
+    # Generated once per (rows, seed) and reused, so runs on different
+    # commits read identical files. Written a chunk at a time.
+    from data import write_trade_cache
+
+    trade = directory / f"trade_{n}_{seed}.csv"
+    news = directory / f"news_{n}_{seed}.csv"
+    feed = directory / f"feed_{n}_{seed}.csv"
+    directory.mkdir(parents=True, exist_ok=True)
+
+    if not trade.exists():
+        partial = trade.with_suffix(".partial")
+        exporters = max(9_000, n // 2)
+        for i, start in enumerate(range(0, n, SUITE_CHUNK_ROWS)):
+            rows = min(SUITE_CHUNK_ROWS, n - start)
+            synthetic_trade(rows, (seed, i), start, exporters).to_csv(
+                partial, mode="a" if i else "w", header=not i, index=False
+            )
+        partial.rename(trade)
+    write_trade_cache(trade)
+
+    if not news.exists():
+        _synthetic_news(max(2_000, n // 6), seed).to_csv(news, index=False)
+
+    if not feed.exists():
+        partial = feed.with_suffix(".partial")
+        for i, start in enumerate(range(0, n, SUITE_CHUNK_ROWS)):
+            raw_feed(min(SUITE_CHUNK_ROWS, n - start), seed=seed * 1000 + i).to_csv(
+                partial, mode="a" if i else "w", header=not i, index=False
+            )
+        partial.rename(feed)
+
+    return trade, news, feed
+
+
+def _percentiles(seconds):
+    if not len(seconds):
+        return {}
+    p50, p95, p99 = np.percentile(np.asarray(seconds) * 1000, [50, 95, 99]).tolist()
+    return {"p50_ms": round(p50, 4), "p95_ms": round(p95, 4), "p99_ms": round(p99, 4)}
+
+
+def _per_call(fn, inputs):
+    latencies = []
+    for value in inputs:
+        start = time.perf_counter()
+        fn(value)
+        latencies.append(time.perf_counter() - start)
+    return _percentiles(latencies)
+
+
+def _stage_seconds(fn):
+
+    # Runs fn once; seconds per metrics.stage() it went through
+    from metrics import STAGE_SECONDS
+
+    def sums():
+        return {labels[0]: values[-1] for labels, values in STAGE_SECONDS._series.items()}
+
+    before = sums()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    stages = {
+        stage: round(total - before.get(stage, 0.0), 6)
+        for stage, total in sums().items() if total != before.get(stage, 0.0)
+    }
+    return elapsed, stages
+
+
+def _load_requests(n, snapshot, seed):
+
+    # (label, method, url, json) in a fixed, seeded mix
+    rng = np.random.default_rng(seed)
+    exporters = list(snapshot["exporter_index"])
+    industries = sorted(snapshot["industry_index"])
+    buyers = _random_buyers(industries, 4_000, seed=seed)
+
+    def buyer():
+        return buyers[rng.integers(0, len(buyers))]
+
+    mix = [
+        (0.25, lambda: ("lead-scores", "GET", "/lead-scores?limit=50", None)),
+        (0.10, lambda: (
+            "lead-scores filtered", "GET",
+            f"/lead-scores?limit=50&industry={rng.choice(TRADE_INDUSTRIES)}"
+            f"&state={rng.choice(TRADE_STATES)}", None,
+        )),
+        (0.25, lambda: (
+            "exporter-dashboard", "GET",
+            f"/exporter-dashboard?exporter_id={exporters[rng.integers(0, len(exporters))]}", None,
+        )),
+        (0.15, lambda: (
+            "safe-export-regions", "GET",
+            f"/safe-export-regions?exporter_id={exporters[rng.integers(0, len(exporters))]}", None,
+        )),
+        (0.20, lambda: ("match-live", "POST", "/match-live", buyer())),
+        (0.05, lambda: (
+            "match-live batch", "POST", "/match-live/batch",
+            {"requests": [buyer() for _ in range(20)], "k": 5},
+        )),
+    ]
+    weights = np.array([w for w, _ in mix])
+    picks = rng.choice(len(mix), n, p=weights / weights.sum())
+    return [mix[i][1]() for i in picks]
+
+
+def _load_test(client, requests, clients):
+
+    import threading
+
+    latencies = {}
+    statuses = {}
+    lock = threading.Lock()
+
+    def worker(share):
+        for label, method, url, body in share:
+            start = time.perf_counter()
+            response = client.request(method, url, json=body)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.setdefault(label, []).append(elapsed)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    threads = [threading.Thread(target=worker, args=(requests[i::clients],)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "throughput_rps": round(len(requests) / elapsed, 2),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "all": _percentiles([x for values in latencies.values() for x in values]),
+        "endpoints": {
+            label: {"count": len(values), **_percentiles(values)}
+            for label, values in sorted(latencies.items())
+        },
+    }
+
+
+def _suite_run(options):
+
+    # One dataset size, in its own process: TRADE_DATA_PATH and
+    # NEWS_DATA_PATH are set by the parent before anything is imported
+    import json
+
+    options = json.loads(options)
+    n, seed = options["rows"], options["seed"]
+    results = {"rows": n}
+
+    def save():
+        # After every section, so a run killed part way keeps what it measured
+        Path(options["out"]).write_text(json.dumps(results))
+
+    trade, news, feed = _suite_data(Path(options["data_dir"]), n, seed)
+    if os.environ.get("TRADE_DATA_PATH") != str(trade):
+        sys.exit("suite child started without TRADE_DATA_PATH set to its dataset")
+    results["news_rows"] = int(sum(1 for _ in open(news)) - 1)
+
+    from data import cache_path
+
+    # scoring.py first, while this process holds no data: whole file up to
+    # a million rows, streamed above that
+    output = Path(options["data_dir"]) / f"scored_{n}_{os.getpid()}.csv"
+    command = [sys.executable, "scoring.py", "--input", str(feed), "--output", str(output)]
+    if n > SUITE_CHUNK_ROWS:
+        command += ["--chunksize", str(SUITE_CHUNK_ROWS)]
+    elapsed, peak_mb = _run_measured(command)
+    output.unlink(missing_ok=True)
+    shutil.rmtree(cache_path(output), ignore_errors=True)
+    results["scoring_pipeline"] = {
+        "mode": "chunked" if n > SUITE_CHUNK_ROWS else "whole file",
+        "total_s": round(elapsed, 4),
+        "peak_rss_mb": round(peak_mb, 1),
+        "throughput_rows_per_s": round(n / elapsed),
+    }
+    print(f"rows={n:>10,}  scoring.py               {results['scoring_pipeline']}")
+    save()
+
+    import pandas as pd
+    from fastapi.testclient import TestClient
+
+    import app
+    import model
+    from cache import response_cache
+    from matchmaking import generate_matches
+
+    model.get_model()
+
+    elapsed, stages = _stage_seconds(model.generate_lead_scores)
+    results["generate_lead_scores"] = {"total_s": round(elapsed, 4), "stages_s": stages}
+    elapsed, stages = _stage_seconds(model.refresh_lead_snapshot)
+    results["snapshot_build"] = {"total_s": round(elapsed, 4), "stages_s": stages}
+    print(f"rows={n:>10,}  generate_lead_scores {results['generate_lead_scores']['total_s']:8.3f}s  "
+          f"snapshot build {elapsed:8.3f}s")
+    save()
+
+    rng = np.random.default_rng(seed)
+    snapshot = model.get_lead_snapshot()
+    exporters = list(snapshot["exporter_index"])
+    sample = [exporters[i] for i in rng.integers(0, len(exporters), 1_000)] + ["EXP_MISSING"] * 10
+
+    results["get_exporter_dashboard"] = _per_call(model.get_exporter_dashboard, sample)
+    start = time.perf_counter()
+    model.recommend_safe_regions(sample[0])
+    results["recommend_safe_regions"] = {
+        "first_call_ms": round((time.perf_counter() - start) * 1000, 4),
+        **_per_call(model.recommend_safe_regions, sample),
+    }
+
+    # Buyer pools are capped: dict input costs a dict per buyer either way
+    pool = pd.DataFrame(_random_buyer_pool(min(n, 100_000), seed=seed))
+    exporter = {"industry": "Automotive", "trade_volume": 200_000, "lead_score": 87}
+    records = pool.to_dict(orient="records")
+    results["generate_matches"] = {
+        "buyers": len(records),
+        "records_s": round(_timed(lambda: generate_matches(exporter, records), repeat=1)[0], 4),
+        "frame_top_k_s": round(_timed(lambda: generate_matches(exporter, pool, k=50))[0], 4),
+    }
+    for name in ("get_exporter_dashboard", "recommend_safe_regions", "generate_matches"):
+        print(f"rows={n:>10,}  {name:<24} {results[name]}")
+    save()
+
+    # The API in-process, a fixed request mix per client count
+    results["load"] = {}
+    with TestClient(app.app) as client:
+        requests = _load_requests(options["requests"], snapshot, seed)
+        for clients in options["clients"]:
+            response_cache.clear()
+            load = _load_test(client, requests, clients)
+            results["load"][f"clients={clients}"] = load
+            print(
+                f"rows={n:>10,}  load clients={clients:>3}  {load['throughput_rps']:9.1f} req/s  "
+                f"p50 {load['all']['p50_ms']:8.2f} ms  p95 {load['all']['p95_ms']:8.2f} ms  "
+                f"p99 {load['all']['p99_ms']:8.2f} ms  {load['statuses']}"
+            )
+            save()
+
+
+def _suite_metadata(args):
+    import platform
+
+    import pandas as pd
+    import sklearn
+
+    from data import MODEL_PATH
+
+    def git(*command):
+        try:
+            return subprocess.run(
+                ["git", *command], capture_output=True, text=True, check=True,
+                cwd=Path(__file__).resolve().parent,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "model_bytes": MODEL_PATH.stat().st_size if MODEL_PATH.exists() else None,
+        "env": {
+            k: v for k, v in os.environ.items()
+            if k.startswith(("LEAD_", "RESPONSE_", "WORK_", "METRICS"))
+        },
+        "seed": args.seed,
+        "requests": args.requests,
+        "clients": args.clients,
+    }
+
+
+def _flat_metrics(results, prefix=""):
+
+    # Comparable leaves: timings (lower is better) and throughputs (higher)
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flat_metrics(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            if key.endswith(("_s", "_ms")):
+                flat[name] = (value, False)
+            elif "throughput" in key:
+                flat[name] = (value, True)
+    return flat
+
+
+def _compare_suite(baseline, current, tolerance):
+
+    old = _flat_metrics(baseline["sizes"])
+    new = _flat_metrics(current["sizes"])
+    regressions = []
+    for name in sorted(set(old) & set(new)):
+        (before, higher_is_better), (after, _) = old[name], new[name]
+        if not before or not after:
+            continue
+        change = (before / after if higher_is_better else after / before) - 1
+        flag = ""
+        noise = SUITE_NOISE_S * (1000 if name.endswith("_ms") else 1)
+        if not higher_is_better and abs(after - before) < noise:
+            pass
+        elif change > tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -tolerance:
+            flag = "  faster"
+        print(f"{name:<80} {before:>12.4f} -> {after:>12.4f}  {change:+7.1%}{flag}")
+    return regressions
+
+
+def bench_suite(args):
+    import json
+
+    backend = Path(__file__).resolve().parent
+    data_dir = Path(args.data_dir)
+    commit = (_suite_metadata(args)["commit"] or "unknown")[:10]
+    out = Path(args.out or backend / "bench_results" / f"{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+
+    report = {"meta": _suite_metadata(args), "sizes": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            size_out = Path(tmp) / f"{n}.json"
+            options = {
+                "rows": n, "seed": args.seed, "data_dir": str(data_dir),
+                "requests": args.requests, "clients": args.clients, "out": str(size_out),
+            }
+            env = {
+                **os.environ,
+                "TRADE_DATA_PATH": str(data_dir / f"trade_{n}_{args.seed}.csv"),
+                "NEWS_DATA_PATH": str(data_dir / f"news_{n}_{args.seed}.csv"),
+                "LEAD_DB_PATH": str(Path(tmp) / f"leads_{n}.db"),
+                "PROFILE_REQUESTS": "0",
+            }
+            status = subprocess.run(
+                [sys.executable, "-c", f"from benchmark import _suite_run; _suite_run({json.dumps(options)!r})"],
+                cwd=backend, env=env,
+            ).returncode
+            results = json.loads(size_out.read_text()) if size_out.exists() else {"rows": n}
+            if status != 0:
+                # e.g. killed for memory at 10M rows on a small host; the
+                # sections finished before that are kept
+                results["error"] = f"exited with status {status}"
+                print(f"rows={n:>10,}  failed (status {status})")
+            report["sizes"][str(n)] = results
+
+    out.write_text(json.dumps(report, indent=1) + "\n")
+    print(f"results: {out}")
+
+    if args.compare:
+        regressions = _compare_suite(json.loads(Path(args.compare).read_text()), report, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} metrics regressed by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+BENCHMARKS = {
+    "match-batch": bench_match_batch,
+    "match-index": bench_match_index,
+    "matches": bench_matches,
+    "memory": bench_memory,
+    "startup": bench_startup,
+    "import-time": bench_import_time,
+    "forest": bench_forest,
+    "upsert": bench_upsert,
+    "scoring": bench_scoring,
+    "region-features": bench_region_features,
+    "parallel": bench_parallel,
+    "actions": bench_actions,
+    "cache": bench_cache,
+    "json": bench_json,
+    "pages": bench_pages,
+    "regions": bench_regions,
+    "store": bench_store,
+    "concurrency": bench_concurrency,
+    "metrics": bench_metrics,
+    "reasons": bench_reasons,
+    "suite": bench_suite,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backend benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--buyers", type=int, default=1000)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 100, 12_000])
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--rules", type=int, nargs="+", default=[3, 15])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32],
+                        help="suite: concurrent clients in the load test")
+    parser.add_argument("--requests", type=int, default=2_000,
+                        help="suite: requests per load-test run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=str(Path(__file__).resolve().parent / "bench_data"),
+                        help="suite: where synthetic datasets are generated and reused")
+    parser.add_argument("--out", default=None, help="suite: results JSON")
+    parser.add_argument("--compare", default=None,
+                        help="suite: earlier results JSON; exits 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="suite: relative slowdown counted as a regression")
+    args = parser.parse_args()
+
+    BENCHMARKS[args.benchmark](args)
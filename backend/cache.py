@@ -0,0 +1,122 @@
+# backend/cache.py
+# In-process LRU/TTL cache for read-only API responses.
+#
+# Entries hold the encoded JSON body keyed by (endpoint, params, version),
+# where the version token names the dataset, model or snapshot the response
+# was built from. A new dataset, model or upsert therefore just misses; the
+# superseded entries age out of the LRU or expire after the TTL. The same key
+# gives the response's ETag, so a client holding a current copy gets a 304
+# without the payload being built at all.
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "300"))
+RESPONSE_CACHE_ENTRIES = int(os.environ.get("RESPONSE_CACHE_ENTRIES", "256"))
+RESPONSE_CACHE_BYTES = int(os.environ.get("RESPONSE_CACHE_BYTES", str(64 * 2**20)))
+
+# Browsers/CDN may reuse a response for this long before revalidating;
+# 0 means revalidate every time (cheap: a matching ETag is a 304)
+RESPONSE_MAX_AGE = int(os.environ.get("RESPONSE_MAX_AGE", "0"))
+CACHE_CONTROL = f"public, max-age={RESPONSE_MAX_AGE}, must-revalidate"
+
+
+class ResponseCache:
+
+    def __init__(self, max_entries, max_bytes, ttl):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, body)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, key):
+
+        # The cached body, or None on a miss
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self._drop(key)
+                self.expired += 1
+            self.misses += 1
+        return None
+
+    def put(self, key, body):
+
+        if self.ttl <= 0 or len(body) > self.max_bytes:
+            return body
+
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, body)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, old_body) = self._entries.popitem(last=False)
+                self._bytes -= len(old_body)
+                self.evictions += 1
+
+        return body
+
+    def _drop(self, key):
+        _, body = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def count_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "not_modified": self.not_modified,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "ttl_seconds": self.ttl,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_ENTRIES, RESPONSE_CACHE_BYTES, RESPONSE_CACHE_TTL)
+
+
+def etag(key):
+    return '"' + hashlib.sha1(repr(key).encode()).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match, tag):
+    # If-None-Match: "*", or a list of (possibly weak, W/"...") tags
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == tag
+        for candidate in if_none_match.split(",")
+    )
@@ -0,0 +1,220 @@
+# backend/data.py
+# Shared loader for trade_data_processed_cleaned.csv with an explicit schema:
+# category dtypes for low-cardinality strings, downcast numerics, parsed Date,
+# and only the columns a consumer asks for.
+#
+# Writers also emit a binary columnar cache next to the CSV (one .npy file per
+# column). Readers memory-map it, so several API workers share the same pages,
+# and fall back to the CSV whenever the cache is missing or stale.
+#
+#   python data.py    # rebuild the cache from the CSV
+
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# -------------------------
+# Paths
+# -------------------------
+BASE_DIR = Path(__file__).resolve().parent
+# TRADE_DATA_PATH points every reader and writer at another dataset (the
+# benchmark suite's synthetic ones)
+DATA_PATH = Path(os.environ.get(
+    "TRADE_DATA_PATH", BASE_DIR / "trade_data_processed_cleaned.csv"
+))
+MODEL_PATH = BASE_DIR / "lead_model.pkl"
+
+# -------------------------
+# Model Features
+# -------------------------
+FEATURES = [
+    "Intent_Score",
+    "Shipment_Value_USD",
+    "Quantity_Tons",
+    "Prompt_Response_Score",
+    "SalesNav_ProfileViews",
+    "Tariff_Impact",
+    "War_Risk",
+    "Currency_Shift"
+]
+
+# -------------------------
+# Schema
+# -------------------------
+# Two-decimal scores are stored as float32 (the forest compares in float32
+# anyway). Money, tonnage and open-ended counters stay 64-bit: read_csv wraps
+# integers that overflow a narrower dtype instead of failing.
+TRADE_SCHEMA = {
+    "Record_ID": "int32",
+    "Exporter_ID": "str",
+    "State": "category",
+    "Industry": "category",
+    "MSME_Udyam": "float32",
+    "Manufacturing_Capacity_Tons": "float32",
+    "Revenue_Size_USD": "int64",
+    "Team_Size": "int64",
+    "Certification": "category",
+    "Good_Payment_Terms": "int8",
+    "Prompt_Response_Score": "float32",
+    "Hiring_Signal": "int8",
+    "LinkedIn_Activity": "int64",
+    "SalesNav_ProfileViews": "int64",
+    "SalesNav_JobChange": "int8",
+    "Intent_Score": "float32",
+    "Shipment_Value_USD": "float64",
+    "Quantity_Tons": "float64",
+    "Tariff_Impact": "float32",
+    "StockMarket_Impact": "float32",
+    "War_Risk": "int8",
+    "Natural_Calamity_Risk": "int8",
+    "Currency_Shift": "float32",
+    "Converted": "int8",
+    "Impact_Score": "float32",
+}
+
+DATE_COLUMNS = ["Date"]
+
+# Columns each consumer reads
+SCORING_COLUMNS = [
+    "Record_ID", "Exporter_ID", "Industry", "State", "Revenue_Size_USD"
+] + FEATURES
+
+
+def file_signature(path):
+    stat = Path(path).stat()
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _read_csv(path, usecols):
+
+    def wanted(column):
+        return usecols is None or column in usecols
+
+    return pd.read_csv(
+        path,
+        usecols=usecols,
+        dtype={c: t for c, t in TRADE_SCHEMA.items() if wanted(c)},
+        parse_dates=[c for c in DATE_COLUMNS if wanted(c)],
+    )
+
+
+def load_trade_data(columns=None, path=DATA_PATH, use_cache=True):
+
+    usecols = list(dict.fromkeys(columns)) if columns is not None else None
+
+    if use_cache:
+        df = _read_cache(path, usecols)
+        if df is not None:
+            return df
+
+    return _read_csv(path, usecols)
+
+
+def save_trade_data(df, path=DATA_PATH):
+    df.to_csv(path, index=False)
+    write_trade_cache(path)
+
+
+# -------------------------
+# Binary Columnar Cache
+# -------------------------
+def cache_path(path=DATA_PATH):
+    return Path(path).with_suffix(".npcache")
+
+
+def write_trade_cache(path=DATA_PATH):
+
+    # Built from the CSV itself so cached and CSV reads return identical frames
+    df = _read_csv(path, None)
+
+    cache_dir = cache_path(path)
+    tmp_dir = cache_dir.with_name(f"{cache_dir.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir()
+
+    columns = []
+    for position, name in enumerate(df.columns):
+        column = df[name]
+        entry = {"name": name, "file": f"{position}.npy"}
+
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            entry["kind"] = "category"
+            entry["categories"] = column.cat.categories.tolist()
+            values = column.cat.codes.to_numpy()
+        elif pd.api.types.is_numeric_dtype(column.dtype) or \
+                pd.api.types.is_datetime64_dtype(column.dtype):
+            entry["kind"] = "array"
+            values = column.to_numpy()
+        else:
+            # Strings are dictionary-encoded; code -1 is missing
+            codes, uniques = pd.factorize(column)
+            entry["kind"] = "str"
+            entry["categories"] = uniques.tolist()
+            values = codes.astype(np.int32)
+
+        np.save(tmp_dir / entry["file"], values)
+        columns.append(entry)
+
+    meta = {
+        "source": list(file_signature(path)),
+        "schema": TRADE_SCHEMA,
+        "columns": columns,
+    }
+    (tmp_dir / "meta.json").write_text(json.dumps(meta))
+
+    # Swap directories instead of overwriting files: workers that still map
+    # the old cache keep reading the old (unlinked) files safely.
+    old_dir = cache_dir.with_name(f"{cache_dir.name}.old-{os.getpid()}-{time.time_ns()}")
+    if cache_dir.exists():
+        cache_dir.rename(old_dir)
+    tmp_dir.rename(cache_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    return cache_dir
+
+
+def _read_cache(path, usecols):
+
+    cache_dir = cache_path(path)
+    try:
+        meta = json.loads((cache_dir / "meta.json").read_text())
+        source = tuple(file_signature(path))
+    except (OSError, ValueError):
+        return None
+
+    if tuple(meta["source"]) != source or meta["schema"] != TRADE_SCHEMA:
+        return None
+
+    entries = [
+        e for e in meta["columns"] if usecols is None or e["name"] in usecols
+    ]
+    if usecols is not None and len(entries) != len(usecols):
+        return None
+
+    columns = {}
+    try:
+        for entry in entries:
+            values = np.asarray(np.load(cache_dir / entry["file"], mmap_mode="r"))
+
+            if entry["kind"] == "category":
+                columns[entry["name"]] = pd.Categorical.from_codes(
+                    values, categories=pd.Index(entry["categories"], dtype="str")
+                )
+            elif entry["kind"] == "str":
+                lookup = np.array(entry["categories"] + [np.nan], dtype=object)
+                columns[entry["name"]] = pd.array(lookup[values], dtype="str")
+            else:
+                columns[entry["name"]] = values
+    except OSError:
+        return None
+
+    return pd.DataFrame(columns, copy=False)
+
+
+if __name__ == "__main__":
+    print(write_trade_cache())
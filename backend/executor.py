@@ -0,0 +1,136 @@
+# backend/executor.py
+# Work pool for the API's CPU-heavy request work.
+#
+# Handlers are async; the pandas/numpy/sklearn part of a request runs here,
+# on a dedicated bounded pool, instead of on the event loop or Starlette's
+# shared threadpool. Admission is bounded: with WORK_MAX_PENDING tasks queued
+# or running, a new one is refused (WorkPoolFull, a 503 with Retry-After)
+# instead of joining an ever longer queue. Tasks given a key are coalesced:
+# while one is in flight, identical requests await its result instead of
+# running their own.
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from metrics import METRICS, observe_stage, profiler
+
+# "thread" (default) or "process": with "process", tasks marked
+# process_safe (picklable in and out, no snapshot access) run in worker
+# processes, free of the GIL; everything else still runs on threads
+WORK_EXECUTOR = os.environ.get("WORK_EXECUTOR", "thread")
+WORK_WORKERS = int(os.environ.get("WORK_WORKERS", str(os.cpu_count() or 1)))
+WORK_MAX_PENDING = int(os.environ.get("WORK_MAX_PENDING", "64"))
+WORK_RETRY_AFTER = int(os.environ.get("WORK_RETRY_AFTER", "1"))
+
+
+class WorkPoolFull(Exception):
+    pass
+
+
+def _queued(submitted, fn, *args):
+    # Time between submission and a pool thread picking the task up
+    if METRICS:
+        observe_stage("work.queue", time.perf_counter() - submitted)
+    return fn(*args)
+
+
+class WorkPool:
+
+    def __init__(self, kind, workers, max_pending):
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self._threads = ThreadPoolExecutor(workers, thread_name_prefix="work")
+        self._processes = None
+        self._inflight = {}     # (event loop, key) -> future of the running task
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.failed = 0
+
+    def _executor(self, process_safe):
+        if not (process_safe and self.kind == "process"):
+            return self._threads
+        with self._lock:
+            if self._processes is None:
+                # Spawned: forking a process running an event loop and
+                # worker threads is not safe
+                self._processes = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._processes
+
+    async def run(self, key, fn, *args, process_safe=False):
+
+        # key=None: never coalesced (writes, or work unique to the request)
+        loop = asyncio.get_running_loop()
+        slot = (loop, key)
+
+        with self._lock:
+            future = self._inflight.get(slot) if key is not None else None
+            if future is not None:
+                self.coalesced += 1
+            elif self.pending >= self.max_pending:
+                self.rejected += 1
+                raise WorkPoolFull(f"{self.pending} requests already queued or running")
+            else:
+                self.pending += 1
+                self.submitted += 1
+
+        if future is None:
+            try:
+                executor = self._executor(process_safe)
+                if executor is self._threads:
+                    fn = profiler.bind(partial(_queued, time.perf_counter(), fn))
+                future = loop.run_in_executor(executor, fn, *args)
+            except BaseException:
+                with self._lock:
+                    self.pending -= 1
+                raise
+            if key is not None:
+                with self._lock:
+                    self._inflight[slot] = future
+            future.add_done_callback(lambda done: self._finished(slot, done))
+
+        # Shielded: a client that goes away doesn't cancel the work others
+        # are waiting on
+        return await asyncio.shield(future)
+
+    def _finished(self, slot, future):
+        with self._lock:
+            self.pending -= 1
+            if self._inflight.get(slot) is future:
+                del self._inflight[slot]
+            if not future.cancelled() and future.exception() is not None:
+                self.failed += 1
+
+    def shutdown(self):
+        # Worker processes go with the app; threads are reused by the next
+        # app started in this process
+        with self._lock:
+            processes, self._processes = self._processes, None
+        if processes is not None:
+            processes.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "executor": self.kind,
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "submitted": self.submitted,
+                "coalesced": self.coalesced,
+                "rejected": self.rejected,
+                "failed": self.failed,
+            }
+
+
+work_pool = WorkPool(WORK_EXECUTOR, WORK_WORKERS, WORK_MAX_PENDING)
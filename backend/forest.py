@@ -0,0 +1,205 @@
+# backend/forest.py
+# Compact inference engine for the lead model.
+#
+# The trained RandomForestClassifier is flattened into contiguous NumPy arrays
+# (feature, threshold, children, leaf probability) for all trees, and evaluated
+# level by level for every (row, tree) pair at once. Probabilities match
+# sklearn's predict_proba exactly: X is compared in float32 against float64
+# thresholds, leaf values are normalised the same way, and trees are summed in
+# the same order.
+#
+#   python forest.py    # convert lead_model.pkl -> lead_model.npz
+
+from pathlib import Path
+
+import numpy as np
+
+from data import MODEL_PATH, file_signature
+
+# Levels walked between compactions of the active (tree, row) set
+COMPACT_EVERY = 8
+
+# Rows evaluated at once: the (tree, row) working arrays are sized
+# trees x rows, so large batches are scored a block at a time
+PREDICT_CHUNK_ROWS = 16_384
+
+
+class FlatForest:
+
+    def __init__(self, arrays):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.is_leaf = arrays["is_leaf"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        # children[2 * node + went_left]
+        self.children = np.stack([self.right, self.left], axis=1).ravel()
+        self.classes_ = arrays["classes"]
+        self.feature_importances_ = arrays["feature_importances"]
+        self.feature_names_in_ = arrays["feature_names"]
+        self.n_features_in_ = len(self.feature_names_in_)
+        self.source = tuple(int(x) for x in arrays["source"])
+
+    @classmethod
+    def from_sklearn(cls, model, source=(0, 0)):
+
+        feature, threshold, left, right, value, roots = [], [], [], [], [], []
+        offset = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            leaf = tree.children_left == -1
+
+            # Leaves point at themselves so traversal can stop on them
+            own = np.arange(tree.node_count) + offset
+            left.append(np.where(leaf, own, tree.children_left + offset))
+            right.append(np.where(leaf, own, tree.children_right + offset))
+            feature.append(np.where(leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+
+            # Same normalisation as DecisionTreeClassifier.predict_proba
+            counts = tree.value[:, 0, :]
+            normalizer = counts.sum(axis=1)
+            normalizer[normalizer == 0.0] = 1.0
+            value.append(counts / normalizer[:, None])
+
+            roots.append(offset)
+            offset += tree.node_count
+
+        left = np.concatenate(left)
+        index_dtype = np.int32 if offset < np.iinfo(np.int32).max else np.int64
+
+        return cls({
+            "feature": np.concatenate(feature).astype(np.int16),
+            "threshold": np.concatenate(threshold),
+            "left": left.astype(index_dtype),
+            "right": np.concatenate(right).astype(index_dtype),
+            "is_leaf": left == np.arange(offset),
+            "value": np.concatenate(value),
+            "roots": np.array(roots, dtype=index_dtype),
+            "classes": model.classes_,
+            "feature_importances": model.feature_importances_,
+            "feature_names": np.asarray(model.feature_names_in_, dtype=str),
+            "source": np.array(source, dtype=np.int64),
+        })
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls({name: arrays[name] for name in arrays.files})
+
+    def save(self, path):
+        # Write then rename, so a concurrent load never sees a partial file
+        tmp_path = Path(path).with_suffix(".tmp.npz")
+        np.savez(
+            tmp_path,
+            feature=self.feature,
+            threshold=self.threshold,
+            left=self.left,
+            right=self.right,
+            is_leaf=self.is_leaf,
+            value=self.value,
+            roots=self.roots,
+            classes=self.classes_,
+            feature_importances=self.feature_importances_,
+            feature_names=self.feature_names_in_,
+            source=np.array(self.source, dtype=np.int64),
+        )
+        tmp_path.replace(path)
+
+    @property
+    def nbytes(self):
+        return sum(
+            a.nbytes for a in (
+                self.feature, self.threshold, self.left, self.right,
+                self.is_leaf, self.value, self.roots
+            )
+        )
+
+    def _features(self, X):
+        if hasattr(X, "columns"):
+            X = X[list(self.feature_names_in_)]
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def leaf_nodes(self, X):
+
+        # Returns a (trees, rows) array of leaf node ids
+        X = self._features(X)
+        n_rows, n_features = X.shape
+        n_trees = len(self.roots)
+        flat_X = X.ravel()
+
+        # One (tree, row) pair per slot, tree-major so consecutive gathers
+        # stay inside the same tree's nodes
+        pairs = np.arange(n_trees * n_rows)
+        nodes = np.repeat(self.roots, n_rows)
+        row_offsets = np.tile(np.arange(n_rows) * n_features, n_trees)
+        leaves = np.empty_like(nodes)
+
+        while pairs.size:
+            # Leaves loop back to themselves, so finished pairs can ride
+            # along for a few levels before the active set is compacted
+            for _ in range(COMPACT_EVERY):
+                go_left = flat_X[row_offsets + self.feature[nodes]] <= self.threshold[nodes]
+                nodes = self.children[2 * nodes + go_left]
+
+            done = self.is_leaf[nodes]
+            leaves[pairs[done]] = nodes[done]
+
+            active = ~done
+            pairs = pairs[active]
+            nodes = nodes[active]
+            row_offsets = row_offsets[active]
+
+        return leaves.reshape(n_trees, n_rows)
+
+    def predict_proba(self, X):
+
+        X = self._features(X)
+        proba = np.zeros((len(X), self.value.shape[1]))
+
+        for start in range(0, len(X), PREDICT_CHUNK_ROWS):
+            block = proba[start:start + PREDICT_CHUNK_ROWS]
+            # Accumulate tree by tree, as the forest does, for identical
+            # rounding
+            for tree_leaves in self.leaf_nodes(X[start:start + PREDICT_CHUNK_ROWS]):
+                block += self.value[tree_leaves]
+
+        proba /= len(self.roots)
+        return proba
+
+
+def flat_model_path(model_path):
+    return Path(model_path).with_suffix(".npz")
+
+
+def export_flat_forest(model, model_path):
+    forest = FlatForest.from_sklearn(model, source=file_signature(model_path))
+    forest.save(flat_model_path(model_path))
+    return forest
+
+
+def load_flat_forest(model_path):
+
+    # Use the exported arrays when they were built from this exact pickle,
+    # otherwise convert the pickle (slow path, needs sklearn) and re-export.
+    path = flat_model_path(model_path)
+    try:
+        forest = FlatForest.load(path)
+        if forest.source == file_signature(model_path):
+            return forest
+    except (OSError, ValueError, KeyError):
+        pass
+
+    import joblib
+
+    return export_flat_forest(joblib.load(model_path), model_path)
+
+
+if __name__ == "__main__":
+    import joblib
+
+    export_flat_forest(joblib.load(MODEL_PATH), MODEL_PATH)
+    print(flat_model_path(MODEL_PATH))
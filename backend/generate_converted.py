@@ -2,7 +2,9 @@ import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
 
-df = pd.read_csv("trade_data_processed_cleaned.csv")
+from data import load_trade_data, save_trade_data
+
+df = load_trade_data()
 
 features = [
     "Intent_Score",
@@ -34,6 +36,6 @@ probability = 1 / (1 + np.exp(-linear_score))
 
 df["Converted"] = np.random.binomial(1, probability)
 
-df.to_csv("trade_data_processed_cleaned.csv", index=False)
+save_trade_data(df)
 
 print("Realistic Converted regenerated.")
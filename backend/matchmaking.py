@@ -1,45 +1,388 @@
 # backend/matchmaking.py
 
-def calculate_match_score(exporter, buyer):
-    score = 0
+import os
+
+import numpy as np
+import pandas as pd
+
+from metrics import stage
+from serialize import RESPONSE_JSON, columns_json, dumps, standard_json
+
+BUYER_RISK_WEIGHT = {
+    "low": 20,
+    "medium": 10,
+    "high": 0
+}
+
+
+# -------------------------
+# Matchmaking (buyers for one exporter)
+# (every buyer is scored in one NumPy pass; a list of buyer dicts and a
+# DataFrame of buyers take the same path)
+# -------------------------
+def _lowered_lookup(values, lookup):
+
+    # Lower-case and look up each distinct string once instead of per row
+    categorical = pd.Categorical(values)
+    mapped = np.array([lookup(str(c).lower()) for c in categorical.categories])
+    mapped = np.append(mapped, lookup(None))  # code -1 (missing)
+
+    return mapped[categorical.codes]
+
+
+def score_buyers(exporter, buyers):
+
+    # Match score (0-100) of every buyer. `buyers` is a DataFrame (or dict
+    # of columns).
+    if not isinstance(buyers, pd.DataFrame):
+        buyers = pd.DataFrame(buyers)
+
+    exporter_industry = exporter["industry"].lower()
 
     # 1️⃣ Industry Match (30%)
-    if exporter["industry"].lower() == buyer["industry"].lower():
-        score += 30
+    score = _lowered_lookup(
+        buyers["industry"],
+        lambda industry: 30 if industry == exporter_industry else 0
+    )
 
     # 2️⃣ Risk Compatibility (20%)
-    risk_weight = {
-        "low": 20,
-        "medium": 10,
-        "high": 0
-    }
-    score += risk_weight.get(buyer["risk_level"].lower(), 0)
+    score = score + _lowered_lookup(
+        buyers["risk_level"],
+        lambda risk: BUYER_RISK_WEIGHT.get(risk, 0)
+    )
 
     # 3️⃣ Trade Volume Compatibility (20%)
-    volume_diff = abs(exporter["trade_volume"] - buyer["trade_volume"])
-    if volume_diff < 100000:
-        score += 20
-    elif volume_diff < 300000:
-        score += 10
+    volume_diff = np.abs(
+        exporter["trade_volume"] - buyers["trade_volume"].to_numpy(dtype=float)
+    )
+    score = score + np.where(volume_diff < 100000, 20, np.where(volume_diff < 300000, 10, 0))
 
     # 4️⃣ Lead Score Compatibility (15%)
     if exporter["lead_score"] > 85:
-        score += 15
+        score = score + 15
     elif exporter["lead_score"] > 70:
-        score += 8
+        score = score + 8
 
     # 5️⃣ Historical Success (15%)
-    score += buyer.get("success_rate", 5)
+    if "success_rate" in buyers.columns:
+        score = score + buyers["success_rate"].fillna(5).to_numpy()
+    else:
+        score = score + 5
+
+    return np.minimum(score, 100)
+
+
+def generate_matches(exporter, buyers, k=None):
+
+    # Buyers by descending match score, the top k only when k is given; ties
+    # keep the buyers' order. A list of buyer dicts gives copies of those
+    # dicts with "match_score" added, a DataFrame a DataFrame.
+    records = None
+    if not isinstance(buyers, pd.DataFrame):
+        records = list(buyers)
+        buyers = pd.DataFrame(records)
+    if not len(buyers):
+        return [] if records is not None else buyers.assign(match_score=[])
+
+    score = score_buyers(exporter, buyers)
+
+    if k is None:
+        top = np.argsort(-score, kind="stable")
+    else:
+        top = top_k_indices(score, k)
+
+    if records is not None:
+        return [
+            {**records[i], "match_score": match_score}
+            for i, match_score in zip(top.tolist(), score[top].tolist())
+        ]
+
+    matches = buyers.iloc[top].copy()
+    matches["match_score"] = score[top]
+
+    return matches
+
+
+# -------------------------
+# Live Matchmaking (scored exporter snapshot)
+# -------------------------
+RISK_PENALTY = {"Low": 0.05, "Medium": 0.10, "High": 0.20}
+
+# Partitions of at least this many exporters answer buyers from their
+# match index instead of scoring every exporter (see Indexed Top-k)
+MATCH_INDEX_MIN_ROWS = int(os.environ.get("MATCH_INDEX_MIN_ROWS", "8192"))
+# Exporters taken from each side of the index per buyer before reranking
+MATCH_CANDIDATES = int(os.environ.get("MATCH_CANDIDATES", "64"))
+# Request bounds: matches returned per buyer, and buyers per batch (every
+# buyer is scored against its industry's exporters)
+MATCH_MAX_K = int(os.environ.get("MATCH_MAX_K", "100"))
+MATCH_MAX_BUYERS = int(os.environ.get("MATCH_MAX_BUYERS", "1000"))
+
+
+def normalize_industry(industry):
+    return industry.strip().lower()
+
+
+def industry_keys(industries):
+
+    # Normalized industry per row; categoricals are normalized per category
+    if isinstance(industries.dtype, pd.CategoricalDtype):
+        normalized = np.append(
+            industries.cat.categories.str.strip().str.lower().to_numpy(dtype=object),
+            None
+        )
+        return pd.Series(normalized[industries.cat.codes.to_numpy()], index=industries.index)
+
+    return industries.str.strip().str.lower()
+
+
+def build_industry_index(scores):
+
+    # normalized industry -> that industry's exporters, sorted by Quantity_Tons,
+    # with their positions by descending lead score (the match index; None
+    # when either column has gaps, which leaves the partition exhaustive)
+    keys = industry_keys(scores["Industry"])
+    index = {}
+
+    for industry, rows in scores.groupby(keys, sort=False).indices.items():
+        partition = scores.iloc[rows]
+        order = np.argsort(partition["Quantity_Tons"].to_numpy(), kind="stable")
+        partition = partition.iloc[order].reset_index(drop=True)
+
+        quantity = partition["Quantity_Tons"].to_numpy(dtype=float)
+        lead_score = partition["lead_score"].to_numpy(dtype=float)
+        by_score = None
+        if not (np.isnan(quantity).any() or np.isnan(lead_score).any()):
+            by_score = np.argsort(-lead_score, kind="stable")
+
+        index[industry] = {
+            "frame": partition,
+            "quantity": quantity,
+            "lead_score": lead_score,
+            "by_score": by_score,
+        }
+
+    return index
+
+
+def top_k_indices(values, k):
+
+    # Partial selection: O(n) to find the k-th best value, then only the
+    # candidates at or above it are sorted. Ties keep partition order.
+    n = len(values)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=int)
+    if k >= n:
+        return np.argsort(-values, kind="stable")
+
+    kth_value = np.partition(values, n - k)[n - k]
+    candidates = np.flatnonzero(values >= kth_value)
+    order = np.argsort(-values[candidates], kind="stable")
+
+    return candidates[order][:k]
+
+
+# Buyers x candidates block size, so batch scoring stays bounded in memory
+MATCH_BLOCK_CELLS = 4_000_000
+
+
+def _match_frame(partition, top, quantity_diff, quantity_score,
+                 intent_alignment, match_score):
+
+    matches = partition["frame"].iloc[top].copy()
+    matches["quantity_diff"] = quantity_diff
+    matches["quantity_score"] = quantity_score
+    matches["intent_alignment"] = intent_alignment
+    matches["match_score"] = match_score
+
+    return matches
+
+
+def match_live_exporters_batch(industry_index, buyers, k=5, frames=False):
+
+    # buyers: dicts with industry, required_quantity, intent_score and
+    # risk_tolerance. Returns one top-k match list per buyer, in input order
+    # (frames=True: one DataFrame per matched buyer, for columnar encoding).
+    results = [[] for _ in buyers]
+
+    with stage("match_live.filter"):
+        groups = {}
+        for position, buyer in enumerate(buyers):
+            groups.setdefault(normalize_industry(buyer["industry"]), []).append(position)
+
+    for industry, positions in groups.items():
+        partition = industry_index.get(industry)
+        if partition is None:
+            continue
+
+        quantity = partition["quantity"]
+        block = max(1, MATCH_BLOCK_CELLS // max(len(quantity), 1))
+        indexed = (
+            partition.get("by_score") is not None and len(quantity) >= MATCH_INDEX_MIN_ROWS
+        )
+
+        for start in range(0, len(positions), block):
+            members = positions[start:start + block]
+
+            required = np.array(
+                [buyers[p]["required_quantity"] for p in members], dtype=float
+            )
+            intent_alignment = np.array(
+                [buyers[p]["intent_score"] for p in members], dtype=float
+            ) / 100
+            risk_penalty = np.array(
+                [RISK_PENALTY.get(buyers[p]["risk_tolerance"], 0.10) for p in members]
+            )
+
+            if indexed:
+                with stage("match_live.index"):
+                    tops, values = zip(*(
+                        indexed_top_k(partition, *buyer, k)
+                        for buyer in zip(required, intent_alignment, risk_penalty)
+                    ))
+                    rows = np.repeat(np.arange(len(members)), [len(t) for t in tops])
+                    cols = np.concatenate(tops)
+                    quantity_diff, quantity_score, match_score = (
+                        np.concatenate(v) for v in zip(*values)
+                    )
+            else:
+                with stage("match_live.score"):
+                    # Quantity match score, intent alignment and risk
+                    # adjustment as a buyers x candidates matrix
+                    quantity_diff = np.abs(quantity[None, :] - required[:, None])
+                    quantity_score = 1 / (1 + quantity_diff)
+
+                    match_score = (
+                        0.5 * partition["lead_score"][None, :] +
+                        0.3 * quantity_score * 100 +
+                        0.2 * intent_alignment[:, None] * 100
+                    ) * (1 - risk_penalty[:, None])
+
+                with stage("match_live.sort"):
+                    tops = [top_k_indices(match_score[i], k) for i in range(len(members))]
+                    rows = np.repeat(np.arange(len(members)), [len(t) for t in tops])
+                    cols = np.concatenate(tops)
+                    quantity_diff = quantity_diff[rows, cols]
+                    quantity_score = quantity_score[rows, cols]
+                    match_score = match_score[rows, cols]
+
+            with stage("match_live.frame"):
+                matches = _match_frame(
+                    partition,
+                    cols,
+                    quantity_diff,
+                    quantity_score,
+                    intent_alignment[rows],
+                    match_score,
+                )
+                if frames:
+                    matches = matches.reset_index(drop=True)
+                else:
+                    matches = matches.to_dict(orient="records")
+
+            offset = 0
+            for position, top in zip(members, tops):
+                stop = offset + len(top)
+                results[position] = (
+                    matches.iloc[offset:stop] if frames else matches[offset:stop]
+                )
+                offset = stop
+
+    return results
+
+
+def match_live_exporters(industry_index, industry, required_quantity,
+                         intent_score, risk_tolerance, k=5, frames=False):
+
+    buyer = {
+        "industry": industry,
+        "required_quantity": required_quantity,
+        "intent_score": intent_score,
+        "risk_tolerance": risk_tolerance,
+    }
+
+    return match_live_exporters_batch(industry_index, [buyer], k, frames)[0]
+
+
+# -------------------------
+# Indexed Top-k
+# (a buyer's score is 0.5 * lead_score + 30 / (1 + |quantity - required|),
+# scaled by constants of the buyer, so the best exporters are near the
+# required quantity or high in lead score. Candidates are the exporters
+# nearest in quantity (the partition's sort order) and the highest in lead
+# score (by_score), reranked with the exact formula. Every other exporter
+# is at least `gap` tons away and at most `ceiling` in lead score; when the
+# k-th candidate beats that bound the result is the exhaustive one, ties
+# included. Otherwise the candidate lists grow until it does.)
+# -------------------------
+def indexed_top_k(partition, required, intent_alignment, risk_penalty, k, exact=True):
+
+    # Positions of the top k and their quantity_diff, quantity_score and
+    # match_score, as match_live_exporters_batch computes them.
+    # exact=False: the first candidates' best, unchecked (approximate)
+    quantity = partition["quantity"]
+    lead_score = partition["lead_score"]
+    by_score = partition["by_score"]
+    n = len(quantity)
+    at = int(np.searchsorted(quantity, required))
+    width = MATCH_CANDIDATES
+
+    while True:
+        lo, hi = max(0, at - width), min(n, at + width)
+        candidates = np.union1d(np.arange(lo, hi), by_score[:width])
+
+        quantity_diff = np.abs(quantity[candidates] - required)
+        quantity_score = 1 / (1 + quantity_diff)
+        match_score = (
+            0.5 * lead_score[candidates] +
+            0.3 * quantity_score * 100 +
+            0.2 * intent_alignment * 100
+        ) * (1 - risk_penalty)
+        top = top_k_indices(match_score, k)
+
+        if len(candidates) == n or not k or not exact:
+            break
+        gap = min(
+            required - quantity[lo - 1] if lo else np.inf,
+            quantity[hi] - required if hi < n else np.inf,
+        )
+        ceiling = lead_score[by_score[width]] if width < n else -np.inf
+        bound = (
+            0.5 * ceiling + 0.3 * 100 / (1 + gap) + 0.2 * intent_alignment * 100
+        ) * (1 - risk_penalty)
+        if len(top) == k and match_score[top[-1]] > bound + 1e-9:
+            break
+        width *= 4
+
+    return candidates[top], (quantity_diff[top], quantity_score[top], match_score[top])
+
+
+# -------------------------
+# Live Match Responses
+# (a whole /match-live request as one picklable call with its encoded body
+# as the result, so the API can run it in a worker process; executor.py)
+# -------------------------
+def industry_subset(industry_index, buyers):
+    # Only the partitions the buyers need, to keep what is pickled small
+    keys = {normalize_industry(buyer["industry"]) for buyer in buyers}
+    return {key: industry_index[key] for key in keys if key in industry_index}
 
-    return min(score, 100)
 
+def match_live_body(industry_index, buyers, k=5, format="records", single=False):
 
-def generate_matches(exporter, buyers):
-    results = []
+    # format=columns: one columnar body per buyer (serialize.columns_json)
+    results = match_live_exporters_batch(
+        industry_index, buyers, k, frames=format == "columns"
+    )
 
-    for buyer in buyers:
-        buyer_copy = buyer.copy()
-        buyer_copy["match_score"] = calculate_match_score(exporter, buyer)
-        results.append(buyer_copy)
+    with stage("match_live.encode"):
+        if format == "columns":
+            if single:
+                return columns_json(results[0])
+            return b"[" + b",".join(columns_json(r) for r in results) + b"]"
 
-    return sorted(results, key=lambda x: x["match_score"], reverse=True)
+        if single:
+            results = results[0]
+        if RESPONSE_JSON == "orjson":
+            return dumps(results)
+        return standard_json(results)
@@ -0,0 +1,330 @@
+# backend/metrics.py
+# Request and stage timings, exported in the Prometheus text format.
+#
+# Hot paths time their stages with `with stage("name"):` and the API times
+# every request per route (RequestMetrics). Counters and fixed-bucket
+# histograms live in this process; /metrics renders them, no client library
+# needed. METRICS=0 makes stage() a shared no-op.
+#
+# The sampling profiler is opt-in (PROFILE_REQUESTS=1, or POST /profiling at
+# runtime). A background thread samples the stacks of work-pool threads
+# every PROFILE_INTERVAL_MS and charges each sample to the request the
+# thread is working for; when the request ends, its stage timings and
+# collapsed stacks are written to PROFILE_DIR as JSON. Work run in worker
+# processes (WORK_EXECUTOR=process) is timed per request only.
+
+import bisect
+import contextvars
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from functools import partial
+from pathlib import Path
+
+METRICS = os.environ.get("METRICS", "1") != "0"
+PROFILE_REQUESTS = os.environ.get("PROFILE_REQUESTS", "0") == "1"
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = Path(os.environ.get(
+    "PROFILE_DIR", Path(__file__).resolve().parent / "profiles"
+))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+ROW_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}   # label values -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values[:-1]):
+                cumulative += count
+                le = _labels(self.labels, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            tags = _labels(self.labels, labels)
+            lines.append(f"{self.name}_sum{tags} {_number(values[-1])}")
+            lines.append(f"{self.name}_count{tags} {cumulative}")
+        return lines
+
+
+def stats_lines(prefix, stats, counters):
+
+    # A stats() dict as gauges, except the cumulative `counters` keys
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        if key in counters:
+            name, kind = f"{prefix}_{key}_total", "counter"
+        else:
+            name, kind = f"{prefix}_{key}", "gauge"
+        lines += [f"# TYPE {name} {kind}", f"{name} {_number(value)}"]
+    return lines
+
+
+REQUEST_SECONDS = Histogram(
+    "tradeswipe_request_duration_seconds",
+    "Request latency by route, method and status.",
+    ("route", "method", "status"),
+)
+STAGE_SECONDS = Histogram(
+    "tradeswipe_stage_duration_seconds",
+    "Time spent in a stage of a hot path.",
+    ("stage",),
+)
+SCORED_ROWS = Histogram(
+    "tradeswipe_scored_rows",
+    "Rows per model scoring call (_sum: rows scored).",
+    buckets=ROW_BUCKETS,
+)
+
+HISTOGRAMS = [REQUEST_SECONDS, STAGE_SECONDS, SCORED_ROWS]
+
+
+def render(*extra_lines):
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines += histogram.render()
+    for block in extra_lines:
+        lines += block
+    return "\n".join(lines) + "\n"
+
+
+# -------------------------
+# Stage Timers
+# -------------------------
+class _Stage:
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        observe_stage(self.name, time.perf_counter() - self.start)
+
+
+_NO_STAGE = nullcontext()
+
+
+def stage(name):
+    return _Stage(name) if METRICS else _NO_STAGE
+
+
+def observe_stage(name, elapsed):
+    STAGE_SECONDS.observe(elapsed, name)
+    if profiler.enabled:
+        profiler.record_stage(name, elapsed)
+
+
+def count_scored(rows):
+    if METRICS:
+        SCORED_ROWS.observe(rows)
+
+
+# -------------------------
+# Sampling Profiler
+# -------------------------
+_current_profile = contextvars.ContextVar("current_profile", default=None)
+
+
+class RequestProfile:
+
+    def __init__(self, method, path, query):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.started = time.time()
+        self.stages = []
+        self.stacks = Counter()
+
+
+def _stack(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{Path(code.co_filename).name}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+
+    def __init__(self, interval_ms, directory):
+        self.interval = interval_ms / 1000
+        self.directory = directory
+        self.enabled = False
+        self.dumped = 0
+        self._threads = {}      # thread id -> profile of the request it works for
+        self._sampler = None
+        self._lock = threading.Lock()
+
+    def set_enabled(self, enabled):
+        with self._lock:
+            self.enabled = enabled
+            if enabled and self._sampler is None:
+                self._sampler = threading.Thread(
+                    target=self._sample, name="profiler", daemon=True
+                )
+                self._sampler.start()
+        return self.state()
+
+    def _sample(self):
+        while True:
+            with self._lock:
+                if not self.enabled:
+                    self._sampler = None
+                    return
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            for thread_id, profile in list(self._threads.items()):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    profile.stacks[_stack(frame)] += 1
+
+    def start(self, method, path, query):
+        return _current_profile.set(RequestProfile(method, path, query))
+
+    def bind(self, fn):
+        # Run on a pool thread, fn's samples and stages go to the request
+        # that submitted it
+        profile = _current_profile.get() if self.enabled else None
+        return fn if profile is None else partial(self._attached, profile, fn)
+
+    def _attached(self, profile, fn, *args):
+        thread_id = threading.get_ident()
+        self._threads[thread_id] = profile
+        try:
+            return fn(*args)
+        finally:
+            self._threads.pop(thread_id, None)
+
+    def record_stage(self, name, elapsed):
+        profile = self._threads.get(threading.get_ident()) or _current_profile.get()
+        if profile is not None:
+            profile.stages.append([name, round(elapsed * 1000, 3)])
+
+    def finish(self, token, route, status, elapsed):
+
+        # Requests that ran no timed stage on the pool (cache hits, 304s,
+        # cheap routes) leave no file
+        profile = _current_profile.get()
+        _current_profile.reset(token)
+        if profile is None or not (profile.stages or profile.stacks):
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", route).strip("-") or "root"
+        name = f"{int(profile.started * 1000)}-{profile.method}-{slug}-{id(profile):x}.json"
+        (self.directory / name).write_text(json.dumps({
+            "method": profile.method,
+            "path": profile.path,
+            "query": profile.query,
+            "route": route,
+            "status": status,
+            "duration_ms": round(elapsed * 1000, 3),
+            "interval_ms": self.interval * 1000,
+            "stages_ms": profile.stages,
+            # Collapsed stacks (flamegraph.pl / speedscope): root;...;leaf -> samples
+            "samples": dict(profile.stacks.most_common()),
+        }, indent=1))
+        self.dumped += 1
+
+    def state(self):
+        return {
+            "enabled": self.enabled,
+            "interval_ms": self.interval * 1000,
+            "directory": str(self.directory),
+            "dumped": self.dumped,
+        }
+
+
+profiler = SamplingProfiler(PROFILE_INTERVAL_MS, PROFILE_DIR)
+if PROFILE_REQUESTS:
+    profiler.set_enabled(True)
+
+
+# -------------------------
+# Request Timing (ASGI middleware)
+# -------------------------
+class RequestMetrics:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        token = None
+        if profiler.enabled:
+            token = profiler.start(
+                scope["method"], scope["path"], scope.get("query_string", b"").decode()
+            )
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.observe(elapsed, route, scope["method"], status[0])
+            if token is not None:
+                profiler.finish(token, route, status[0], elapsed)
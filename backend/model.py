@@ -1,80 +1,764 @@
+import base64
+import hashlib
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
-import joblib
 from pathlib import Path
 
+from data import (
+    DATA_PATH,
+    FEATURES,
+    MODEL_PATH,
+    SCORING_COLUMNS,
+    file_signature,
+    load_trade_data
+)
+from matchmaking import build_industry_index, industry_keys, normalize_industry
+from metrics import count_scored, stage
+from regions import RegionRiskTable
+from store import lead_store
+
 # -------------------------
 # Paths
 # -------------------------
 BASE_DIR = Path(__file__).resolve().parent
-DATA_PATH = BASE_DIR / "trade_data_processed_cleaned.csv"
-NEWS_PATH = BASE_DIR / "news_data.csv"
-MODEL_PATH = BASE_DIR / "lead_model.pkl"
+NEWS_PATH = Path(os.environ.get("NEWS_DATA_PATH", BASE_DIR / "news_data.csv"))
+
+# "sklearn" (default) or "flat" (forest.FlatForest, no sklearn at serve time)
+MODEL_ENGINE = os.environ.get("LEAD_MODEL_ENGINE", "sklearn")
+
+# Worker processes for full re-scores (snapshot builds, generate_lead_scores);
+# 1 scores in-process
+SCORE_WORKERS = int(os.environ.get("LEAD_SCORE_WORKERS", "1"))
+
+# "memory" (default): rankings and dashboards from the in-process snapshot;
+# "sqlite": snapshots are also written to leads.db (store.py) and those
+# reads are indexed queries there, shared by every worker
+LEAD_STORE = os.environ.get("LEAD_STORE", "memory")
 
 # -------------------------
 # Load Model
+# (lazily on first use, reloaded when lead_model.pkl changes)
 # -------------------------
-if not MODEL_PATH.exists():
-    raise FileNotFoundError("Run train_model.py first.")
+_model = None
+_model_signature = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    global _model, _model_signature
+
+    if not MODEL_PATH.exists():
+        raise FileNotFoundError("Run train_model.py first.")
+
+    signature = file_signature(MODEL_PATH)
+    if _model is not None and signature == _model_signature:
+        return _model
+
+    with _model_lock:
+        if _model is None or signature != _model_signature:
+            # Imported here: unpickling pulls in sklearn, which dominates
+            # import time
+            if MODEL_ENGINE == "flat":
+                from forest import load_flat_forest
+
+                _model = load_flat_forest(MODEL_PATH)
+            else:
+                import joblib
+
+                _model = joblib.load(MODEL_PATH)
+            _model_signature = signature
+        return _model
 
-model = joblib.load(MODEL_PATH)
 
 # -------------------------
 # Generate Lead Scores
 # -------------------------
+SCORE_COLUMNS = [
+    "Exporter_ID",
+    "Industry",
+    "State",
+    "Revenue_Size_USD",
+    "Quantity_Tons",
+    "lead_score",
+    "lead_category",
+    "ai_reason"
+]
+
+# ai_reason rules: (column, threshold from the column over all rows, text).
+# Each is evaluated as one mask over every row; a row's reasons are a bitmask
+# (bit i: rule i fired). The first rule heads the text, or REASON_DEFAULT when
+# it doesn't fire; the others follow in order.
+REASON_RULES = [
+    ("Intent_Score", lambda values: values.quantile(0.65), "High Buyer Intent"),
+    ("Prompt_Response_Score", lambda values: values.median(), "Strong Responsiveness"),
+    ("SalesNav_ProfileViews", lambda values: values.median(), "High Engagement"),
+]
+REASON_DEFAULT = "Balanced Performance"
+REASON_DTYPE = np.min_scalar_type((1 << len(REASON_RULES)) - 1)
+
+# Score cut-offs, best category first; scores below the last (or NaN) get
+# the final name
+CATEGORY_BOUNDS = [75, 40]
+CATEGORY_NAMES = ["High Potential", "Medium Potential", "Low Potential"]
+
+def _score_block(X):
+    return get_model().predict_proba(X)[:, 1] * 100
+
+
+def score_rows(df, workers=1):
+
+    # Rows score independently, so row blocks scored in worker processes and
+    # concatenated in order give exactly the in-process result
+    X = df[FEATURES]
+    count_scored(len(X))
+    if workers <= 1 or len(X) < 2 * workers:
+        return _score_block(X)
+
+    # Loaded first so fork-started workers inherit the model
+    get_model()
+    bounds = np.linspace(0, len(X), workers + 1).astype(int)
+    blocks = [X.iloc[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+    with ProcessPoolExecutor(workers) as pool:
+        return np.concatenate(list(pool.map(_score_block, blocks)))
+
+
+def lead_categories(scores):
+    scores = np.asarray(scores, dtype=float)
+    codes = np.select(
+        [scores >= bound for bound in CATEGORY_BOUNDS],
+        range(len(CATEGORY_BOUNDS)),
+        len(CATEGORY_BOUNDS),
+    )
+    return pd.Categorical.from_codes(codes, CATEGORY_NAMES)
+
+
+def reason_thresholds(df):
+    return {text: threshold(df[column]) for column, threshold, text in REASON_RULES}
+
+
+def reason_flags(df, thresholds):
+    flags = np.zeros(len(df), dtype=REASON_DTYPE)
+    for bit, (column, _, text) in enumerate(REASON_RULES):
+        flags |= (df[column] > thresholds[text]).to_numpy().astype(REASON_DTYPE) << bit
+    return flags
+
+
+def reason_text(flags):
+    texts = [text for bit, (_, _, text) in enumerate(REASON_RULES) if flags >> bit & 1]
+    if not flags & 1:
+        texts.insert(0, REASON_DEFAULT)
+    return ", ".join(texts)
+
+
+def reason_labels(flags):
+    # Text per distinct bitmask, not per row: rows hold a categorical code
+    # and strings only appear when rows are serialized
+    masks, codes = np.unique(flags, return_inverse=True)
+    return pd.Categorical.from_codes(codes, [reason_text(m) for m in masks.tolist()])
+
+
+def patch_labels(labels, n, positions, values):
+
+    # `labels` (a Categorical) extended to n rows, with the Categorical
+    # `values` written at positions; categories it lacks are added
+    categories = labels.categories.append(values.categories.difference(labels.categories))
+    codes = np.full(n, -1, dtype=np.int32)
+    codes[:len(labels)] = labels.codes
+    codes[positions] = categories.get_indexer(values.categories)[values.codes]
+    return pd.Categorical.from_codes(codes, categories)
+
+
+def label_rows(df, flags):
+    df["lead_category"] = lead_categories(df["lead_score"].to_numpy())
+    df["ai_reason"] = reason_labels(flags)
+
 def generate_lead_scores():
 
-    df = pd.read_csv(DATA_PATH)
-
-    features = [
-        "Intent_Score",
-        "Shipment_Value_USD",
-        "Quantity_Tons",
-        "Prompt_Response_Score",
-        "SalesNav_ProfileViews",
-        "Tariff_Impact",
-        "War_Risk",
-        "Currency_Shift"
-    ]
-
-    X = df[features]
-    probabilities = model.predict_proba(X)[:, 1]
-    df["lead_score"] = probabilities * 100
-
-    # Categorization
-    def categorize(score):
-        if score >= 75:
-            return "High Potential"
-        elif score >= 40:
-            return "Medium Potential"
+    with stage("lead_scores.load"):
+        df = load_trade_data(SCORING_COLUMNS)
+
+    with stage("lead_scores.predict"):
+        df["lead_score"] = score_rows(df, SCORE_WORKERS)
+    with stage("lead_scores.reasons"):
+        flags = reason_flags(df, reason_thresholds(df))
+    with stage("lead_scores.label"):
+        label_rows(df, flags)
+
+    with stage("lead_scores.sort"):
+        final_df = df[SCORE_COLUMNS].sort_values(
+            by="lead_score", ascending=False, kind="stable"
+        )
+
+    return final_df
+
+
+# -------------------------
+# Lead Score Snapshot
+# (scored once, rebuilt when the CSV or model file changes, patched in place
+# by upsert_exporter_rows)
+#
+#   rows           scored rows in file order (positions are stable row ids)
+#   order / rank   rank order of row positions, and each row's 0-based rank
+#   scores         rows in rank order, SCORE_COLUMNS only
+#   exporter_index Exporter_ID -> row position of its best-ranked row
+#   filter_index   per filter column: each rank's value code, and the ranks
+#                  holding each value (see Lead Score Pages)
+# -------------------------
+_snapshot = None
+_snapshot_lock = threading.RLock()
+
+
+def _rank_table(order):
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    return rank
+
+
+def build_lead_snapshot():
+
+    get_model()
+    signature = (file_signature(DATA_PATH), _model_signature)
+
+    with stage("snapshot.load"):
+        rows = load_trade_data(SCORING_COLUMNS)
+    with stage("snapshot.predict"):
+        rows["lead_score"] = score_rows(rows, SCORE_WORKERS)
+
+    with stage("snapshot.reasons"):
+        thresholds = reason_thresholds(rows)
+        rows["reason_flags"] = reason_flags(rows, thresholds)
+    with stage("snapshot.label"):
+        label_rows(rows, rows["reason_flags"].to_numpy())
+
+    with stage("snapshot.sort"):
+        lead_scores = rows["lead_score"].to_numpy()
+        order = np.argsort(-lead_scores, kind="stable")
+        rank = _rank_table(order)
+        scores = rows[SCORE_COLUMNS].take(order).reset_index(drop=True)
+
+    with stage("snapshot.index"):
+        exporter_rows = rows.groupby("Exporter_ID", sort=False).indices
+        record_rows = dict(zip(rows["Record_ID"].tolist(), range(len(rows))))
+        exporter_index = build_exporter_index(scores, order)
+        industry_index = build_industry_index(scores)
+        filter_index = build_filter_index(scores)
+
+    snapshot = {
+        "version": hashlib.sha1(repr(signature).encode()).hexdigest()[:12],
+        "signature": signature,
+        "built_at": time.time(),
+        "revision": 0,
+        "rows": rows,
+        "thresholds": thresholds,
+        "order": order,
+        "rank": rank,
+        "record_rows": record_rows,
+        "exporter_rows": exporter_rows,
+        "scores": scores,
+        "exporter_index": exporter_index,
+        "industry_index": industry_index,
+        "filter_index": filter_index,
+    }
+
+    if LEAD_STORE == "sqlite":
+        with stage("snapshot.store"):
+            lead_store.sync(rows, snapshot["version"])
+
+    return snapshot
+
+
+def _snapshot_is_stale(snapshot):
+    signature = (file_signature(DATA_PATH), file_signature(MODEL_PATH))
+    return snapshot is None or snapshot["signature"] != signature
+
+
+def get_lead_snapshot():
+    global _snapshot
+
+    snapshot = _snapshot
+    if not _snapshot_is_stale(snapshot):
+        return snapshot
+
+    with _snapshot_lock:
+        if _snapshot_is_stale(_snapshot):
+            _snapshot = build_lead_snapshot()
+        return _snapshot
+
+
+def current_lead_snapshot():
+    # The snapshot if it is up to date, else None: get_lead_snapshot() would
+    # build one
+    snapshot = _snapshot
+    return None if _snapshot_is_stale(snapshot) else snapshot
+
+
+def refresh_lead_snapshot():
+    global _snapshot
+
+    with _snapshot_lock:
+        _snapshot = build_lead_snapshot()
+        return _snapshot
+
+
+def snapshot_info(snapshot):
+    return {
+        "version": snapshot["version"],
+        "built_at": snapshot["built_at"],
+        "age_seconds": round(time.time() - snapshot["built_at"], 3),
+        "revision": snapshot["revision"],
+        "rows": int(len(snapshot["rows"])),
+    }
+
+
+# -------------------------
+# Incremental Upserts
+# (only inserted/updated rows are re-scored; ranks are merged, not re-sorted)
+# -------------------------
+def _expand_categories(rows, incoming):
+    for column in incoming.columns:
+        if isinstance(rows[column].dtype, pd.CategoricalDtype):
+            new = pd.Index(incoming[column].dropna().unique()).difference(
+                rows[column].cat.categories
+            )
+            if len(new):
+                rows[column] = rows[column].cat.add_categories(new)
+
+
+def _coerce(rows, column, values):
+    dtype = rows[column].dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return pd.Categorical(values, dtype=dtype)
+
+    # astype wraps or saturates values a narrow column can't hold; refuse them
+    if dtype.kind in "iuf":
+        try:
+            numbers = values.to_numpy(dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError(f"{column} must be numeric.") from None
+        if not np.isfinite(numbers).all():
+            raise ValueError(f"{column} must be finite.")
+        if dtype.kind in "iu":
+            info = np.iinfo(dtype)
+            # float(max) + 1 is exactly 2**bits, the first value that wraps
+            outside = (numbers < info.min) | (numbers >= float(info.max) + 1)
         else:
-            return "Low Potential"
+            info = np.finfo(dtype)
+            outside = np.abs(numbers) > info.max
+        if outside.any():
+            raise ValueError(f"{column} must be between {info.min} and {info.max}.")
+
+    return values.astype(dtype).to_numpy()
+
+
+def _industry_keys(industries):
+    return set(industry_keys(industries).dropna())
+
+
+def _merge_order(kept, touched, lead_scores):
+
+    # Rank order is descending score, ties in row order (what the stable
+    # sort of a full build gives). `kept` already is; touched rows go in with
+    # one searchsorted over a key that increases along it: 2 * (start of the
+    # row's score run) * n + row. A touched row whose score no kept row has
+    # sits between two runs.
+    moved = touched[np.lexsort((touched, -lead_scores[touched]))]
+    n = len(lead_scores)
+    kept_scores = lead_scores[kept]
+    starts = np.flatnonzero(np.r_[True, kept_scores[1:] != kept_scores[:-1]])
+    run = np.repeat(starts, np.diff(np.r_[starts, len(kept)]))
+    key = 2 * run * n + kept
+
+    at = np.searchsorted(-kept_scores, -lead_scores[moved], side="left")
+    tied = kept_scores[np.minimum(at, len(kept) - 1)] == lead_scores[moved] if len(kept) else False
+    moved_key = np.where(tied, 2 * at * n + moved, (2 * at - 1) * n)
+    return np.insert(kept, np.searchsorted(key, moved_key), moved)
+
+
+def upsert_exporter_rows(records):
+
+    # Rows are keyed by Record_ID. Known IDs are updated with the non-null
+    # fields given; unknown IDs are appended and need every scoring column.
+    global _snapshot
+
+    incoming = pd.DataFrame(list(records))
+    if incoming.empty:
+        raise ValueError("No rows to upsert.")
+    if "Record_ID" not in incoming.columns or incoming["Record_ID"].isna().any():
+        raise ValueError("Every row needs a Record_ID.")
+
+    unknown = sorted(set(incoming.columns) - set(SCORING_COLUMNS))
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+
+    incoming = incoming.drop_duplicates("Record_ID", keep="last")
+
+    with _snapshot_lock:
+        snapshot = get_lead_snapshot()
+        rows = snapshot["rows"].copy()
+        n_old = len(rows)
+
+        _expand_categories(rows, incoming)
+
+        # Dict lookups per incoming row (Series.map would convert the whole
+        # Record_ID -> row dict on every call)
+        record_rows = snapshot["record_rows"]
+        positions = np.array(
+            [record_rows.get(r, -1) for r in incoming["Record_ID"].tolist()], dtype=np.int64
+        )
+        is_new = positions < 0
+        updates = incoming[~is_new]
+        inserts = incoming[is_new]
+        updated = positions[~is_new]
+
+        old_exporters = rows["Exporter_ID"].to_numpy()[updated]
+        affected_industries = _industry_keys(rows["Industry"].iloc[updated])
+
+        # Apply updates
+        for column in updates.columns.drop("Record_ID"):
+            present = updates[column].notna().to_numpy()
+            if present.any():
+                rows.iloc[updated[present], rows.columns.get_loc(column)] = \
+                    _coerce(rows, column, updates[column][present])
+
+        # Append new rows
+        if len(inserts):
+            missing = [
+                c for c in SCORING_COLUMNS
+                if c not in inserts.columns or inserts[c].isna().any()
+            ]
+            if missing:
+                raise ValueError(f"New rows need values for: {', '.join(missing)}")
+
+            new_rows = pd.DataFrame(
+                {c: _coerce(rows, c, inserts[c]) for c in SCORING_COLUMNS}
+            )
+            rows = pd.concat([rows, new_rows], ignore_index=True)
+
+        touched = np.concatenate([updated, np.arange(n_old, len(rows))])
+
+        # Re-score touched rows only
+        lead_score_col = rows.columns.get_loc("lead_score")
+        rows.iloc[touched, lead_score_col] = score_rows(rows.iloc[touched])
+        lead_scores = rows["lead_score"].to_numpy()
+
+        # Thresholds are O(N) selections; only rows whose reasons flipped
+        # (or that were touched) get new text
+        thresholds = reason_thresholds(rows)
+        flags = reason_flags(rows, thresholds)
+        changed = np.flatnonzero(flags[:n_old] != snapshot["rows"]["reason_flags"].to_numpy())
+        relabel = np.union1d(touched, changed)
+
+        rows["reason_flags"] = flags
+        old_rows = snapshot["rows"]
+        rows["ai_reason"] = patch_labels(
+            old_rows["ai_reason"].array, len(rows), relabel, reason_labels(flags[relabel])
+        )
+        rows["lead_category"] = patch_labels(
+            old_rows["lead_category"].array, len(rows), touched,
+            lead_categories(lead_scores[touched]),
+        )
+
+        # Merge touched rows back into the rank order
+        is_touched = np.zeros(len(rows), dtype=bool)
+        is_touched[touched] = True
+        kept = snapshot["order"][~is_touched[snapshot["order"]]]
+        order = _merge_order(kept, touched, lead_scores)
+        rank = _rank_table(order)
+
+        # Exporter membership and best-ranked rows, for touched exporters only
+        exporter_ids = rows["Exporter_ID"].to_numpy()
+        exporter_rows = dict(snapshot["exporter_rows"])
+        for row, old_id in zip(updated, old_exporters):
+            if old_id != exporter_ids[row]:
+                exporter_rows[old_id] = exporter_rows[old_id][exporter_rows[old_id] != row]
+                exporter_rows[exporter_ids[row]] = np.append(
+                    exporter_rows.get(exporter_ids[row], []), row
+                ).astype(np.int64)
+        for row in range(n_old, len(rows)):
+            exporter_rows[exporter_ids[row]] = np.append(
+                exporter_rows.get(exporter_ids[row], []), row
+            ).astype(np.int64)
+
+        exporter_index = dict(snapshot["exporter_index"])
+        for exporter_id in set(old_exporters) | set(exporter_ids[touched]):
+            members = exporter_rows.get(exporter_id)
+            if members is None or not len(members):
+                exporter_rows.pop(exporter_id, None)
+                exporter_index.pop(exporter_id, None)
+            else:
+                exporter_index[exporter_id] = int(members[np.argmin(rank[members])])
+
+        record_rows = dict(snapshot["record_rows"])
+        record_rows.update(zip(
+            rows["Record_ID"].iloc[n_old:].tolist(), range(n_old, len(rows))
+        ))
+
+        # Industry partitions holding relabelled or moved rows
+        scores = rows[SCORE_COLUMNS].take(order).reset_index(drop=True)
+        affected_industries |= _industry_keys(rows["Industry"].iloc[relabel])
+        keys = industry_keys(scores["Industry"])
+        rebuilt = build_industry_index(scores[keys.isin(affected_industries).to_numpy()])
+
+        industry_index = dict(snapshot["industry_index"])
+        for industry in affected_industries:
+            if industry in rebuilt:
+                industry_index[industry] = rebuilt[industry]
+            else:
+                industry_index.pop(industry, None)
+
+        revision = snapshot["revision"] + 1
+        _snapshot = {
+            **snapshot,
+            "version": hashlib.sha1(
+                f"{snapshot['version']}:{revision}".encode()
+            ).hexdigest()[:12],
+            "revision": revision,
+            "rows": rows,
+            "thresholds": thresholds,
+            "order": order,
+            "rank": rank,
+            "record_rows": record_rows,
+            "exporter_rows": exporter_rows,
+            "scores": scores,
+            "exporter_index": exporter_index,
+            "industry_index": industry_index,
+            "filter_index": patch_filter_index(
+                snapshot["filter_index"], rows, snapshot["order"], order, rank, touched
+            ),
+        }
+
+        if LEAD_STORE == "sqlite":
+            lead_store.update_leads(rows.iloc[relabel], _snapshot["version"], len(rows))
+
+        return {
+            "version": _snapshot["version"],
+            "revision": revision,
+            "inserted": int(len(inserts)),
+            "updated": int(len(updates)),
+            "relabelled": int(len(relabel)),
+        }
 
-    df["lead_category"] = df["lead_score"].apply(categorize)
 
-    # AI Reason (vectorized basic logic)
-    df["ai_reason"] = "Balanced Performance"
+# -------------------------
+# Lead Score Pages
+# (keyset pagination over the rank order: a cursor names the last row served,
+# so page N costs what page 1 costs, and upserts between pages neither repeat
+# nor skip rows that kept their score)
+# -------------------------
+FILTER_COLUMNS = ["Industry", "State", "lead_category"]
 
-    df.loc[df["Intent_Score"] > df["Intent_Score"].quantile(0.65),
-           "ai_reason"] = "High Buyer Intent"
+# Rows per chunk of a streamed export
+EXPORT_CHUNK_ROWS = int(os.environ.get("LEAD_EXPORT_CHUNK_ROWS", "5000"))
 
-    df.loc[df["Prompt_Response_Score"] > df["Prompt_Response_Score"].median(),
-           "ai_reason"] += ", Strong Responsiveness"
+# Largest page /lead-scores serves; full dumps go through /lead-scores/export
+LEAD_PAGE_MAX = int(os.environ.get("LEAD_PAGE_MAX", "10000"))
 
-    df.loc[df["SalesNav_ProfileViews"] > df["SalesNav_ProfileViews"].median(),
-           "ai_reason"] += ", High Engagement"
 
-    final_df = df[[
-        "Exporter_ID",
-        "Industry",
-        "State",
-        "Revenue_Size_USD",
-        "Quantity_Tons",
-        "lead_score",
-        "lead_category",
-        "ai_reason"
-    ]].sort_values(by="lead_score", ascending=False)
+def build_filter_index(scores):
 
-    return final_df
+    # Values match like industries do: stripped and case-insensitive
+    # (normalized per distinct value, then mapped back onto the rows)
+    index = {}
+    for column in FILTER_COLUMNS:
+        codes, values = pd.factorize(scores[column])
+        key_codes, keys = pd.factorize(industry_keys(pd.Series(np.asarray(values, dtype=object))))
+        codes = np.where(codes >= 0, np.append(key_codes, -1)[codes], -1)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(keys) + 1))
+
+        index[column] = {
+            "codes": codes,
+            "keys": {key: code for code, key in enumerate(keys)},
+            "ranks": [order[a:b] for a, b in zip(bounds[:-1], bounds[1:])],
+        }
+    return index
+
+
+def patch_filter_index(index, rows, old_order, order, rank, touched):
+
+    # The upserted snapshot's filter index without a sort: untouched rows
+    # keep their relative order, so each value's rank list is remapped to the
+    # new ranks as is, and touched rows are dropped and re-inserted with
+    # searchsorted (like the rank order itself)
+    is_touched = np.zeros(len(rows), dtype=bool)
+    is_touched[touched] = True
+    # Old rank -> new rank, and whether the row there kept its place
+    new_rank = rank[old_order]
+    kept_rank = ~is_touched[old_order]
+
+    patched = {}
+    for column, entry in index.items():
+        keys = dict(entry["keys"])
+        touched_keys = industry_keys(rows[column].iloc[touched]).to_numpy(dtype=object)
+        touched_codes = np.array(
+            [-1 if pd.isna(key) else keys.setdefault(key, len(keys)) for key in touched_keys],
+            dtype=np.int64,
+        )
+
+        row_codes = np.full(len(rows), -1, dtype=np.int64)
+        row_codes[old_order] = entry["codes"]
+        row_codes[touched] = touched_codes
+
+        moved = np.argsort(touched_codes, kind="stable")
+        moved_codes = touched_codes[moved]
+        ranks = []
+        for code in range(len(keys)):
+            old = entry["ranks"][code] if code < len(entry["ranks"]) else old_order[:0]
+            kept = new_rank[old[kept_rank[old]]]
+            a, b = np.searchsorted(moved_codes, [code, code + 1])
+            added = np.sort(rank[touched[moved[a:b]]])
+            ranks.append(np.insert(kept, np.searchsorted(kept, added), added))
+
+        patched[column] = {"codes": row_codes[order], "keys": keys, "ranks": ranks}
+    return patched
+
+
+def encode_cursor(score, row):
+    return base64.urlsafe_b64encode(struct.pack("<dq", score, row)).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        return struct.unpack("<dq", base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, struct.error):
+        raise ValueError("Invalid cursor.")
+
+
+def _score_bounds(ranked_scores, min_score, max_score):
+
+    # Scores descend with rank, so a score range is one run of ranks
+    start, stop = 0, len(ranked_scores)
+    if max_score is not None:
+        start = int(np.searchsorted(-ranked_scores, -max_score, side="left"))
+    if min_score is not None:
+        stop = int(np.searchsorted(-ranked_scores, -min_score, side="right"))
+    return start, stop
+
+
+def _cursor_start(snapshot, ranked_scores, cursor):
+
+    score, row = decode_cursor(cursor)
+    lead_scores = snapshot["rows"]["lead_score"].to_numpy()
+    if 0 <= row < len(lead_scores) and lead_scores[row] == score:
+        return int(snapshot["rank"][row]) + 1
+
+    # Re-scored since the cursor was issued: resume after its old score
+    return int(np.searchsorted(-ranked_scores, -score, side="right"))
+
+
+def _matching_ranks(snapshot, start, stop, limit, filters):
+
+    # First `limit` ranks in [start, stop) matching every filter. Walks the
+    # rank list of the most selective value and checks the others by code.
+    if not filters:
+        return np.arange(start, max(start, min(start + limit, stop)))
+
+    checks = []
+    for column, value in filters.items():
+        entry = snapshot["filter_index"][column]
+        code = entry["keys"].get(normalize_industry(value))
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        checks.append((entry["codes"], code, entry["ranks"][code]))
+    checks.sort(key=lambda check: len(check[2]))
+
+    candidates = checks[0][2]
+    i, end = np.searchsorted(candidates, [start, stop])
+    found, count, step = [], 0, max(limit, 256)
+    while count < limit and i < end:
+        block = candidates[i:min(i + step, end)]
+        for codes, code, _ in checks[1:]:
+            block = block[codes[block] == code]
+        found.append(block)
+        count += len(block)
+        i, step = i + step, step * 2
+
+    return np.concatenate(found)[:limit] if found else np.empty(0, dtype=np.int64)
+
+
+def lead_score_page(snapshot, limit, cursor=None, filters=None, min_score=None, max_score=None):
+
+    # Returns the page's ranks and the cursor for the next page (None on the
+    # last page). filters: {column in FILTER_COLUMNS: value}.
+    ranked_scores = snapshot["scores"]["lead_score"].to_numpy()
+    start, stop = _score_bounds(ranked_scores, min_score, max_score)
+    if cursor:
+        start = max(start, _cursor_start(snapshot, ranked_scores, cursor))
+
+    # One row past the page tells whether there is a next page
+    ranks = _matching_ranks(snapshot, start, stop, limit + 1, filters or {})
+    if limit == 0 or len(ranks) <= limit:
+        return ranks[:limit], None
+
+    last = ranks[limit - 1]
+    return ranks[:limit], encode_cursor(ranked_scores[last], snapshot["order"][last])
+
+
+def lead_score_page_sql(limit, cursor=None, filters=None, min_score=None, max_score=None):
+
+    # Same page from leads.db; its cursors carry a Record_ID instead of a
+    # row position
+    after = decode_cursor(cursor) if cursor else None
+    page, next_key = lead_store.lead_page(limit, after, filters, min_score, max_score)
+    return page, encode_cursor(*next_key) if next_key else None
+
+
+def lead_data_version():
+    # Changes whenever the served rankings may have (any worker's upsert, in
+    # sqlite mode)
+    if LEAD_STORE == "sqlite":
+        get_lead_snapshot()
+        return lead_store.version()
+    return get_lead_snapshot()["version"]
+
+
+def iter_lead_scores(snapshot, filters=None, min_score=None, max_score=None,
+                     chunk_rows=EXPORT_CHUNK_ROWS):
+
+    # Every matching row in rank order, a chunk of SCORE_COLUMNS at a time
+    ranked_scores = snapshot["scores"]["lead_score"].to_numpy()
+    start, stop = _score_bounds(ranked_scores, min_score, max_score)
+
+    while True:
+        ranks = _matching_ranks(snapshot, start, stop, chunk_rows, filters or {})
+        if not len(ranks):
+            return
+        yield snapshot["scores"].iloc[ranks]
+        start = int(ranks[-1]) + 1
+
+
+# -------------------------
+# Warm-up / Readiness
+# -------------------------
+_warmup_error = None
+
+
+def warm_up():
+    global _warmup_error
+
+    try:
+        get_model()
+        get_lead_snapshot()
+        _warmup_error = None
+    except Exception as exc:
+        _warmup_error = f"{type(exc).__name__}: {exc}"
+
+
+def readiness():
+    snapshot = _snapshot
+
+    return {
+        "ready": _model is not None and snapshot is not None,
+        "model_loaded": _model is not None,
+        "snapshot_version": snapshot["version"] if snapshot is not None else None,
+        "error": _warmup_error,
+    }
 
 
 # -------------------------
@@ -82,94 +766,189 @@ def generate_lead_scores():
 # -------------------------
 def get_feature_importance():
 
-    features = [
-        "Intent_Score",
-        "Shipment_Value_USD",
-        "Quantity_Tons",
-        "Prompt_Response_Score",
-        "SalesNav_ProfileViews",
-        "Tariff_Impact",
-        "War_Risk",
-        "Currency_Shift"
-    ]
-
     return pd.DataFrame({
-        "feature": features,
-        "importance": model.feature_importances_
+        "feature": FEATURES,
+        "importance": get_model().feature_importances_
     }).sort_values(by="importance", ascending=False)
 
 
 # -------------------------
 # Exporter Dashboard
 # -------------------------
-def get_exporter_dashboard(exporter_id):
+def build_exporter_index(scores, order):
 
-    df = generate_lead_scores()
+    # Exporter_ID -> row position of the exporter's best-ranked row;
+    # `scores` is in rank order and order[i] is the row behind scores[i].
+    first = (~scores["Exporter_ID"].duplicated()).to_numpy()
 
-    if exporter_id not in df["Exporter_ID"].values:
-        return None
-
-    df = df.sort_values(by="lead_score", ascending=False).reset_index(drop=True)
-
-    row_index = df.index[df["Exporter_ID"] == exporter_id]
-
-    if len(row_index) == 0:
-        return None
+    return dict(zip(
+        scores["Exporter_ID"].to_numpy()[first].tolist(),
+        order[first].tolist()
+    ))
 
-    idx = int(row_index[0])  # convert to Python int
-    rank = int(idx + 1)
-    total = int(len(df))
-    percentile = float(round((1 - (rank / total)) * 100, 2))
-
-    row = df.iloc[idx]
 
+def _dashboard_fields(exporter_id, lead_score, lead_category, ai_reason, rank, total):
     return {
         "Exporter_ID": str(exporter_id),
-        "lead_score": float(round(row["lead_score"], 2)),
-        "lead_category": str(row["lead_category"]),
-        "ai_reason": str(row["ai_reason"]),
+        "lead_score": float(round(lead_score, 2)),
+        "lead_category": str(lead_category),
+        "ai_reason": str(ai_reason),
         "rank": rank,
         "total_exporters": total,
-        "percentile": percentile
+        "percentile": float(round((1 - (rank / total)) * 100, 2))
     }
 
 
+def _dashboard_entry(snapshot, exporter_id, row):
+
+    rows = snapshot["rows"]
+
+    return _dashboard_fields(
+        exporter_id,
+        rows["lead_score"].iat[row],
+        rows["lead_category"].iat[row],
+        rows["ai_reason"].iat[row],
+        int(snapshot["rank"][row]) + 1,
+        int(len(rows)),
+    )
+
+
+def _store_entry(exporter_id, entry):
+    return _dashboard_fields(
+        exporter_id,
+        entry["lead_score"],
+        entry["lead_category"],
+        entry["ai_reason"],
+        entry["rank"],
+        entry["total"],
+    )
+
+
+def _store_dashboard(exporter_id):
+
+    with stage("dashboard.snapshot"):
+        get_lead_snapshot()
+    with stage("dashboard.store"):
+        entry = lead_store.exporter_rank(exporter_id)
+    if entry is None:
+        return None
+
+    return _store_entry(exporter_id, entry)
+
+
+def get_exporter_dashboard(exporter_id):
+
+    if LEAD_STORE == "sqlite":
+        return _store_dashboard(exporter_id)
+
+    with stage("dashboard.snapshot"):
+        snapshot = get_lead_snapshot()
+
+    with stage("dashboard.lookup"):
+        row = snapshot["exporter_index"].get(exporter_id)
+        if row is None:
+            return None
+        return _dashboard_entry(snapshot, exporter_id, row)
+
+
+def get_exporter_dashboards(exporter_ids):
+
+    with stage("dashboard.snapshot"):
+        snapshot = get_lead_snapshot()
+
+    # sqlite: every id in a few IN (...) queries, not one query per id
+    if LEAD_STORE == "sqlite":
+        with stage("dashboard.store"):
+            entries = lead_store.exporter_ranks(exporter_ids)
+        lookup = lambda exporter_id: (
+            _store_entry(exporter_id, entries[exporter_id])
+            if exporter_id in entries else None
+        )
+    else:
+        index = snapshot["exporter_index"]
+        lookup = lambda exporter_id: (
+            _dashboard_entry(snapshot, exporter_id, index[exporter_id])
+            if exporter_id in index else None
+        )
+
+    results = []
+    not_found = []
+
+    for exporter_id in exporter_ids:
+        entry = lookup(exporter_id)
+        if entry is None:
+            not_found.append(exporter_id)
+        else:
+            results.append(entry)
+
+    return {"results": results, "not_found": not_found}
+
+
 # -------------------------
 # Safe Export Regions
+# (top regions per industry come from the risk table, refreshed from
+# news_data.csv when it changes; the exporter's industry from the snapshot)
 # -------------------------
-def recommend_safe_regions(exporter_id):
+risk_table = RegionRiskTable(NEWS_PATH)
 
-    trade_df = pd.read_csv(DATA_PATH)
 
-    if exporter_id not in trade_df["Exporter_ID"].values:
-        return None
+def get_risk_table():
+    return risk_table.refresh()
 
-    exporter = trade_df[trade_df["Exporter_ID"] == exporter_id].iloc[0]
-    industry = exporter["Industry"]
 
-    news_df = pd.read_csv(NEWS_PATH)
+def ingest_news(records):
+    return risk_table.ingest(records)
 
-    industry_news = news_df[
-        news_df["Affected_Industry"].str.lower() == industry.lower()
-    ].copy()
 
-    if industry_news.empty:
+def recommend_safe_regions(exporter_id):
+
+    with stage("safe_regions.snapshot"):
+        snapshot = get_lead_snapshot()
+
+    with stage("safe_regions.industry"):
+        rows = snapshot["exporter_rows"].get(exporter_id)
+        if rows is None or not len(rows):
+            return None
+
+        # The exporter's first row in file order
+        industry = snapshot["rows"]["Industry"].iat[int(np.min(rows))]
+
+    with stage("safe_regions.news"):
+        table = get_risk_table()
+    with stage("safe_regions.top"):
+        recommendations = table.top_regions(industry)
+    if not recommendations:
         return {"message": "No regional risk data available."}
 
-    industry_news["risk_score"] = (
-        0.35 * abs(industry_news["Tariff_Change"]) +
-        0.30 * industry_news["War_Flag"] +
-        0.20 * industry_news["Natural_Calamity_Flag"] +
-        0.15 * abs(industry_news["Currency_Shift"])
-    )
+    return recommendations
 
-    recommendations = industry_news.groupby("Region").mean(numeric_only=True).reset_index()
-    recommendations = recommendations.sort_values(by="risk_score").head(5)
 
-    return recommendations[[
-        "Region",
-        "risk_score",
-        "Tariff_Change",
-        "War_Flag",
-        "Currency_Shift"
-    ]].to_dict(orient="records")
\ No newline at end of file
+# -------------------------
+# Lead Actions
+# (sales events for the lead_actions log, see actions.py)
+# -------------------------
+def lead_action_rows(snapshot, actions):
+
+    # store.ACTION_COLUMNS tuples. Industry, state and score an action
+    # leaves out come from the exporter's best-ranked row, when it has one.
+    index = snapshot["exporter_index"]
+    known = {
+        action["exporter_id"]: index[action["exporter_id"]]
+        for action in actions if action["exporter_id"] in index
+    }
+    best = snapshot["rows"].iloc[list(known.values())]
+    fields = dict(zip(known, zip(
+        best["Industry"].tolist(), best["State"].tolist(), best["lead_score"].tolist()
+    )))
+
+    rows = []
+    for action in actions:
+        industry, state, score = fields.get(action["exporter_id"], (None, None, None))
+        rows.append((
+            action["exporter_id"],
+            action["industry"] if action["industry"] is not None else industry,
+            action["state"] if action["state"] is not None else state,
+            action["score"] if action["score"] is not None else score,
+            action["status"],
+        ))
+    return rows
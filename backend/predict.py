@@ -1,25 +1,15 @@
-import pandas as pd
 import joblib
 
+from data import FEATURES, load_trade_data
+
 # Load trained model
 model = joblib.load("lead_model.pkl")
 
 # Load dataset
-df = pd.read_csv("trade_data_processed_cleaned.csv")
-
-features = [
-    "Intent_Score",
-    "Shipment_Value_USD",
-    "Quantity_Tons",
-    "Prompt_Response_Score",
-    "SalesNav_ProfileViews",
-    "Tariff_Impact",
-    "War_Risk",
-    "Currency_Shift"
-]
+df = load_trade_data(FEATURES)
 
 # Get prediction probabilities
-df["Conversion_Probability"] = model.predict_proba(df[features])[:, 1]
+df["Conversion_Probability"] = model.predict_proba(df[FEATURES])[:, 1]
 
 # Sort by highest probability
 recommended = df.sort_values("Conversion_Probability", ascending=False)
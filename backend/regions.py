@@ -0,0 +1,225 @@
+# backend/regions.py
+# Regional risk table behind /safe-export-regions.
+#
+# Holds per (industry, region) sums and non-null counts of the news risk
+# columns, so a region's means are read from the table instead of a groupby
+# over the whole news file, plus each industry's top regions ready to serve.
+# news_data.csv is treated as append-only: rows added since the last read
+# are folded into the table; any other change to the file rebuilds it.
+
+import io
+import threading
+
+import numpy as np
+import pandas as pd
+
+NEWS_COLUMNS = [
+    "News_ID",
+    "Region",
+    "Affected_Industry",
+    "Tariff_Change",
+    "War_Flag",
+    "Natural_Calamity_Flag",
+    "Currency_Shift",
+]
+
+# Averaged per region and returned, lowest risk_score first
+RISK_COLUMNS = ["risk_score", "Tariff_Change", "War_Flag", "Currency_Shift"]
+
+TOP_REGIONS = 5
+
+
+def risk_scores(news):
+    return (
+        0.35 * abs(news["Tariff_Change"]) +
+        0.30 * news["War_Flag"] +
+        0.20 * news["Natural_Calamity_Flag"] +
+        0.15 * abs(news["Currency_Shift"])
+    )
+
+
+def industry_key(industry):
+    # Same match as before the table: case-insensitive, not stripped
+    return industry.lower() if isinstance(industry, str) else None
+
+
+class RegionRiskTable:
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.totals = {}        # industry key -> {region: risk column sums, then counts}
+        self.top = {}           # industry key -> top regions, as records
+        self.rows = 0
+        self.next_news_id = 0
+        self.signature = None   # (mtime_ns, size) of the file as last read
+        self.header = b""
+        self.columns = NEWS_COLUMNS
+        self.offset = 0         # bytes of the file folded into the table
+        self.tail = b""         # last bytes read, to check the file was only appended to
+
+    # -------------------------
+    # Aggregates
+    # -------------------------
+    def add(self, news):
+
+        news = news.dropna(subset=["Region"])
+        if news.empty:
+            return
+
+        values = news[RISK_COLUMNS[1:]].copy()
+        values.insert(0, "risk_score", risk_scores(news))
+        grouped = values.groupby([news["Affected_Industry"].str.lower(), news["Region"]])
+        sums = grouped.sum()
+        batch = np.hstack([sums.to_numpy(float), grouped.count().to_numpy(float)])
+
+        touched = set()
+        for (industry, region), totals in zip(sums.index, batch):
+            regions = self.totals.setdefault(industry, {})
+            regions[region] = regions[region] + totals if region in regions else totals
+            touched.add(industry)
+
+        for industry in touched:
+            self.top[industry] = self._top_regions(self.totals[industry])
+
+        self.rows += len(news)
+        ids = pd.to_numeric(news["News_ID"], errors="coerce")
+        if ids.notna().any():
+            self.next_news_id = max(self.next_news_id, int(ids.max()) + 1)
+
+    @staticmethod
+    def _top_regions(totals):
+
+        # Means of the non-null values; ties keep region name order
+        regions = sorted(totals)
+        table = np.array([totals[region] for region in regions])
+        width = len(RISK_COLUMNS)
+        counts = table[:, width:]
+        means = table[:, :width] / np.where(counts > 0, counts, np.nan)
+
+        order = np.argsort(means[:, 0], kind="stable")[:TOP_REGIONS]
+        return [
+            {"Region": regions[i], **dict(zip(RISK_COLUMNS, means[i].tolist()))}
+            for i in order
+        ]
+
+    def top_regions(self, industry):
+        return self.top.get(industry_key(industry))
+
+    # -------------------------
+    # Reading news_data.csv
+    # -------------------------
+    def _appended_only(self, f, size):
+        if not self.offset or size < self.offset:
+            return False
+        f.seek(self.offset - len(self.tail))
+        return f.read(len(self.tail)) == self.tail
+
+    def is_current(self):
+        # Whether refresh() has nothing to read (one stat, no locking)
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return self.signature is None and not self.totals
+        return (stat.st_mtime_ns, stat.st_size) == self.signature
+
+    def refresh(self):
+
+        with self._lock:
+            try:
+                stat = self.path.stat()
+            except FileNotFoundError:
+                self._reset()
+                return self
+
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature == self.signature:
+                return self
+
+            with self.path.open("rb") as f:
+                if self._appended_only(f, stat.st_size):
+                    f.seek(self.offset)
+                    data = f.read()
+                else:
+                    self._reset()
+                    data = f.read()
+                    self.header = data[:data.find(b"\n") + 1]
+                    if self.header:
+                        self.columns = pd.read_csv(io.BytesIO(self.header)).columns.tolist()
+                    data = data[len(self.header):]
+                    self.offset = len(self.header)
+
+            # A line still being written is left for the next refresh
+            end = data.rfind(b"\n") + 1
+            if end:
+                self.add(pd.read_csv(io.BytesIO(self.header + data[:end])))
+                self.offset += end
+                self.tail = data[max(0, end - 256):end]
+            elif not self.tail:
+                self.tail = self.header
+            if end == len(data):
+                self.signature = signature
+            return self
+
+    def ingest(self, records):
+
+        # Appends news rows to the file and folds them into the table; rows
+        # without a News_ID are numbered after the highest one seen
+        news = pd.DataFrame(list(records))
+        unknown = sorted(set(news.columns) - set(NEWS_COLUMNS))
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        missing = [
+            c for c in NEWS_COLUMNS[1:]
+            if c not in news.columns or news[c].isna().any()
+        ]
+        if missing:
+            raise ValueError(f"News rows need values for: {', '.join(missing)}")
+        for column in NEWS_COLUMNS[3:]:
+            news[column] = pd.to_numeric(news[column])
+
+        with self._lock:
+            self.refresh()
+
+            if "News_ID" not in news.columns:
+                news["News_ID"] = np.nan
+            unnumbered = news["News_ID"].isna().to_numpy()
+            news.loc[unnumbered, "News_ID"] = np.arange(
+                self.next_news_id, self.next_news_id + unnumbered.sum()
+            )
+            news["News_ID"] = news["News_ID"].astype(np.int64)
+
+            data = news[self.columns].to_csv(
+                index=False, header=not self.header, lineterminator="\n"
+            ).encode()
+
+            with self.path.open("ab") as f:
+                start = f.tell()
+                if start and not self._ends_with_newline():
+                    data = b"\n" + data
+                f.write(data)
+
+            # Nothing else was appended since the last read: fold the parsed
+            # rows in directly instead of reading them back
+            if self.header and start == self.offset:
+                self.add(news)
+                self.offset += len(data)
+                self.tail = data[-256:]
+                stat = self.path.stat()
+                self.signature = (stat.st_mtime_ns, stat.st_size)
+            else:
+                self.refresh()
+
+        return {"ingested": int(len(news)), "rows": self.rows, "version": self.version}
+
+    def _ends_with_newline(self):
+        with self.path.open("rb") as f:
+            f.seek(-1, 2)
+            return f.read(1) == b"\n"
+
+    @property
+    def version(self):
+        return None if self.signature is None else f"{self.signature[0]}-{self.signature[1]}"
@@ -1,146 +1,604 @@
-# Improve cleaning on the already-loaded dataframe `df` if present; otherwise try loading from the processed CSV.
+# Improve cleaning on a trade/news dataframe (clean(df)), or run as a script to load the processed CSV / Excel source.
 # Adds robust ID cleanup, deduping, outlier handling, better rolling features by region, and saves a cleaner version.
+#
+#   python scoring.py                          # whole file in memory
+#   python scoring.py --chunksize 200000       # bounded-memory streaming mode
+#   python scoring.py --input feed.csv --output cleaned.csv
 
+import argparse
 import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
+from pandas.api.indexers import BaseIndexer
 from tqdm import tqdm
 
-if 'df' not in globals():
-   DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+from data import DATA_PATH, save_trade_data
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 
 processed_path = os.path.join(DATA_DIR, 'trade_data_processed.csv')
 excel_path = os.path.join(DATA_DIR, 'trade_data.xlsx')
 
-if os.path.exists(processed_path):
-    df = pd.read_csv(processed_path)
-elif os.path.exists(excel_path):
-    df = pd.read_excel(excel_path, sheet_name=0)
-else:
+missing_token = 'unknown'
+id_cols = ['News_ID', 'Region', 'Event_Type']
+text_cols = ['Region', 'Event_Type']
+numeric_candidates = ['Impact_Level', 'Tariff_Change', 'StockMarket_Shock', 'Currency_Shift', 'Shipment_Value_USD', 'Quantity_Tons', 'Impact_Score', 'import_growth_pct', 'import_volume', 'frequency', 'country_demand', 'price_avg']
+winsor_candidates = ['Shipment_Value_USD', 'Quantity_Tons', 'Tariff_Change', 'StockMarket_Shock', 'Currency_Shift', 'Impact_Level']
+flag_candidates = ['War_Flag', 'Natural_Calamity_Flag']
+score_candidates = ['Impact_Level', 'Tariff_Change', 'StockMarket_Shock', 'Currency_Shift', 'War_Flag', 'Natural_Calamity_Flag']
+
+# Longest rolling window: rows this recent are carried between chunks
+carry_window = pd.Timedelta('365D')
+
+
+def load_source(path=None):
+    if path is not None:
+        return pd.read_excel(path, sheet_name=0) if str(path).endswith('.xlsx') else pd.read_csv(path)
+    if os.path.exists(processed_path):
+        return pd.read_csv(processed_path)
+    if os.path.exists(excel_path):
+        return pd.read_excel(excel_path, sheet_name=0)
     raise FileNotFoundError(
         'No df in memory and cannot find trade_data_processed.csv or trade_data.xlsx'
     )
 
 
-print(df.head())
-print(df.shape)
+# -----------------------------
+# Row-local steps (safe on any chunk)
+# -----------------------------
+def _text(series):
+    # pandas >= 3 keeps missing values missing in astype(str); the rules
+    # below expect the 'nan' spelling older pandas produced
+    return series.astype(str).fillna('nan')
 
-# Standardize key columns
-for col_name in ['News_ID', 'Region', 'Event_Type']:
-    if col_name in df.columns:
-        df[col_name] = df[col_name].astype(str).str.strip()
 
-# Date parse
-if 'Date' in df.columns:
-    df['Date'] = pd.to_datetime(df['Date'], errors='coerce', utc=False)
+def standardize(df):
+    # Standardize key columns
+    for col_name in id_cols:
+        if col_name in df.columns:
+            df[col_name] = _text(df[col_name]).str.strip()
 
-# Clean News_ID: keep alphanumerics, remove trailing .0, pad not here yet
-if 'News_ID' in df.columns:
-    news_id_vals = df['News_ID'].astype(str)
-    news_id_vals = news_id_vals.str.replace(r'\.0$', '', regex=True)
-    news_id_vals = news_id_vals.str.replace(r'[^0-9A-Za-z_-]+', '', regex=True)
-    df['News_ID'] = news_id_vals.replace({'': np.nan})
+    # Date parse
+    if 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date'], errors='coerce', utc=False)
 
-# Normalize text fields with consistent missing token
-missing_token = 'unknown'
-for col_name in ['Region', 'Event_Type']:
-    if col_name in df.columns:
-        df[col_name] = df[col_name].astype(str).str.strip().str.lower()
-        df.loc[df[col_name].isin(['nan', 'none', 'null', '']), col_name] = missing_token
-
-# Drop bad required rows
-required_cols = [c for c in ['News_ID', 'Date', 'Region', 'Event_Type'] if c in df.columns]
-df = df.dropna(subset=required_cols).copy()
-if 'Date' in df.columns:
-    df = df.dropna(subset=['Date']).copy()
-
-# Deduplicate: keep latest by Date for same News_ID (and region/type if present)
-dedupe_keys = [c for c in ['News_ID', 'Region', 'Event_Type'] if c in df.columns]
-if len(dedupe_keys) > 0 and 'Date' in df.columns:
-    df = df.sort_values('Date').copy()
-    df = df.drop_duplicates(subset=dedupe_keys, keep='last').copy()
-
-# Numeric coercion and winsorize outliers
-numeric_cols = []
-for col_name in ['Impact_Level', 'Tariff_Change', 'StockMarket_Shock', 'Currency_Shift', 'Shipment_Value_USD', 'Quantity_Tons', 'Impact_Score', 'import_growth_pct', 'import_volume', 'frequency', 'country_demand', 'price_avg']:
-    if col_name in df.columns:
-        df[col_name] = pd.to_numeric(df[col_name], errors='coerce')
-        numeric_cols.append(col_name)
-
-# Impute numeric missing with median (or 0)
-for col_name in numeric_cols:
-    med_val = df[col_name].median()
-    if pd.isna(med_val):
-        med_val = 0.0
-    df[col_name] = df[col_name].fillna(med_val)
-
-# Winsorize heavy-tailed measures
-winsor_cols = [c for c in ['Shipment_Value_USD', 'Quantity_Tons', 'Tariff_Change', 'StockMarket_Shock', 'Currency_Shift', 'Impact_Level'] if c in df.columns]
-for col_name in winsor_cols:
-    low_q = df[col_name].quantile(0.01)
-    high_q = df[col_name].quantile(0.99)
-    if pd.notna(low_q) and pd.notna(high_q) and high_q > low_q:
+    # Clean News_ID: keep alphanumerics, remove trailing .0, pad not here yet
+    if 'News_ID' in df.columns:
+        news_id_vals = _text(df['News_ID'])
+        news_id_vals = news_id_vals.str.replace(r'\.0$', '', regex=True)
+        news_id_vals = news_id_vals.str.replace(r'[^0-9A-Za-z_-]+', '', regex=True)
+        df['News_ID'] = news_id_vals.replace({'': np.nan})
+
+    # Normalize text fields with consistent missing token
+    for col_name in text_cols:
+        if col_name in df.columns:
+            df[col_name] = _text(df[col_name]).str.strip().str.lower()
+            df.loc[df[col_name].isin(['nan', 'none', 'null', '']), col_name] = missing_token
+
+    # Drop bad required rows
+    required_cols = [c for c in ['News_ID', 'Date', 'Region', 'Event_Type'] if c in df.columns]
+    return df.dropna(subset=required_cols)
+
+
+def coerce_numeric(df):
+    numeric_cols = []
+    for col_name in numeric_candidates:
+        if col_name in df.columns:
+            df[col_name] = pd.to_numeric(df[col_name], errors='coerce')
+            numeric_cols.append(col_name)
+    return numeric_cols
+
+
+def impute(df, medians):
+    # Impute numeric missing with median (or 0)
+    for col_name, med_val in medians.items():
+        df[col_name] = df[col_name].fillna(med_val)
+
+
+def winsorize(df, bounds):
+    # Winsorize heavy-tailed measures
+    for col_name, (low_q, high_q) in bounds.items():
         df[col_name] = df[col_name].clip(lower=low_q, upper=high_q)
 
-# Ensure flags are 0/1
-flag_candidates = [c for c in ['War_Flag', 'Natural_Calamity_Flag'] if c in df.columns]
-for col_name in flag_candidates:
-    df[col_name] = pd.to_numeric(df[col_name], errors='coerce').fillna(0.0)
-    df[col_name] = (df[col_name] > 0).astype(int)
 
-# Recompute Impact_Score consistently if components exist
-score_parts = [c for c in ['Impact_Level', 'Tariff_Change', 'StockMarket_Shock', 'Currency_Shift', 'War_Flag', 'Natural_Calamity_Flag'] if c in df.columns]
-if len(score_parts) > 0:
-    df['Impact_Score'] = 0.0
-    for c in score_parts:
-        df['Impact_Score'] = df['Impact_Score'] + pd.to_numeric(df[c], errors='coerce').fillna(0.0)
+def finish_rows(df):
+    # Ensure flags are 0/1
+    for col_name in [c for c in flag_candidates if c in df.columns]:
+        df[col_name] = pd.to_numeric(df[col_name], errors='coerce').fillna(0.0)
+        df[col_name] = (df[col_name] > 0).astype(int)
+
+    # Recompute Impact_Score consistently if components exist
+    score_parts = [c for c in score_candidates if c in df.columns]
+    if len(score_parts) > 0:
+        df['Impact_Score'] = 0.0
+        for c in score_parts:
+            df['Impact_Score'] = df['Impact_Score'] + pd.to_numeric(df[c], errors='coerce').fillna(0.0)
+
+
+# -----------------------------
+# Whole-table steps
+# -----------------------------
+def dedupe_keys(columns):
+    if 'Date' not in columns:
+        return []
+    return [c for c in id_cols if c in columns]
+
+
+def dedupe(df):
+    # Deduplicate: keep latest by Date for same News_ID (and region/type if present)
+    keys = dedupe_keys(df.columns)
+    if len(keys) > 0:
+        df = df.sort_values('Date', kind='stable')
+        df = df.drop_duplicates(subset=keys, keep='last')
+    return df
+
+
+def numeric_medians(df, numeric_cols):
+    medians = {}
+    for col_name in numeric_cols:
+        med_val = df[col_name].median()
+        medians[col_name] = 0.0 if pd.isna(med_val) else med_val
+    return medians
+
+
+def winsor_bounds(df):
+    bounds = {}
+    for col_name in [c for c in winsor_candidates if c in df.columns]:
+        low_q = df[col_name].quantile(0.01)
+        high_q = df[col_name].quantile(0.99)
+        if pd.notna(low_q) and pd.notna(high_q) and high_q > low_q:
+            bounds[col_name] = (low_q, high_q)
+    return bounds
+
+
+class RegionWindows(BaseIndexer):
+    # Precomputed rolling-window bounds (see region_windows)
+
+    def get_window_bounds(self, num_values=0, min_periods=None, center=None, closed=None, step=None):
+        return self.start, self.end
 
-# Better features: do rolling calculations within Region
-if 'Region' in df.columns and 'Date' in df.columns:
-    df = df.sort_values(['Region', 'Date']).copy()
+
+def sort_by_region(df):
+
+    # Stable sort by (Region, Date) on integer keys; returns the sorted frame,
+    # its Date as int64 nanoseconds and the first row of each region.
+    # Two stable passes: Date, then the region codes (a radix sort when the
+    # codes fit in 16 bits).
+    codes, uniques = pd.factorize(df['Region'], sort=True)
+    if len(uniques) < np.iinfo(np.int16).max:
+        codes = codes.astype(np.int16)
+    dates = df['Date'].to_numpy('datetime64[ns]').view(np.int64)
+    order = np.argsort(dates, kind='stable')
+    order = order[np.argsort(codes[order], kind='stable')]
+    codes, dates = codes[order], dates[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    return df.take(order), dates, starts
+
+
+def region_windows(dates, starts, window):
+
+    # Bounds of a time-based window, (Date - window, Date], that never reaches
+    # into the previous region. These are the windows rolling(window) builds
+    # on each region's own DatetimeIndex, including for equal timestamps.
+    width = pd.Timedelta(window).value
+    start = np.empty(len(dates), dtype=np.int64)
+    for first, stop in zip(starts, np.r_[starts[1:], len(dates)]):
+        region_dates = dates[first:stop]
+        start[first:stop] = first + np.searchsorted(region_dates, region_dates - width, side='right')
+    return RegionWindows(start=start, end=np.arange(1, len(dates) + 1, dtype=np.int64))
+
+
+def add_region_features(df):
+    # Better features: rolling calculations within Region, from one sort by
+    # (Region, Date) and vectorized operations over the region boundaries
+    if 'Region' not in df.columns or 'Date' not in df.columns or len(df) == 0:
+        return df
+
+    df, dates, starts = sort_by_region(df)
 
     if 'Shipment_Value_USD' in df.columns:
-        def pct_change_region(g):
-            g = g.sort_values('Date').copy()
-            g['import_growth_pct'] = g['Shipment_Value_USD'].pct_change().replace([np.inf, -np.inf], np.nan).fillna(0.0) * 100.0
-            return g
-        df = df.groupby('Region', group_keys=False).apply(pct_change_region)
+        shipment = df['Shipment_Value_USD']
+        previous = shipment.shift(1)
+        previous.iloc[starts] = np.nan
+        growth = shipment / previous - 1
+        df['import_growth_pct'] = growth.replace([np.inf, -np.inf], np.nan).fillna(0.0) * 100.0
 
     # rolling 365D event count by region
     if 'News_ID' in df.columns:
-        def roll_count_region(g):
-            g2 = g.set_index('Date').sort_index().copy()
-            g2['frequency'] = g2['News_ID'].rolling('365D').count().values
-            return g2.reset_index()
-        df = df.groupby('Region', group_keys=False).apply(roll_count_region)
+        df['frequency'] = df['News_ID'].rolling(region_windows(dates, starts, '365D'), min_periods=1).count().to_numpy()
 
-    # price_avg: 7D rolling mean of Shipment_Value_USD by region using a time window if possible
+    # price_avg: 7D rolling mean of Shipment_Value_USD by region using a time window
     if 'Shipment_Value_USD' in df.columns:
-        def roll_price_region(g):
-            g2 = g.set_index('Date').sort_index().copy()
-            g2['price_avg'] = g2['Shipment_Value_USD'].rolling('7D', min_periods=1).mean().values
-            return g2.reset_index()
-        df = df.groupby('Region', group_keys=False).apply(roll_price_region)
-
-# Recompute country_demand
-if 'Region' in df.columns and 'import_volume' in df.columns:
-    df['country_demand'] = df.groupby('Region')['import_volume'].transform('sum')
-
-# Light category compression for text fields
-for col_name in ['Region', 'Event_Type']:
-    if col_name in df.columns:
-        df[col_name] = df[col_name].astype('category')
-
-# Save a cleaner processed CSV
-cleaned_csv = 'trade_data_processed_cleaned.csv'
-df.to_csv(cleaned_csv, index=False)
-print(cleaned_csv)
-print(df.head())
-
-# Quick quality summary
-summary_dict = {
-    'rows': [df.shape[0]],
-    'cols': [df.shape[1]],
-    'missing_any_pct': [float(df.isna().mean().mean() * 100.0)]
-}
-print(pd.DataFrame(summary_dict))
\ No newline at end of file
+        df['price_avg'] = df['Shipment_Value_USD'].rolling(region_windows(dates, starts, '7D'), min_periods=1).mean().to_numpy()
+
+    # The rolling features have always been written with Date first
+    if 'News_ID' in df.columns or 'Shipment_Value_USD' in df.columns:
+        df = df[['Date'] + [c for c in df.columns if c != 'Date']]
+
+    return df
+
+
+def compress_text(df):
+    # Light category compression for text fields
+    for col_name in text_cols:
+        if col_name in df.columns:
+            df[col_name] = df[col_name].astype('category')
+
+
+def clean(df, workers=1):
+
+    # workers > 1: row-local cleaning runs on row blocks and the region
+    # features on whole-region partitions in a process pool; the medians,
+    # quantiles and dedupe stay global. Output is identical to workers=1.
+    pool = open_pool(workers)
+    try:
+        if pool is not None and len(df):
+            df = pd.concat(pool.map(standardize, row_blocks(df, workers * 4)))
+        else:
+            df = standardize(df.copy())
+        df = dedupe(df)
+
+        # Numeric coercion, impute and winsorize outliers
+        numeric_cols = coerce_numeric(df)
+        impute(df, numeric_medians(df, numeric_cols))
+        winsorize(df, winsor_bounds(df))
+        finish_rows(df)
+
+        if pool is not None and len(df) and 'Region' in df.columns and 'Date' in df.columns:
+            df = pd.concat(pool.map(add_region_features, region_partitions(df, workers * 4)))
+        else:
+            df = add_region_features(df)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # Recompute country_demand
+    if 'Region' in df.columns and 'import_volume' in df.columns:
+        df['country_demand'] = df.groupby('Region')['import_volume'].transform('sum')
+
+    compress_text(df)
+    return df
+
+
+# -----------------------------
+# Parallel execution (optional process pool)
+# -----------------------------
+def open_pool(workers):
+    # None means run in-process
+    return ProcessPoolExecutor(workers) if workers and workers > 1 else None
+
+
+def ordered_map(pool, fn, items, ahead):
+    # Like pool.map (results in submission order) with at most `ahead` items
+    # in flight, so a streamed input is never queued up whole
+    if pool is None:
+        for item in items:
+            yield fn(item)
+        return
+
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= ahead:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def row_blocks(df, parts):
+    bounds = np.linspace(0, len(df), parts + 1).astype(int)
+    return [df.iloc[a:b] for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def region_partitions(df, parts):
+    # Contiguous runs of whole regions, sorted by (Region, Date), with about
+    # the same number of rows each
+    df, _, starts = sort_by_region(df)
+    targets = np.arange(1, parts) * len(df) / parts
+    cuts = np.unique(starts[np.minimum(np.searchsorted(starts, targets), len(starts) - 1)])
+    bounds = np.r_[0, cuts[cuts > 0], len(df)]
+    return [df.iloc[a:b] for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+# -----------------------------
+# Streaming (chunked) mode
+# -----------------------------
+class Reservoir:
+    # Fixed-size uniform sample of a column (NaNs included), for
+    # approximate medians/quantiles in bounded memory. Exact while the
+    # column has no more values than the sample size.
+
+    def __init__(self, size, seed=0):
+        self.size = size
+        self.seen = 0
+        self.values = np.empty(0)
+        self.rng = np.random.default_rng(seed)
+
+    def add(self, values):
+        values = np.asarray(values, dtype=float)
+        room = max(0, self.size - len(self.values))
+        self.values = np.concatenate([self.values, values[:room]])
+        self.seen += min(room, len(values))
+
+        rest = values[room:]
+        if len(rest):
+            slots = self.rng.integers(0, self.seen + np.arange(1, len(rest) + 1))
+            keep = slots < self.size
+            self.values[slots[keep]] = rest[keep]
+            self.seen += len(rest)
+
+    def median(self):
+        if not np.isfinite(self.values).any():
+            return 0.0
+        return float(np.nanmedian(self.values))
+
+    def quantiles(self, fill, qs):
+        return np.quantile(np.where(np.isnan(self.values), fill, self.values), qs)
+
+
+def _read_chunks(path, chunksize):
+    row_offset = 0
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        chunk.index = pd.RangeIndex(row_offset, row_offset + len(chunk))
+        row_offset += len(chunk)
+        yield chunk
+
+
+def _key_hashes(df, keys):
+    # Two independent 64-bit hashes of the dedupe key, so pass 1 holds four
+    # integers per distinct key instead of the key strings
+    return [
+        pd.util.hash_pandas_object(df[keys], index=False, hash_key=hash_key).to_numpy()
+        for hash_key in ('scoring-dedupe-1', 'scoring-dedupe-2')
+    ]
+
+
+def _latest_per_key(h1, h2, dates, rows):
+    # Keep the last row (file order) holding each key's latest Date
+    order = np.lexsort((rows, dates, h2, h1))
+    h1, h2 = h1[order], h2[order]
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = (h1[1:] != h1[:-1]) | (h2[1:] != h2[:-1])
+    keep = order[last]
+    return h1[last], h2[last], dates[keep], rows[keep]
+
+
+def _chunk_keys(chunk, keys):
+    h1, h2 = _key_hashes(chunk, keys)
+    dates = chunk['Date'].to_numpy('datetime64[ns]').view(np.int64)
+    return h1, h2, dates, chunk.index.to_numpy(np.int64)
+
+
+class LatestRows:
+    # Streaming dedupe: tracks, per key, the last row (file order) holding
+    # the key's latest Date. Candidates are compacted whenever they outgrow
+    # the last compacted set, so the work stays O(n log n).
+
+    def __init__(self):
+        self.winners = [np.empty(0, dtype=np.uint64)] * 2 + [np.empty(0, dtype=np.int64)] * 2
+        self.pending = []
+        self.pending_rows = 0
+
+    def add(self, h1, h2, dates, rows):
+        self.pending.append((h1, h2, dates, rows))
+        self.pending_rows += len(rows)
+        if self.pending_rows > len(self.winners[0]):
+            self._compact()
+
+    def _compact(self):
+        self.winners = _latest_per_key(*(
+            np.concatenate([w] + [p[i] for p in self.pending])
+            for i, w in enumerate(self.winners)
+        ))
+        self.pending = []
+        self.pending_rows = 0
+
+    def rows(self):
+        if self.pending:
+            self._compact()
+        return np.sort(self.winners[3])
+
+
+def _stage_chunk(job):
+    # Pass 1 unit of work: standardize a chunk, stage it, return its keys
+    chunk, stage, keys = job
+    chunk = standardize(chunk)
+    chunk.to_pickle(stage)
+    return _chunk_keys(chunk, keys) if keys else None
+
+
+def _finish_region(job):
+
+    # Pass 3 unit of work: impute, winsorize and derive features for one
+    # region's spilled rows, written (headerless) to their own CSV part
+    files, streamed, by_region, medians, bounds, demand, out_path = job
+    frames = (pd.read_pickle(p) for p in files) if streamed else \
+        [pd.concat([pd.read_pickle(p) for p in files])]
+
+    rows = 0
+    columns = None
+    tail = None
+    with open(out_path, 'w', newline='') as out:
+        for frame in frames:
+            impute(frame, {c: medians[c] for c in frame.columns if c in medians})
+            winsorize(frame, bounds)
+            finish_rows(frame)
+
+            if by_region:
+                carried = 0 if tail is None else len(tail)
+                if tail is not None:
+                    frame = pd.concat([tail, frame])
+                frame = add_region_features(frame)
+                tail = frame[frame['Date'] > frame['Date'].iloc[-1] - carry_window]
+                frame = frame.iloc[carried:]
+
+                if demand is not None:
+                    frame['country_demand'] = demand
+
+            if columns is None:
+                columns = list(frame.columns)
+            frame.to_csv(out, header=False, index=False, columns=columns)
+            rows += len(frame)
+
+    return rows, columns
+
+
+def clean_chunked(path, output_path, chunksize=100_000, sample_size=200_000, seed=0, workers=1):
+
+    # workers > 1 runs pass 1 (per chunk) and pass 3 (per region) in a
+    # process pool; output is identical to workers=1
+    columns = pd.read_csv(path, nrows=0).columns
+    keys = dedupe_keys(columns)
+    by_region = 'Region' in columns and 'Date' in columns
+
+    pool = open_pool(workers)
+    ahead = 2 * max(1, workers)
+    spill_dir = tempfile.mkdtemp(prefix='scoring-')
+    try:
+        # Pass 1: standardize each chunk once, stage it on disk and find the
+        # rows that survive dedupe
+        staged = []
+        latest = LatestRows() if keys else None
+
+        def stage_jobs():
+            for chunk in _read_chunks(path, chunksize):
+                staged.append(os.path.join(spill_dir, f'stage-{len(staged)}.pkl'))
+                yield chunk, staged[-1], keys
+
+        for chunk_keys in tqdm(ordered_map(pool, _stage_chunk, stage_jobs(), ahead), desc='pass 1'):
+            if latest is not None:
+                latest.add(*chunk_keys)
+        keep_rows = latest.rows() if latest is not None else None
+
+        # Pass 2: sample numeric columns and spill rows to per-region files
+        samples = {}
+        spills = {}
+        date_ordered = {}
+        last_date = {}
+        demand = {}
+
+        for stage in tqdm(staged, desc='pass 2'):
+            chunk = pd.read_pickle(stage)
+            os.remove(stage)
+            if keep_rows is not None:
+                chunk = chunk[np.isin(chunk.index.to_numpy(), keep_rows)]
+            numeric_cols = coerce_numeric(chunk)
+
+            for col_name in numeric_cols:
+                samples.setdefault(col_name, Reservoir(sample_size, seed)).add(chunk[col_name])
+
+            groups = chunk.groupby('Region', sort=False) if by_region else [(None, chunk)]
+            for region, part in groups:
+                files = spills.setdefault(region, [])
+                spill = os.path.join(spill_dir, f'{list(spills).index(region)}-{len(files)}.pkl')
+                part.to_pickle(spill)
+                files.append(spill)
+
+                if by_region:
+                    dates = part['Date']
+                    ordered = dates.is_monotonic_increasing and (
+                        region not in last_date or dates.iloc[0] >= last_date[region]
+                    )
+                    date_ordered[region] = date_ordered.get(region, True) and ordered
+                    last_date[region] = dates.iloc[-1]
+
+                    if 'import_volume' in part.columns:
+                        total, nulls = demand.get(region, (0.0, 0))
+                        demand[region] = (
+                            total + part['import_volume'].sum(),
+                            nulls + int(part['import_volume'].isna().sum())
+                        )
+
+        medians = {c: s.median() for c, s in samples.items()}
+        bounds = {}
+        for col_name in [c for c in winsor_candidates if c in samples]:
+            low_q, high_q = samples[col_name].quantiles(medians[col_name], [0.01, 0.99])
+            if pd.notna(low_q) and pd.notna(high_q) and high_q > low_q:
+                bounds[col_name] = (low_q, high_q)
+
+        # Pass 3: finish rows and region features region by region, then
+        # stitch the parts together in region order
+        regions = sorted(spills, key=lambda r: (r is None, r))
+        parts = [os.path.join(spill_dir, f'out-{i}.csv') for i in range(len(regions))]
+        jobs = (
+            (
+                spills[region],
+                not by_region or date_ordered[region],
+                by_region,
+                medians,
+                bounds,
+                demand[region][0] + demand[region][1] * medians['import_volume']
+                if region in demand else None,
+                part,
+            )
+            for region, part in zip(regions, parts)
+        )
+
+        rows = 0
+        out_columns = None
+        with open(output_path, 'w', newline='') as out:
+            for part, (part_rows, part_columns) in zip(
+                parts, ordered_map(pool, _finish_region, jobs, ahead)
+            ):
+                if out_columns is None:
+                    out_columns = part_columns
+                    pd.DataFrame(columns=out_columns).to_csv(out, index=False)
+                with open(part, newline='') as f:
+                    shutil.copyfileobj(f, out)
+                os.remove(part)
+                rows += part_rows
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    return rows, len(out_columns or [])
+
+
+def summarize(df):
+    # Quick quality summary
+    summary_dict = {
+        'rows': [df.shape[0]],
+        'cols': [df.shape[1]],
+        'missing_any_pct': [float(df.isna().mean().mean() * 100.0)]
+    }
+    return pd.DataFrame(summary_dict)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Clean the trade/news feed')
+    parser.add_argument('--input', default=None)
+    parser.add_argument('--output', default=str(DATA_PATH))
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='stream the (CSV) input in chunks of this many rows')
+    parser.add_argument('--sample-size', type=int, default=200_000,
+                        help='reservoir size for streaming medians/quantiles')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='worker processes (partitions by row block and by Region)')
+    args = parser.parse_args()
+
+    if args.chunksize:
+        source = args.input or processed_path
+        rows, cols = clean_chunked(
+            source, args.output, args.chunksize, args.sample_size, workers=args.workers
+        )
+        print(args.output)
+        print(pd.DataFrame({'rows': [rows], 'cols': [cols]}))
+        print('Run `python data.py` to rebuild the binary cache if this is the served dataset.')
+    else:
+        df = load_source(args.input)
+        print(df.head())
+        print(df.shape)
+
+        df = clean(df, args.workers)
+
+        # Save a cleaner processed CSV (plus its binary columnar cache)
+        save_trade_data(df, args.output)
+        print(args.output)
+        print(df.head())
+        print(summarize(df))
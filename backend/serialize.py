@@ -0,0 +1,80 @@
+# backend/serialize.py
+# JSON encoding for DataFrame-shaped responses.
+#
+# The default path is FastAPI's: to_dict(orient="records"), then
+# jsonable_encoder walks every row again before json.dumps. Two opt-ins skip
+# that walk:
+#   - format=columns: a compact columnar body, {"length": n, "columns":
+#     {"name": [values, ...], ...}}, written one column at a time. Numeric
+#     columns go straight from their numpy buffer to JSON; no row dicts.
+#   - RESPONSE_JSON=orjson: the usual row-record body, encoded by orjson.
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# "standard" (default, FastAPI encoder) or "orjson" for row-record bodies
+RESPONSE_JSON = os.environ.get("RESPONSE_JSON", "standard")
+
+# Values of the API's `format` parameter (app.py validates against these)
+RESPONSE_FORMATS = ("records", "columns")
+
+
+def dumps(value):
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def standard_json(value):
+    # Rendered exactly as FastAPI renders a returned value
+    return JSONResponse(jsonable_encoder(value)).body
+
+
+def encode_column(series):
+
+    if orjson is None:
+        return dumps(series.astype(object).where(series.notna(), None).tolist())
+
+    # Numeric columns straight from the array; orjson writes NaN as null
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in "iufb":
+        return orjson.dumps(
+            np.ascontiguousarray(series.to_numpy()), option=orjson.OPT_SERIALIZE_NUMPY
+        )
+    return orjson.dumps(series.tolist())
+
+
+def columns_json(df):
+
+    # Unmatched results come through as an empty list
+    if not isinstance(df, pd.DataFrame):
+        df = pd.DataFrame()
+
+    columns = b",".join(
+        dumps(str(name)) + b":" + encode_column(df[name]) for name in df.columns
+    )
+    return b'{"length":%d,"columns":{%b}}' % (len(df), columns)
+
+
+def frame_records(df):
+    # Same records as to_dict(orient="records"), built from whole-column lists
+    columns = df.columns.tolist()
+    return [dict(zip(columns, row)) for row in zip(*(df[c].tolist() for c in columns))]
+
+
+def records_json(df):
+    return dumps(frame_records(df))
+
+
+def ndjson_lines(df):
+    # One JSON record per line
+    return b"".join(dumps(record) + b"\n" for record in frame_records(df))
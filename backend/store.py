@@ -0,0 +1,448 @@
+# backend/store.py
+# SQLite lead store (leads.db).
+#
+# Holds the scored leads next to the existing lead_actions table. The leads
+# table is written from the snapshot: in full when a snapshot is built for a
+# version the store doesn't have yet, and row by row on upserts, so every API
+# worker sharing the file reads the same rows. Ranking, filtering and
+# dashboard lookups are indexed queries. WAL mode lets readers run while a
+# write is in progress; connections come from a small per-process pool.
+#
+# lead_actions is an append-only event log (written by actions.py). Each
+# write also folds its rows into two compacted tables, in the same
+# transaction: lead_status (each exporter's latest action) and
+# lead_action_counts (actions per status and industry), so status lookups
+# and dashboard aggregates never scan the log.
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+LEAD_DB_PATH = Path(os.environ.get(
+    "LEAD_DB_PATH", Path(__file__).resolve().parent / "leads.db"
+))
+LEAD_DB_POOL_SIZE = int(os.environ.get("LEAD_DB_POOL_SIZE", "4"))
+
+# Snapshot column -> leads column
+LEAD_COLUMNS = {
+    "Record_ID": "record_id",
+    "Exporter_ID": "exporter_id",
+    "Industry": "industry",
+    "State": "state",
+    "Revenue_Size_USD": "revenue_size_usd",
+    "Quantity_Tons": "quantity_tons",
+    "lead_score": "score",
+    "lead_category": "lead_category",
+    "ai_reason": "ai_reason",
+}
+
+# Ties in score are ranked by record_id, the snapshot's file order
+RANK_ORDER = "score DESC, record_id"
+
+TABLES = [
+    """CREATE TABLE IF NOT EXISTS lead_actions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        exporter_id TEXT,
+        industry TEXT,
+        state TEXT,
+        score REAL,
+        status TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS leads (
+        record_id INTEGER PRIMARY KEY,
+        exporter_id TEXT NOT NULL,
+        industry TEXT COLLATE NOCASE,
+        state TEXT COLLATE NOCASE,
+        revenue_size_usd INTEGER,
+        quantity_tons REAL,
+        score REAL NOT NULL,
+        lead_category TEXT COLLATE NOCASE,
+        ai_reason TEXT
+    )""",
+    # Rows per score, so a rank is a sum over distinct scores plus the ties
+    """CREATE TABLE IF NOT EXISTS score_counts (
+        score REAL PRIMARY KEY,
+        n INTEGER NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS store_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )""",
+    # Latest action per exporter, and action counts per (status, industry);
+    # unknown values are stored as '' so they count under one key
+    """CREATE TABLE IF NOT EXISTS lead_status (
+        exporter_id TEXT PRIMARY KEY,
+        action_id INTEGER NOT NULL,
+        industry TEXT,
+        state TEXT,
+        score REAL,
+        status TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS lead_action_counts (
+        status TEXT NOT NULL,
+        industry TEXT NOT NULL,
+        n INTEGER NOT NULL,
+        PRIMARY KEY (status, industry)
+    )""",
+    "CREATE INDEX IF NOT EXISTS lead_status_status ON lead_status (status)",
+    "CREATE INDEX IF NOT EXISTS lead_actions_exporter ON lead_actions (exporter_id)",
+    "CREATE INDEX IF NOT EXISTS lead_actions_industry ON lead_actions (industry)",
+    "CREATE INDEX IF NOT EXISTS lead_actions_state ON lead_actions (state)",
+    "CREATE INDEX IF NOT EXISTS lead_actions_score ON lead_actions (score)",
+]
+
+# Dropped and rebuilt around full writes, which is several times faster
+# than maintaining them row by row
+LEAD_INDEXES = {
+    "leads_rank": f"ON leads ({RANK_ORDER})",
+    "leads_exporter": f"ON leads (exporter_id, {RANK_ORDER})",
+    "leads_industry": f"ON leads (industry, {RANK_ORDER})",
+    "leads_state": f"ON leads (state, {RANK_ORDER})",
+    "leads_category": f"ON leads (lead_category, {RANK_ORDER})",
+}
+
+# API filter name -> leads column
+FILTERS = {"Industry": "industry", "State": "state", "lead_category": "lead_category"}
+
+ACTION_COLUMNS = ["exporter_id", "industry", "state", "score", "status"]
+
+# Folds the log rows after a given id into the compacted tables. Both read
+# only the new rows (a rowid range); in id order, an exporter's last new row
+# is the one its lead_status row is left with.
+FOLD_ACTIONS = [
+    """INSERT INTO lead_status (exporter_id, action_id, industry, state, score, status)
+    SELECT exporter_id, id, industry, state, score, status FROM lead_actions
+    WHERE id > :after ORDER BY id
+    ON CONFLICT (exporter_id) DO UPDATE SET
+        action_id = excluded.action_id,
+        industry = excluded.industry,
+        state = excluded.state,
+        score = excluded.score,
+        status = excluded.status
+    WHERE excluded.action_id > lead_status.action_id""",
+    """INSERT INTO lead_action_counts (status, industry, n)
+    SELECT COALESCE(status, ''), COALESCE(industry, ''), COUNT(*) FROM lead_actions
+    WHERE id > :after GROUP BY 1, 2
+    ON CONFLICT (status, industry) DO UPDATE SET n = n + excluded.n""",
+]
+
+# Exporter ids per IN (...) query
+LOOKUP_CHUNK = 500
+
+
+def connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class ConnectionPool:
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+
+        # Opens up to `size` connections, then waits for an idle one
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                opened = self._opened < self.size
+                if opened:
+                    self._opened += 1
+            conn = connect(self.path) if opened else self._idle.get()
+
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+
+class LeadStore:
+
+    def __init__(self, path=LEAD_DB_PATH, pool_size=LEAD_DB_POOL_SIZE):
+        self.pool = ConnectionPool(path, pool_size)
+        self._schema_ready = False
+
+    @contextmanager
+    def connection(self):
+        with self.pool.connection() as conn:
+            if not self._schema_ready:
+                with conn:
+                    for statement in TABLES:
+                        conn.execute(statement)
+                    self._create_indexes(conn)
+                # Log rows written before the compacted tables existed
+                with conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    self._fold_actions(conn)
+                self._schema_ready = True
+            yield conn
+
+    # -------------------------
+    # Writes (from the snapshot)
+    # -------------------------
+    @staticmethod
+    def _records(rows):
+        columns = [rows[c] for c in LEAD_COLUMNS]
+        columns[2] = columns[2].astype(object)  # Industry
+        columns[3] = columns[3].astype(object)  # State
+        return zip(*(c.tolist() for c in columns))
+
+    def _insert(self, conn, rows):
+        conn.executemany(
+            f"INSERT OR REPLACE INTO leads ({', '.join(LEAD_COLUMNS.values())}) "
+            f"VALUES ({', '.join('?' * len(LEAD_COLUMNS))})",
+            self._records(rows),
+        )
+
+    def _set_meta(self, conn, **values):
+        conn.executemany(
+            "INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)",
+            [(k, str(v)) for k, v in values.items()],
+        )
+
+    def version(self):
+        with self.connection() as conn:
+            row = conn.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _create_indexes(conn):
+        for name, definition in LEAD_INDEXES.items():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} {definition}")
+
+    def replace_leads(self, rows, version):
+
+        # One transaction: readers see the old rows until it commits
+        with self.connection() as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for name in LEAD_INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+            conn.execute("DELETE FROM leads")
+            self._insert(conn, rows)
+            self._create_indexes(conn)
+
+            conn.execute("DELETE FROM score_counts")
+            conn.execute(
+                "INSERT INTO score_counts SELECT score, COUNT(*) FROM leads GROUP BY score"
+            )
+            self._set_meta(conn, version=version, rows=len(rows))
+
+    def sync(self, rows, version):
+        # Full write unless another worker already stored this version
+        if self.version() != version:
+            self.replace_leads(rows, version)
+
+    def update_leads(self, rows, version, total):
+
+        with self.connection() as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            scores = set(rows["lead_score"].tolist())
+            for record_id in rows["Record_ID"].tolist():
+                old = conn.execute(
+                    "SELECT score FROM leads WHERE record_id = ?", (record_id,)
+                ).fetchone()
+                if old is not None:
+                    scores.add(old[0])
+
+            self._insert(conn, rows)
+
+            # Recount only the scores rows left or joined
+            scores = [(score,) for score in scores]
+            conn.executemany("DELETE FROM score_counts WHERE score = ?", scores)
+            conn.executemany(
+                "INSERT INTO score_counts "
+                "SELECT score, COUNT(*) FROM leads WHERE score = ? GROUP BY score",
+                scores,
+            )
+            self._set_meta(conn, version=version, rows=total)
+
+    # -------------------------
+    # Lead Actions (event log)
+    # -------------------------
+    def _fold_actions(self, conn):
+
+        # Inside a write transaction: folds log rows not folded yet. Returns
+        # the id of the last log row.
+        row = conn.execute("SELECT value FROM store_meta WHERE key = 'actions_folded'").fetchone()
+        after = int(row[0]) if row else 0
+        last = conn.execute("SELECT COALESCE(MAX(id), 0) FROM lead_actions").fetchone()[0]
+        if last > after:
+            for statement in FOLD_ACTIONS:
+                conn.execute(statement, {"after": after})
+            self._set_meta(conn, actions_folded=last)
+        return last
+
+    def append_actions(self, actions):
+
+        # actions: ACTION_COLUMNS tuples. One transaction, one prepared
+        # INSERT for every row. Returns the id of the last row.
+        with self.connection() as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                f"INSERT INTO lead_actions ({', '.join(ACTION_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(ACTION_COLUMNS))})",
+                actions,
+            )
+            return self._fold_actions(conn)
+
+    def actions_version(self):
+        # Changes with every write to the log
+        with self.connection() as conn:
+            row = conn.execute("SELECT value FROM store_meta WHERE key = 'actions_folded'").fetchone()
+        return int(row[0]) if row else 0
+
+    def latest_actions(self, exporter_ids=None, status=None, limit=100):
+
+        # Latest action of the given exporters, or of up to `limit` exporters
+        # whose latest status is `status` (most recent first)
+        columns = "exporter_id, action_id, industry, state, score, status"
+        with self.connection() as conn:
+            if exporter_ids is not None:
+                rows = []
+                for start in range(0, len(exporter_ids), LOOKUP_CHUNK):
+                    chunk = exporter_ids[start:start + LOOKUP_CHUNK]
+                    rows += conn.execute(
+                        f"SELECT {columns} FROM lead_status "
+                        f"WHERE exporter_id IN ({', '.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+            else:
+                rows = conn.execute(
+                    f"SELECT {columns} FROM lead_status WHERE status = ? "
+                    "ORDER BY action_id DESC LIMIT ?",
+                    (status, limit),
+                ).fetchall()
+
+        names = columns.split(", ")
+        return [dict(zip(names, row)) for row in rows]
+
+    def action_summary(self):
+
+        # Dashboard aggregates, from the compacted tables only
+        with self.connection() as conn:
+            counts = conn.execute(
+                "SELECT status, industry, n FROM lead_action_counts ORDER BY n DESC, status, industry"
+            ).fetchall()
+            current = conn.execute(
+                "SELECT status, COUNT(*) FROM lead_status GROUP BY status ORDER BY 2 DESC, 1"
+            ).fetchall()
+
+        def totals(position, name):
+            sums = {}
+            for row in counts:
+                sums[row[position]] = sums.get(row[position], 0) + row[2]
+            return [
+                {name: key or None, "actions": n}
+                for key, n in sorted(sums.items(), key=lambda item: (-item[1], item[0]))
+            ]
+
+        return {
+            "actions": sum(n for _, _, n in counts),
+            "by_status": totals(0, "status"),
+            "by_industry": totals(1, "industry"),
+            "by_status_industry": [
+                {"status": status or None, "industry": industry or None, "actions": n}
+                for status, industry, n in counts
+            ],
+            # Exporters by their latest status
+            "exporters": sum(n for _, n in current),
+            "exporters_by_status": [
+                {"status": status or None, "exporters": n} for status, n in current
+            ],
+        }
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def exporter_rank(self, exporter_id):
+        return self.exporter_ranks([exporter_id]).get(exporter_id)
+
+    def exporter_ranks(self, exporter_ids):
+
+        # Exporter_ID -> best-ranked row of the exporter, its 1-based rank and
+        # the row count; one query per LOOKUP_CHUNK ids
+        exporter_ids = list(dict.fromkeys(exporter_ids))
+        found = {}
+        with self.connection() as conn:
+            for start in range(0, len(exporter_ids), LOOKUP_CHUNK):
+                chunk = exporter_ids[start:start + LOOKUP_CHUNK]
+                found.update(
+                    (row[0], row[1:])
+                    for row in conn.execute(
+                        "SELECT exporter_id, score, lead_category, ai_reason, "
+                        "(SELECT COALESCE(SUM(n), 0) FROM score_counts "
+                        " WHERE score_counts.score > best.score) + "
+                        "(SELECT COUNT(*) FROM leads "
+                        " WHERE leads.score = best.score AND leads.record_id < best.record_id) "
+                        "FROM (SELECT exporter_id, record_id, score, lead_category, ai_reason, "
+                        f"      ROW_NUMBER() OVER (PARTITION BY exporter_id ORDER BY {RANK_ORDER}) AS n "
+                        "      FROM leads "
+                        f"      WHERE exporter_id IN ({', '.join('?' * len(chunk))})) AS best "
+                        "WHERE n = 1",
+                        chunk,
+                    )
+                )
+            if not found:
+                return {}
+            total = conn.execute("SELECT value FROM store_meta WHERE key = 'rows'").fetchone()
+
+        return {
+            exporter_id: {
+                "lead_score": score,
+                "lead_category": lead_category,
+                "ai_reason": ai_reason,
+                "rank": ahead + 1,
+                "total": int(total[0]),
+            }
+            for exporter_id, (score, lead_category, ai_reason, ahead) in found.items()
+        }
+
+    def lead_page(self, limit, after=None, filters=None, min_score=None, max_score=None):
+
+        # Keyset page in rank order. after: (score, record_id) of the last row
+        # served. Returns the page as SCORE_COLUMNS and the next page's key.
+        where, params = [], []
+        for name, value in (filters or {}).items():
+            where.append(f"{FILTERS[name]} = ?")
+            params.append(value.strip())
+        if min_score is not None:
+            where.append("score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            where.append("score <= ?")
+            params.append(max_score)
+        if after is not None:
+            where.append("score <= ? AND (score < ? OR record_id > ?)")
+            params += [after[0], after[0], after[1]]
+
+        names = list(LEAD_COLUMNS.values())
+        with self.connection() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(names)} FROM leads "
+                f"{'WHERE ' + ' AND '.join(where) if where else ''} "
+                f"ORDER BY {RANK_ORDER} LIMIT ?",
+                params + [limit + 1],
+            ).fetchall()
+
+        page = pd.DataFrame.from_records(rows[:limit], columns=list(LEAD_COLUMNS))
+        next_key = None
+        if limit and len(rows) > limit:
+            next_key = (rows[limit - 1][names.index("score")], rows[limit - 1][0])
+        return page.drop(columns="Record_ID"), next_key
+
+
+lead_store = LeadStore()
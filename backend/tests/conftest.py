@@ -0,0 +1,14 @@
+# backend/tests/conftest.py
+# The backend modules import each other as top-level modules (they run from
+# backend/), so the tests do too. The lead store points at a scratch
+# database: tests never write to the tracked leads.db.
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(BACKEND))
+os.environ["LEAD_DB_PATH"] = str(Path(tempfile.mkdtemp(prefix="leads-test-")) / "leads.db")
@@ -0,0 +1,254 @@
+# backend/tests/reference.py
+# Synthetic data and the reference implementations the tests compare the
+# fast paths against (the code each one replaced). benchmark.py times the
+# same pairs on the same data, importing from here.
+#
+# pandas and model are imported inside the functions: benchmark.py imports
+# this module at startup and keeps its own process light.
+
+import numpy as np
+
+
+# -------------------------
+# Synthetic data
+# -------------------------
+TRADE_STATES = [
+    "Delhi", "Gujarat", "Haryana", "Karnataka", "Maharashtra",
+    "Punjab", "Rajasthan", "Tamil Nadu", "Telangana",
+]
+TRADE_INDUSTRIES = [
+    "Auto Parts", "Chemicals", "Electronics", "Engineering", "IT Software",
+    "Machinery", "Medical Devices", "Pharmaceuticals", "Solar", "Textiles",
+]
+CERTIFICATIONS = [
+    "CE", "EU-GMP", "FDA", "GDPR", "IEC", "ISO14001", "ISO27001",
+    "ISO9001", "REACH", "RoHS", "SOC2", "TUV", "UL", "WHO-GMP",
+]
+NEWS_REGIONS = [
+    "Central Africa", "East Asia", "Middle East", "North America",
+    "Oceania", "South America", "Southeast Asia", "Western Europe",
+]
+
+
+def synthetic_trade(n, seed=0, start=0, exporters=None):
+
+    # Rows shaped like trade_data_processed_cleaned.csv: same columns, value
+    # ranges, missing-value rates and two-decimal scores
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    exporters = exporters or max(9_000, n // 2)
+
+    def two_decimals(low, high):
+        return np.round(rng.uniform(low, high, n), 2)
+
+    def with_missing(values, rate):
+        values = values.astype(float)
+        values[rng.random(n) < rate] = np.nan
+        return values
+
+    days = rng.integers(0, 1500, n).astype("timedelta64[D]")
+    certification = np.array(CERTIFICATIONS, dtype=object)[rng.integers(0, len(CERTIFICATIONS), n)]
+    certification[rng.random(n) < 0.386] = None
+    intent = two_decimals(0, 1)
+    prompt = two_decimals(0, 1)
+    shipment = two_decimals(33_000, 870_000)
+    currency = two_decimals(-0.98, 0.98)
+
+    # Same rule train_model.ensure_converted uses, with fixed thresholds
+    converted = (intent > 0.65) & (shipment > 450_000) & (prompt > 0.5)
+    converted ^= rng.random(n) < 0.1
+
+    return pd.DataFrame({
+        "Record_ID": np.arange(start + 1, start + n + 1),
+        "Date": (np.datetime64("2021-01-01") + days).astype(str),
+        "Exporter_ID": np.char.add("EXP_", (1000 + rng.integers(0, exporters, n)).astype(str)),
+        "State": rng.choice(TRADE_STATES, n),
+        "Industry": rng.choice(TRADE_INDUSTRIES, n),
+        "MSME_Udyam": with_missing(rng.integers(0, 2, n), 0.335),
+        "Manufacturing_Capacity_Tons": with_missing(rng.integers(50, 9001, n), 0.5),
+        "Revenue_Size_USD": rng.integers(500_000, 80_000_000, n),
+        "Team_Size": rng.integers(10, 2001, n),
+        "Certification": certification,
+        "Good_Payment_Terms": rng.integers(0, 2, n),
+        "Prompt_Response_Score": prompt,
+        "Hiring_Signal": rng.integers(0, 2, n),
+        "LinkedIn_Activity": rng.integers(0, 25_001, n),
+        "SalesNav_ProfileViews": rng.integers(1, 15_001, n),
+        "SalesNav_JobChange": rng.integers(0, 2, n),
+        "Intent_Score": intent,
+        "Shipment_Value_USD": shipment,
+        "Quantity_Tons": two_decimals(55, 4_952),
+        "Tariff_Impact": two_decimals(-1, 1),
+        "StockMarket_Impact": two_decimals(-1, 1),
+        "War_Risk": rng.integers(0, 2, n),
+        "Natural_Calamity_Risk": rng.integers(0, 2, n),
+        "Currency_Shift": currency,
+        "Converted": converted.astype(int),
+        "Impact_Score": currency,
+    })
+
+
+def raw_feed(n, seed=0, n_regions=25):
+
+    # News feed shaped like the scoring.py input, dirty values included:
+    # padded/missing regions, "123.0" ids with duplicates, unparseable dates,
+    # NaNs in the measures and free-text flags
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    regions = np.array(
+        [f" Region {i} " for i in range(n_regions)] + ["", "NULL", "nan"], dtype=object
+    )
+    events = np.array(["Tariff", "War ", "Flood", "Strike", "none", "Sanction"], dtype=object)
+
+    seconds = rng.integers(0, 1500 * 86400, n).astype("timedelta64[s]")
+    dates = (np.datetime64("2020-01-01T00:00:00") + seconds).astype(str).astype(object)
+    dates[rng.random(n) < 0.002] = "not a date"
+
+    news = rng.integers(1, max(2, n // 2), n).astype(float).astype(str).astype(object)
+    news[rng.random(n) < 0.002] = "##"
+
+    def noisy(values, p=0.02):
+        values = values.astype(float)
+        values[rng.random(n) < p] = np.nan
+        return values
+
+    return pd.DataFrame({
+        "News_ID": news,
+        "Date": dates,
+        "Region": regions[rng.integers(0, len(regions), n)],
+        "Event_Type": events[rng.integers(0, len(events), n)],
+        "Impact_Level": noisy(rng.integers(1, 6, n)),
+        "Tariff_Change": noisy(rng.normal(0, 5, n)),
+        "StockMarket_Shock": noisy(rng.normal(0, 2, n)),
+        "Currency_Shift": noisy(rng.normal(0, 1, n)),
+        "Shipment_Value_USD": noisy(rng.lognormal(12, 1.5, n)),
+        "Quantity_Tons": noisy(rng.lognormal(6, 1, n)),
+        "War_Flag": rng.choice(["0", "1", "yes", ""], n),
+        "Natural_Calamity_Flag": rng.integers(0, 2, n),
+        "import_volume": noisy(rng.lognormal(8, 1, n)),
+    })
+
+
+def cleaned_feed(n, seed=0, n_regions=25):
+
+    # Rows as add_region_features sees them; minute-resolution dates leave
+    # plenty of equal timestamps within a region
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    regions = np.array([f"region {i}" for i in range(n_regions)] + ["unknown"], dtype=object)
+    minutes = rng.integers(0, 1500 * 1440, n).astype("timedelta64[m]")
+    return pd.DataFrame({
+        "News_ID": rng.integers(1, max(2, n // 2), n).astype(str).astype(object),
+        "Date": (np.datetime64("2020-01-01T00:00") + minutes).astype("datetime64[ns]"),
+        "Region": regions[rng.integers(0, len(regions), n)],
+        "Shipment_Value_USD": rng.lognormal(12, 1.5, n),
+    })
+
+
+def random_news(n, industries, regions, seed):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "Region": str(rng.choice(regions)),
+            "Affected_Industry": str(rng.choice(industries)),
+            "Tariff_Change": round(float(rng.uniform(-1, 1)), 2),
+            "War_Flag": int(rng.integers(0, 2)),
+            "Natural_Calamity_Flag": int(rng.integers(0, 2)),
+            "Currency_Shift": round(float(rng.uniform(-1, 1)), 2),
+        }
+        for _ in range(n)
+    ]
+
+
+def random_actions(n, seed=0, exporters=20_000):
+    rng = np.random.default_rng(seed)
+    statuses = np.array(["Viewed", "Swiped Right", "Swiped Left", "Contacted", "Interested", "Won"])
+    return list(zip(
+        np.char.add("EXP_", rng.integers(1000, 1000 + exporters, n).astype(str)).tolist(),
+        rng.choice(TRADE_INDUSTRIES, n).tolist(),
+        rng.choice(TRADE_STATES, n).tolist(),
+        np.round(rng.uniform(0, 100, n), 2).tolist(),
+        statuses[rng.integers(0, len(statuses), n)].tolist(),
+    ))
+
+
+# -------------------------
+# Reference implementations
+# -------------------------
+def concat_labels(df):
+    import model
+
+    # The labelling generate_lead_scores used before the rule engine: a
+    # Python call per row for the category, a string per row per rule
+    def categorize(score):
+        if score >= 75:
+            return "High Potential"
+        elif score >= 40:
+            return "Medium Potential"
+        else:
+            return "Low Potential"
+
+    df["lead_category"] = df["lead_score"].apply(categorize)
+    first, *rest = model.REASON_RULES
+    column, threshold, text = first
+    df["ai_reason"] = "Balanced Performance"
+    df.loc[df[column] > threshold(df[column]), "ai_reason"] = text
+    for column, threshold, text in rest:
+        df.loc[df[column] > threshold(df[column]), "ai_reason"] += ", " + text
+
+
+def region_features_per_group(df):
+
+    # The previous implementation: one Python-level pass per region and
+    # feature, each re-sorting and re-indexing the group
+    import pandas as pd
+
+    def per_region(df, fn):
+        return pd.concat([fn(g) for _, g in df.groupby("Region", sort=True)])
+
+    def pct_change_region(g):
+        g = g.sort_values("Date", kind="stable")
+        g["import_growth_pct"] = g["Shipment_Value_USD"].pct_change().replace([np.inf, -np.inf], np.nan).fillna(0.0) * 100.0
+        return g
+
+    def roll_count_region(g):
+        g2 = g.set_index("Date").sort_index(kind="stable")
+        g2["frequency"] = g2["News_ID"].rolling("365D").count().values
+        return g2.reset_index()
+
+    def roll_price_region(g):
+        g2 = g.set_index("Date").sort_index(kind="stable")
+        g2["price_avg"] = g2["Shipment_Value_USD"].rolling("7D", min_periods=1).mean().values
+        return g2.reset_index()
+
+    df = df.sort_values(["Region", "Date"], kind="stable")
+    df = per_region(df, pct_change_region)
+    df = per_region(df, roll_count_region)
+    return per_region(df, roll_price_region)
+
+
+def safe_regions_per_request(news_path, industry):
+    import pandas as pd
+
+    # recommend_safe_regions before the risk table (minus the trade CSV read)
+    news_df = pd.read_csv(news_path)
+    industry_news = news_df[
+        news_df["Affected_Industry"].str.lower() == industry.lower()
+    ].copy()
+    if industry_news.empty:
+        return None
+
+    industry_news["risk_score"] = (
+        0.35 * abs(industry_news["Tariff_Change"]) +
+        0.30 * industry_news["War_Flag"] +
+        0.20 * industry_news["Natural_Calamity_Flag"] +
+        0.15 * abs(industry_news["Currency_Shift"])
+    )
+    recommendations = industry_news.groupby("Region").mean(numeric_only=True).reset_index()
+    recommendations = recommendations.sort_values(by="risk_score").head(5)
+    return recommendations[[
+        "Region", "risk_score", "Tariff_Change", "War_Flag", "Currency_Shift"
+    ]].to_dict(orient="records")
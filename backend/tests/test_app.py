@@ -0,0 +1,103 @@
+# backend/tests/test_app.py
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from cache import response_cache
+from executor import work_pool
+from matchmaking import MATCH_MAX_BUYERS, MATCH_MAX_K
+
+if not app.MODEL_PATH.exists():
+    pytest.skip("needs lead_model.pkl (python train_model.py)", allow_module_level=True)
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app.app) as client:
+        yield client
+
+
+@pytest.fixture(scope="module")
+def buyer(client):
+    industry = client.get("/industries").json()[0]["name"]
+    return {
+        "industry": industry, "required_quantity": 2000, "budget": 1,
+        "risk_tolerance": "Low", "intent_score": 70,
+    }
+
+
+def test_etag_revalidation(client):
+    response = client.get("/industries")
+    assert response.headers["cache-control"]
+
+    again = client.get("/industries", headers={"If-None-Match": response.headers["etag"]})
+    assert again.status_code == 304
+    assert again.headers["etag"] == response.headers["etag"]
+
+
+def test_lead_score_formats_agree(client):
+    records = client.get("/lead-scores?limit=200").json()
+    columns = client.get("/lead-scores?limit=200&format=columns").json()["columns"]
+
+    assert [dict(zip(columns, row)) for row in zip(*columns.values())] == records
+
+
+def test_lead_score_page_limit(client):
+    assert client.get(f"/lead-scores?limit={app.LEAD_PAGE_MAX}").status_code == 200
+    assert client.get(f"/lead-scores?limit={app.LEAD_PAGE_MAX + 1}").status_code == 422
+
+
+def test_lead_score_cursor_pages(client):
+    whole = client.get("/lead-scores?limit=300&industry=solar").json()
+
+    pages, cursor = [], None
+    while len(pages) < 300:
+        response = client.get(
+            "/lead-scores?limit=70&industry=solar" + (f"&cursor={cursor}" if cursor else "")
+        )
+        pages += response.json()
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+
+    assert pages[:300] == whole
+
+
+def test_dashboard_batch_matches_single(client):
+    ids = [row["Exporter_ID"] for row in client.get("/lead-scores?limit=20").json()]
+    batch = client.post("/exporter-dashboard/batch", json={"exporter_ids": ids + ["NOPE"]}).json()
+
+    assert batch["not_found"] == ["NOPE"]
+    assert batch["results"] == [
+        client.get(f"/exporter-dashboard?exporter_id={i}").json() for i in ids
+    ]
+
+
+def test_match_live_bounds(client, buyer):
+    assert len(client.post("/match-live?k=3", json=buyer).json()) == 3
+    assert client.post("/match-live?k=0", json=buyer).status_code == 422
+    assert client.post(f"/match-live?k={MATCH_MAX_K + 1}", json=buyer).status_code == 422
+
+    batch = "/match-live/batch"
+    assert client.post(batch, json={"requests": [buyer], "k": -3}).status_code == 422
+    assert client.post(batch, json={"requests": []}).status_code == 422
+    too_many = {"requests": [buyer] * (MATCH_MAX_BUYERS + 1)}
+    assert client.post(batch, json=too_many).status_code == 422
+
+
+def test_match_live_batch_matches_single(client, buyer):
+    buyers = [buyer, {**buyer, "required_quantity": 50}, {**buyer, "industry": "Unknown"}]
+    batch = client.post("/match-live/batch", json={"requests": buyers, "k": 4}).json()
+
+    assert batch == [client.post("/match-live?k=4", json=b).json() for b in buyers]
+    assert batch[-1] == []
+
+
+def test_full_work_pool_answers_503(client, monkeypatch):
+    monkeypatch.setattr(work_pool, "max_pending", 0)
+    response_cache.clear()
+
+    response = client.get("/lead-scores?limit=3")
+    assert response.status_code == 503
+    assert response.headers["retry-after"]
@@ -0,0 +1,29 @@
+# backend/tests/test_data.py
+
+import pandas as pd
+import pytest
+
+from data import load_trade_data, write_trade_cache
+
+
+@pytest.mark.parametrize("use_cache", [False, True])
+def test_large_integers_load_unwrapped(tmp_path, use_cache):
+    path = tmp_path / "trade.csv"
+    pd.DataFrame({
+        "Record_ID": [1, 2],
+        "Exporter_ID": ["EXP_1", "EXP_2"],
+        "Date": ["2025-01-01", "2025-01-02"],
+        "Revenue_Size_USD": [3_000_000_000, 2**40],
+        "Team_Size": [70_000, 12],
+        "LinkedIn_Activity": [2**33, 5],
+        "SalesNav_ProfileViews": [2**31, 0],
+    }).to_csv(path, index=False)
+    if use_cache:
+        write_trade_cache(path)
+
+    df = load_trade_data(path=path, use_cache=use_cache)
+
+    assert df["Revenue_Size_USD"].tolist() == [3_000_000_000, 2**40]
+    assert df["Team_Size"].tolist() == [70_000, 12]
+    assert df["LinkedIn_Activity"].tolist() == [2**33, 5]
+    assert df["SalesNav_ProfileViews"].tolist() == [2**31, 0]
@@ -0,0 +1,37 @@
+# backend/tests/test_forest.py
+
+import joblib
+import numpy as np
+import pytest
+
+from data import FEATURES, MODEL_PATH, load_trade_data
+import forest as forest_module
+from forest import FlatForest
+from tests.reference import synthetic_trade
+
+if not MODEL_PATH.exists():
+    pytest.skip("needs lead_model.pkl (python train_model.py)", allow_module_level=True)
+
+
+@pytest.fixture(scope="module")
+def sklearn_model():
+    return joblib.load(MODEL_PATH)
+
+
+def test_flat_forest_matches_sklearn(sklearn_model, tmp_path):
+    path = tmp_path / "lead_model.npz"
+    FlatForest.from_sklearn(sklearn_model).save(path)
+    forest = FlatForest.load(path)
+
+    for X in (load_trade_data(FEATURES)[FEATURES], synthetic_trade(20_000)[FEATURES]):
+        assert np.array_equal(sklearn_model.predict_proba(X), forest.predict_proba(X))
+
+
+def test_chunked_predict_matches_whole_batch(sklearn_model, monkeypatch):
+    forest = FlatForest.from_sklearn(sklearn_model)
+    X = synthetic_trade(2_500)[FEATURES]
+
+    whole = forest.predict_proba(X)
+    monkeypatch.setattr(forest_module, "PREDICT_CHUNK_ROWS", 1_000)
+    assert np.array_equal(forest.predict_proba(X), whole)
+    assert forest.predict_proba(X.iloc[:0]).shape == (0, whole.shape[1])
@@ -0,0 +1,175 @@
+# backend/tests/test_matchmaking.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import matchmaking
+from matchmaking import BUYER_RISK_WEIGHT, generate_matches, score_buyers
+
+EXPORTER = {"industry": "Automotive", "trade_volume": 200000, "lead_score": 87}
+
+
+def reference_score(exporter, buyer):
+
+    # The original row-by-row scoring generate_matches must reproduce
+    score = 0
+    if exporter["industry"].lower() == buyer["industry"].lower():
+        score += 30
+    score += BUYER_RISK_WEIGHT.get(buyer["risk_level"].lower(), 0)
+    volume_diff = abs(exporter["trade_volume"] - buyer["trade_volume"])
+    if volume_diff < 100000:
+        score += 20
+    elif volume_diff < 300000:
+        score += 10
+    if exporter["lead_score"] > 85:
+        score += 15
+    elif exporter["lead_score"] > 70:
+        score += 8
+    score += buyer.get("success_rate", 5)
+    return min(score, 100)
+
+
+def reference_matches(exporter, buyers):
+    results = [{**buyer, "match_score": reference_score(exporter, buyer)} for buyer in buyers]
+    return sorted(results, key=lambda x: x["match_score"], reverse=True)
+
+
+def buyer_pool(n, seed=7):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "name": [f"BUYER_{i}" for i in range(n)],
+        "industry": rng.choice(["Automotive", "automotive", "Textiles", "Chemicals"], n),
+        "risk_level": rng.choice(["Low", "Medium", "High", "low", "Unknown"], n),
+        "trade_volume": rng.integers(10_000, 1_000_000, n),
+        "success_rate": rng.integers(0, 80, n),
+    })
+
+
+def test_records_match_the_rowwise_scoring():
+    records = buyer_pool(5_000).to_dict(orient="records")
+
+    for lead_score in (87, 75, 50):
+        exporter = {**EXPORTER, "lead_score": lead_score}
+        matches = generate_matches(exporter, records)
+
+        assert matches == reference_matches(exporter, records)
+        assert all(type(m["match_score"]) is int for m in matches)
+
+
+def test_missing_success_rate_defaults():
+    buyers = [
+        {"name": "a", "industry": "Automotive", "risk_level": "Low", "trade_volume": 250000},
+        {"name": "b", "industry": "Textiles", "risk_level": "high", "trade_volume": 40000,
+         "success_rate": 12},
+    ]
+    assert generate_matches(EXPORTER, buyers) == reference_matches(EXPORTER, buyers)
+
+
+def test_frame_top_k():
+    frame = buyer_pool(5_000)
+    expected = reference_matches(EXPORTER, frame.to_dict(orient="records"))[:50]
+
+    top = generate_matches(EXPORTER, frame, k=50)
+
+    assert top["name"].tolist() == [m["name"] for m in expected]
+    assert top["match_score"].tolist() == [m["match_score"] for m in expected]
+    assert score_buyers(EXPORTER, frame).max() == expected[0]["match_score"]
+
+
+def test_no_buyers():
+    assert generate_matches(EXPORTER, []) == []
+    assert generate_matches(EXPORTER, buyer_pool(0)).empty
+
+
+# -------------------------
+# /match-live
+# -------------------------
+INDUSTRIES = ["Auto Parts", "Chemicals", "Solar", "Textiles"]
+
+
+def exporter_scores(n, seed=3):
+
+    # Rounded lead scores, so ties are common
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Exporter_ID": [f"EXP_{i}" for i in rng.integers(1000, 1000 + n // 2, n)],
+        "Industry": pd.Categorical.from_codes(rng.integers(0, len(INDUSTRIES), n), INDUSTRIES),
+        "State": "Gujarat",
+        "Quantity_Tons": np.round(rng.uniform(55, 4_952, n), 2),
+        "lead_score": np.round(rng.uniform(0, 100, n)),
+        "lead_category": "Medium Potential",
+        "ai_reason": "Balanced Performance",
+        "Revenue_Size_USD": 1_000_000,
+    })
+
+
+def live_buyers(n, seed=42):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "industry": str(rng.choice(INDUSTRIES + [" solar ", "Unknown"])),
+            "required_quantity": float(rng.uniform(50, 5000)),
+            "intent_score": float(rng.uniform(0, 100)),
+            "risk_tolerance": str(rng.choice(["Low", "Medium", "High", "Other"])),
+        }
+        for _ in range(n)
+    ]
+
+
+def scan_top_k(partition, required, intent_alignment, risk_penalty, k):
+
+    # Every exporter of the partition scored, as the exhaustive path does
+    quantity_score = 1 / (1 + np.abs(partition["quantity"] - required))
+    match_score = (
+        0.5 * partition["lead_score"] +
+        0.3 * quantity_score * 100 +
+        0.2 * intent_alignment * 100
+    ) * (1 - risk_penalty)
+    return matchmaking.top_k_indices(match_score, k)
+
+
+def test_batch_matches_single_buyers():
+    index = matchmaking.build_industry_index(exporter_scores(4_000))
+    buyers = live_buyers(300)
+
+    batch = matchmaking.match_live_exporters_batch(index, buyers, k=7)
+    single = [
+        matchmaking.match_live_exporters(
+            index, b["industry"], b["required_quantity"], b["intent_score"],
+            b["risk_tolerance"], k=7,
+        )
+        for b in buyers
+    ]
+
+    assert batch == single
+    assert any(batch) and not all(batch)  # unknown industries match nothing
+
+
+@pytest.mark.parametrize("k", [1, 5, 50])
+def test_indexed_top_k_is_exhaustive(k):
+    index = matchmaking.build_industry_index(exporter_scores(60_000))
+
+    for b in live_buyers(200, seed=k):
+        partition = index.get(matchmaking.normalize_industry(b["industry"]))
+        if partition is None:
+            continue
+        query = (
+            b["required_quantity"],
+            np.float64(b["intent_score"]) / 100,
+            matchmaking.RISK_PENALTY.get(b["risk_tolerance"], 0.10),
+        )
+        top, _ = matchmaking.indexed_top_k(partition, *query, k)
+        assert np.array_equal(top, scan_top_k(partition, *query, k))
+
+
+def test_indexed_batch_is_exhaustive(monkeypatch):
+    index = matchmaking.build_industry_index(exporter_scores(40_000))
+    buyers = live_buyers(200)
+
+    monkeypatch.setattr(matchmaking, "MATCH_INDEX_MIN_ROWS", float("inf"))
+    scanned = matchmaking.match_live_exporters_batch(index, buyers, k=10)
+    monkeypatch.setattr(matchmaking, "MATCH_INDEX_MIN_ROWS", 0)
+    indexed = matchmaking.match_live_exporters_batch(index, buyers, k=10)
+
+    assert indexed == scanned
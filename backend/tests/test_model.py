@@ -0,0 +1,157 @@
+# backend/tests/test_model.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import model
+from data import load_trade_data
+from matchmaking import build_industry_index
+from tests.reference import concat_labels, synthetic_trade
+
+if not model.MODEL_PATH.exists():
+    pytest.skip("needs lead_model.pkl (python train_model.py)", allow_module_level=True)
+
+
+@pytest.fixture
+def snapshot():
+    # Upserts patch the shared snapshot; later tests get a fresh one
+    yield model.get_lead_snapshot()
+    model.refresh_lead_snapshot()
+
+
+def same_filter_index(patched, rebuilt):
+
+    # Codes are numbered differently; the values and rank lists must agree
+    for column, entry in patched.items():
+        keys = {key: code for key, code in entry["keys"].items() if len(entry["ranks"][code])}
+        assert set(keys) == set(rebuilt[column]["keys"]), column
+        for key, code in keys.items():
+            expected = rebuilt[column]["ranks"][rebuilt[column]["keys"][key]]
+            assert np.array_equal(entry["ranks"][code], expected), (column, key)
+
+        names = np.array(list(entry["keys"]) + [None], dtype=object)
+        expected = np.array(list(rebuilt[column]["keys"]) + [None], dtype=object)
+        assert (names[entry["codes"]] == expected[rebuilt[column]["codes"]]).all(), column
+
+
+def assert_matches_rebuild(snapshot):
+
+    # Everything upserts patch, against the same rows indexed from scratch
+    rows = snapshot["rows"]
+    assert np.array_equal(rows["lead_score"].to_numpy(), model.score_rows(rows))
+
+    order = np.argsort(-rows["lead_score"].to_numpy(), kind="stable")
+    assert np.array_equal(snapshot["order"], order)
+    assert np.array_equal(snapshot["rank"], model._rank_table(order))
+
+    scores = rows[model.SCORE_COLUMNS].take(order).reset_index(drop=True)
+    pd.testing.assert_frame_equal(snapshot["scores"], scores)
+
+    labels = rows.copy()
+    model.label_rows(labels, model.reason_flags(labels, model.reason_thresholds(labels)))
+    assert rows["ai_reason"].tolist() == labels["ai_reason"].tolist()
+    assert rows["lead_category"].tolist() == labels["lead_category"].tolist()
+
+    assert snapshot["exporter_index"] == model.build_exporter_index(scores, order)
+    same_filter_index(snapshot["filter_index"], model.build_filter_index(scores))
+
+    rebuilt = build_industry_index(scores)
+    assert snapshot["industry_index"].keys() == rebuilt.keys()
+    for industry, partition in rebuilt.items():
+        patched = snapshot["industry_index"][industry]
+        # Partitions left alone keep the categories of an older snapshot
+        pd.testing.assert_frame_equal(
+            patched["frame"], partition["frame"], check_categorical=False, check_dtype=False
+        )
+        assert np.array_equal(patched["by_score"], partition["by_score"])
+
+
+def test_upserts_match_a_rebuild(snapshot):
+    rng = np.random.default_rng(0)
+    rows = snapshot["rows"]
+    record_ids = rows["Record_ID"].to_numpy()
+    industries = rows["Industry"].dropna().unique().tolist()
+    states = rows["State"].dropna().unique().tolist()
+
+    # Updates, some moving rows to another industry or state (case and
+    # padding differ: filters and partitions match them normalized)
+    for batch in (1, 50, 3_000):
+        model.upsert_exporter_rows([
+            {
+                "Record_ID": int(record_id),
+                "Intent_Score": float(rng.uniform(0, 1)),
+                "Industry": str(rng.choice(industries)) + " ",
+                "State": str(rng.choice(states)).upper(),
+            }
+            for record_id in rng.choice(record_ids, batch, replace=False)
+        ])
+
+    # Inserts, one into an industry nobody had
+    inserts = rows.iloc[:3][model.SCORING_COLUMNS].to_dict(orient="records")
+    for i, record in enumerate(inserts):
+        record["Record_ID"] = int(record_ids.max()) + 1 + i
+    inserts[0]["Industry"] = "Space Hardware"
+    result = model.upsert_exporter_rows(inserts)
+
+    assert result["inserted"] == 3
+    assert_matches_rebuild(model.get_lead_snapshot())
+
+
+def test_upsert_rejects_bad_batches(snapshot):
+    with pytest.raises(ValueError, match="No rows"):
+        model.upsert_exporter_rows([])
+    with pytest.raises(ValueError, match="Record_ID"):
+        model.upsert_exporter_rows([{"Intent_Score": 0.5}])
+    with pytest.raises(ValueError, match="Unknown columns"):
+        model.upsert_exporter_rows([{"Record_ID": 1, "Nope": 1}])
+
+
+@pytest.mark.parametrize("field, value, message", [
+    ("Revenue_Size_USD", 1e20, "between"),
+    ("War_Risk", 300, "between"),
+    ("Intent_Score", 1e300, "between"),
+    ("Quantity_Tons", float("inf"), "finite"),
+    ("Revenue_Size_USD", "lots", "numeric"),
+])
+def test_upsert_rejects_values_the_columns_cannot_hold(snapshot, field, value, message):
+    rows = snapshot["rows"]
+    before = rows[field].copy()
+    record_id = int(rows["Record_ID"].iat[0])
+
+    new_row = rows.iloc[:1][model.SCORING_COLUMNS].to_dict(orient="records")[0]
+    new_row.update({"Record_ID": int(rows["Record_ID"].max()) + 1, field: value})
+    for batch in ([{"Record_ID": record_id, field: value}], [new_row]):
+        with pytest.raises(ValueError, match=message):
+            model.upsert_exporter_rows(batch)
+
+    assert len(model.get_lead_snapshot()["rows"]) == len(rows)
+    assert model.get_lead_snapshot()["rows"][field].equals(before)
+
+
+def test_parallel_scores_match_in_process():
+    rows = load_trade_data(model.SCORING_COLUMNS).head(4_000)
+    assert np.array_equal(model.score_rows(rows, 2), model.score_rows(rows))
+
+
+@pytest.mark.parametrize("rules", [3, 15])
+def test_reason_engine_matches_concatenated_labels(monkeypatch, rules):
+    numeric = ["Revenue_Size_USD", "Team_Size", "Shipment_Value_USD", "Quantity_Tons"]
+    extra = [
+        (numeric[i % len(numeric)], lambda values: values.median(), f"Signal {i}")
+        for i in range(max(0, rules - len(model.REASON_RULES)))
+    ]
+    monkeypatch.setattr(model, "REASON_RULES", model.REASON_RULES + extra)
+    monkeypatch.setattr(
+        model, "REASON_DTYPE", np.min_scalar_type((1 << len(model.REASON_RULES)) - 1)
+    )
+
+    df = synthetic_trade(20_000)
+    df["lead_score"] = np.random.default_rng(1).uniform(0, 100, len(df))
+
+    engine = df.copy()
+    model.label_rows(engine, model.reason_flags(engine, model.reason_thresholds(engine)))
+    concat_labels(df)
+
+    assert engine["ai_reason"].tolist() == df["ai_reason"].tolist()
+    assert engine["lead_category"].tolist() == df["lead_category"].tolist()
@@ -0,0 +1,57 @@
+# backend/tests/test_regions.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from regions import RegionRiskTable
+from tests.reference import NEWS_REGIONS, TRADE_INDUSTRIES, random_news, safe_regions_per_request
+
+INDUSTRIES = [industry.lower() for industry in TRADE_INDUSTRIES]
+
+
+def same_regions(a, b):
+    return a is not None and b is not None and len(a) == len(b) and all(
+        x["Region"] == y["Region"] and
+        all(np.isclose(x[c], y[c], rtol=1e-12, atol=0) for c in x if c != "Region")
+        for x, y in zip(a, b)
+    )
+
+
+@pytest.fixture
+def news_path(tmp_path):
+    path = tmp_path / "news_data.csv"
+    news = pd.DataFrame(random_news(3_000, TRADE_INDUSTRIES, NEWS_REGIONS, 1))
+    news.insert(0, "News_ID", np.arange(len(news)))
+    news.to_csv(path, index=False)
+    return path
+
+
+def test_table_matches_per_request_groupby(news_path):
+    table = RegionRiskTable(news_path).refresh()
+
+    for industry in INDUSTRIES + ["unknown"]:
+        expected = safe_regions_per_request(news_path, industry)
+        if expected is None:
+            assert table.top_regions(industry) is None
+        else:
+            assert same_regions(table.top_regions(industry), expected), industry
+
+
+def test_ingest_matches_rereading_the_file(news_path):
+    table = RegionRiskTable(news_path).refresh()
+
+    for seed, batch in enumerate([1, 100, 2_000]):
+        table.ingest(random_news(batch, TRADE_INDUSTRIES, NEWS_REGIONS, 10 + seed))
+        fresh = RegionRiskTable(news_path).refresh()
+
+        for industry in INDUSTRIES:
+            expected = safe_regions_per_request(news_path, industry)
+            assert same_regions(table.top_regions(industry), expected), industry
+            assert same_regions(fresh.top_regions(industry), expected), industry
+
+
+def test_ingest_rejects_incomplete_rows(news_path):
+    table = RegionRiskTable(news_path)
+    with pytest.raises(ValueError, match="need values"):
+        table.ingest([{"Region": "Oceania"}])
@@ -0,0 +1,49 @@
+# backend/tests/test_serialize.py
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from serialize import columns_json, ndjson_lines, records_json, standard_json
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 500
+    # No NaNs: the standard encoder cannot render them
+    return pd.DataFrame({
+        "Exporter_ID": [f"EXP_{i}" for i in range(n)],
+        "Industry": pd.Categorical(rng.choice(["Solar", "Textiles"], n)),
+        "Revenue_Size_USD": rng.integers(0, 10**9, n),
+        "Quantity_Tons": np.round(rng.uniform(0, 5_000, n), 2),
+        "lead_score": rng.uniform(0, 100, n),
+        "ai_reason": "Balanced Performance, High Intent 🚀",
+    })
+
+
+def expected_records(df):
+    return json.loads(standard_json(df.to_dict(orient="records")))
+
+
+def test_records_json(frame):
+    assert json.loads(records_json(frame)) == expected_records(frame)
+
+
+def test_columns_json(frame):
+    body = json.loads(columns_json(frame))
+    columns = body["columns"]
+
+    assert body["length"] == len(frame)
+    assert [dict(zip(columns, row)) for row in zip(*columns.values())] == expected_records(frame)
+
+
+def test_ndjson_lines(frame):
+    lines = ndjson_lines(frame).decode().splitlines()
+    assert [json.loads(line) for line in lines] == expected_records(frame)
+
+
+def test_unmatched_columns_body():
+    assert json.loads(columns_json([])) == {"length": 0, "columns": {}}
@@ -0,0 +1,150 @@
+# backend/tests/test_store.py
+
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from actions import ActionLog, ActionLogFull
+from store import LeadStore
+from tests.reference import TRADE_INDUSTRIES, TRADE_STATES, random_actions
+
+
+def scored_rows(n, seed=0):
+
+    # Rounded scores, so rank ties are common
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Record_ID": np.arange(1, n + 1),
+        "Exporter_ID": [f"EXP_{i}" for i in rng.integers(0, n // 3, n)],
+        "Industry": pd.Categorical(rng.choice(TRADE_INDUSTRIES, n)),
+        "State": pd.Categorical(rng.choice(TRADE_STATES, n)),
+        "Revenue_Size_USD": rng.integers(500_000, 80_000_000, n),
+        "Quantity_Tons": np.round(rng.uniform(55, 4_952, n), 2),
+        "lead_score": np.round(rng.uniform(0, 100, n)),
+        "lead_category": rng.choice(["High Potential", "Medium Potential", "Low Potential"], n),
+        "ai_reason": "Balanced Performance",
+    })
+
+
+def ranked(rows):
+    return rows.sort_values(["lead_score", "Record_ID"], ascending=[False, True]).reset_index(drop=True)
+
+
+def expected_ranks(rows):
+    ranks = ranked(rows)
+    best = ranks.drop_duplicates("Exporter_ID")
+    return {
+        exporter_id: (score, int(rank) + 1)
+        for exporter_id, score, rank in zip(best["Exporter_ID"], best["lead_score"], best.index)
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LeadStore(tmp_path / "leads.db", 2)
+    store.replace_leads(scored_rows(3_000), "v1")
+    return store
+
+
+def assert_ranks(store, rows):
+    expected = expected_ranks(rows)
+    ids = list(expected) + ["EXP_MISSING"]
+
+    found = store.exporter_ranks(ids)
+    assert {e: (r["lead_score"], r["rank"]) for e, r in found.items()} == expected
+    assert all(r["total"] == len(rows) for r in found.values())
+    for exporter_id in ids[:50]:
+        assert store.exporter_rank(exporter_id) == found.get(exporter_id)
+
+
+def test_exporter_ranks(store):
+    assert_ranks(store, scored_rows(3_000))
+
+
+def test_update_leads_keeps_ranks(store):
+    rows = scored_rows(3_000)
+    changed = rows.sample(200, random_state=1).copy()
+    changed["lead_score"] = np.round(np.random.default_rng(2).uniform(0, 100, len(changed)))
+    rows.loc[changed.index, "lead_score"] = changed["lead_score"]
+
+    store.update_leads(changed, "v2", len(rows))
+
+    assert store.version() == "v2"
+    assert_ranks(store, rows)
+
+
+@pytest.mark.parametrize("filters", [{}, {"Industry": " solar "}, {"Industry": "Solar", "State": "Gujarat"}])
+def test_lead_pages_walk_the_ranking(store, filters):
+    expected = ranked(scored_rows(3_000))
+    for column, value in filters.items():
+        expected = expected[expected[column].astype(str).str.lower() == value.strip().lower()]
+
+    pages, after = [], None
+    while True:
+        page, after = store.lead_page(97, after, filters)
+        pages.append(page)
+        if after is None:
+            break
+
+    served = pd.concat(pages)
+    assert served["Exporter_ID"].tolist() == expected["Exporter_ID"].tolist()
+    assert served["lead_score"].tolist() == expected["lead_score"].tolist()
+
+
+# -------------------------
+# Lead actions
+# -------------------------
+def submit_concurrently(log, actions, clients=8):
+    threads = [
+        threading.Thread(target=lambda share: [log.submit([a]).result() for a in share],
+                         args=(actions[i::clients],))
+        for i in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_compacted_tables_match_the_log(tmp_path):
+    store = LeadStore(tmp_path / "leads.db")
+    log = ActionLog(store, 500, 100_000)
+    actions = random_actions(5_000, exporters=300)
+
+    submit_concurrently(log, actions)
+
+    stats = log.stats()
+    assert stats["committed"] == len(actions) and not stats["failed"]
+    with store.connection() as conn:
+        assert conn.execute(
+            "SELECT exporter_id, id, status FROM lead_actions WHERE id IN "
+            "(SELECT MAX(id) FROM lead_actions GROUP BY exporter_id) ORDER BY 1"
+        ).fetchall() == conn.execute(
+            "SELECT exporter_id, action_id, status FROM lead_status ORDER BY 1"
+        ).fetchall()
+        assert conn.execute(
+            "SELECT status, industry, COUNT(*) FROM lead_actions GROUP BY 1, 2 ORDER BY 1, 2"
+        ).fetchall() == conn.execute(
+            "SELECT status, industry, n FROM lead_action_counts ORDER BY 1, 2"
+        ).fetchall()
+
+    summary = store.action_summary()
+    assert summary["actions"] == len(actions)
+    assert summary["exporters"] == len({a[0] for a in actions})
+
+    # Rows written before the compacted tables existed are folded in on
+    # first use
+    with store.connection() as conn, conn:
+        conn.execute("DELETE FROM lead_status")
+        conn.execute("DELETE FROM lead_action_counts")
+        conn.execute("DELETE FROM store_meta WHERE key = 'actions_folded'")
+    assert LeadStore(store.pool.path).action_summary() == summary
+
+
+def test_action_log_refuses_past_max_pending(tmp_path):
+    log = ActionLog(LeadStore(tmp_path / "leads.db"), 500, 10)
+    with pytest.raises(ActionLogFull):
+        log.submit(random_actions(11))
+    assert log.stats()["rejected"] == 11
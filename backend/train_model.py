@@ -1,19 +1,45 @@
-import pandas as pd
+import argparse
+import io
+import itertools
+import json
+import time
+
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
 import joblib
 
-# -------------------------
-# Load Clean Dataset
-# -------------------------
-df = pd.read_csv("trade_data_processed_cleaned.csv")
+from data import (
+    DATA_PATH,
+    FEATURES,
+    MODEL_PATH,
+    file_signature,
+    load_trade_data,
+    save_trade_data
+)
+from forest import export_flat_forest
+
+#   python train_model.py             # one 100-tree forest, 80/20 holdout
+#   python train_model.py --search    # OOB-scored hyperparameter search
+#   python train_model.py --search --min-rows-per-sec 200000 --max-model-mb 20
+
+CARD_PATH = MODEL_PATH.with_suffix(".card.json")
+SEARCH_LOG_PATH = MODEL_PATH.with_suffix(".search.jsonl")
+
+RANDOM_STATE = 42
+
 
 # -------------------------
-# Ensure Converted Column Exists
+# Labels
 # -------------------------
-if "Converted" not in df.columns:
+def ensure_converted(df, save=False):
+
+    # Synthesises Converted when the dataset has none. Kept in memory unless
+    # asked to save: rewriting the CSV invalidates the served snapshot.
+    if "Converted" in df.columns:
+        return df
+
     print("Converted column not found. Generating automatically...")
 
     df["Converted"] = (
@@ -23,60 +49,295 @@ if "Converted" not in df.columns:
     ).astype(int)
 
     # Add 10% noise
-    noise = np.random.rand(len(df)) < 0.1
+    noise = np.random.default_rng(RANDOM_STATE).random(len(df)) < 0.1
     df.loc[noise, "Converted"] = 1 - df.loc[noise, "Converted"]
 
-    df.to_csv("trade_data_processed_cleaned.csv", index=False)
-    print("Converted column created.")
+    if save:
+        save_trade_data(df)
+        print("Converted column created.")
+    return df
 
-print("\nConverted distribution:")
-print(df["Converted"].value_counts())
 
 # -------------------------
-# Features
+# Serving cost
 # -------------------------
-features = [
-    "Intent_Score",
-    "Shipment_Value_USD",
-    "Quantity_Tons",
-    "Prompt_Response_Score",
-    "SalesNav_ProfileViews",
-    "Tariff_Impact",
-    "War_Risk",
-    "Currency_Shift"
-]
-
-X = df[features]
-y = df["Converted"]
+def pickle_bytes(model):
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.getbuffer().nbytes
 
-# -------------------------
-# Train/Test Split
-# -------------------------
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
 
-# -------------------------
-# Train Model
-# -------------------------
-model = RandomForestClassifier(
-    n_estimators=100,
-    random_state=42
-)
+def rows_per_second(model, X, repeat=3):
+
+    # Measured the way the API scores: one process, no joblib threads
+    n_jobs = model.n_jobs
+    model.n_jobs = None
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model.predict_proba(X)
+        best = min(best, time.perf_counter() - start)
+    model.n_jobs = n_jobs
+    return len(X) / best
+
+
+def serving_cost(model, X):
+    return {
+        "rows_per_sec": round(rows_per_second(model, X)),
+        "pickle_mb": round(pickle_bytes(model) / 1e6, 3),
+    }
 
-model.fit(X_train, y_train)
 
 # -------------------------
-# Evaluate
+# Hyperparameter Search
+# (out-of-bag accuracy, trees grown with warm_start until OOB stops improving)
 # -------------------------
-y_pred = model.predict(X_test)
+def candidate_key(params, signature):
+    return json.dumps({"params": params, "data": list(signature)}, sort_keys=True)
+
+
+def load_search_log(path):
+    # Finished candidates, so an interrupted search resumes where it stopped
+    results = {}
+    if path.exists():
+        for line in path.read_text().splitlines():
+            entry = json.loads(line)
+            results[entry["key"]] = entry
+    return results
+
+
+def grow_forest(X, y, max_depth, min_samples_leaf, args):
+
+    # Trees are added in steps of --tree-step; stops after --patience steps
+    # without a --min-delta OOB gain. Forests grown with warm_start have the
+    # same trees as a fresh fit of the same size, so the trimmed forest is
+    # the one a refit at the best size produces.
+    model = RandomForestClassifier(
+        n_estimators=0,
+        max_depth=max_depth,
+        min_samples_leaf=min_samples_leaf,
+        oob_score=True,
+        warm_start=True,
+        n_jobs=args.jobs,
+        random_state=RANDOM_STATE,
+    )
+
+    curve = []
+    best_trees, best_oob, stale = 0, -1.0, 0
+    for n_estimators in range(args.tree_step, args.max_trees + 1, args.tree_step):
+        model.set_params(n_estimators=n_estimators)
+        model.fit(X, y)
+        curve.append([n_estimators, round(model.oob_score_, 6)])
+
+        if model.oob_score_ > best_oob + args.min_delta:
+            best_trees, best_oob, stale = n_estimators, model.oob_score_, 0
+        else:
+            stale += 1
+            if stale >= args.patience:
+                break
+
+    # Drop the trees grown past the best size
+    model.estimators_ = model.estimators_[:best_trees]
+    model.set_params(n_estimators=best_trees, warm_start=False)
+
+    return model, best_oob, curve
+
+
+def fit_forest(X, y, n_estimators, max_depth, min_samples_leaf, jobs, oob_score=True):
+    model = RandomForestClassifier(
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        min_samples_leaf=min_samples_leaf,
+        oob_score=oob_score,
+        n_jobs=jobs,
+        random_state=RANDOM_STATE,
+    )
+    model.fit(X, y)
+    return model
+
+
+def meets_slo(entry, args):
+    return (
+        entry["rows_per_sec"] >= args.min_rows_per_sec and
+        (args.max_model_mb is None or entry["pickle_mb"] <= args.max_model_mb)
+    )
+
+
+def pick_candidate(results, args):
+
+    # Among candidates within the serving SLO, take those within --tolerance
+    # of the best OOB accuracy, then the fastest of them
+    eligible = [r for r in results if meets_slo(r, args)]
+    if not eligible:
+        raise SystemExit("No candidate meets the serving SLO; relax the limits.")
+
+    best_oob = max(r["oob_accuracy"] for r in eligible)
+    close = [r for r in eligible if r["oob_accuracy"] >= best_oob - args.tolerance]
+    return max(close, key=lambda r: (r["rows_per_sec"], r["oob_accuracy"]))
+
+
+def search(X, y, signature, args):
+
+    log = {} if args.fresh else load_search_log(SEARCH_LOG_PATH)
+    grid = list(itertools.product(args.depths, args.leaves))
+    deadline = time.monotonic() + args.budget_minutes * 60
+
+    results = []
+    for depth, leaf in grid:
+        params = {"max_depth": depth, "min_samples_leaf": leaf}
+        key = candidate_key(params, signature)
+
+        if key in log:
+            results.append(log[key])
+            continue
+        if time.monotonic() > deadline:
+            print(f"Time budget spent; skipping {params}")
+            continue
+
+        start = time.perf_counter()
+        model, oob, curve = grow_forest(X, y, depth, leaf, args)
+        trees = model.n_estimators
+
+        entry = {
+            "key": key,
+            "n_estimators": trees,
+            **params,
+            "oob_accuracy": round(oob, 6),
+            **serving_cost(model, X),
+            "train_seconds": round(time.perf_counter() - start, 2),
+            "oob_curve": curve,
+        }
+        with SEARCH_LOG_PATH.open("a") as f:
+            f.write(json.dumps(entry) + "\n")
+        results.append(entry)
+
+        print(
+            f"depth={str(depth):>4} leaf={leaf:>2} trees={trees:>4}  "
+            f"oob={oob:.4f}  {entry['rows_per_sec']:>10,} rows/s  {entry['pickle_mb']:7.2f} MB"
+        )
+
+    return results
 
-print("\nAccuracy:", accuracy_score(y_test, y_pred))
-print("\nClassification Report:\n")
-print(classification_report(y_test, y_pred))
 
 # -------------------------
-# Save Model
+# Model Card
 # -------------------------
-joblib.dump(model, "lead_model.pkl")
-print("\nModel saved as lead_model.pkl")
\ No newline at end of file
+def write_model_card(model, X, evaluation, search_results=None, args=None):
+
+    card = {
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "data": {
+            "path": DATA_PATH.name,
+            "signature": list(file_signature(DATA_PATH)),
+            "rows": int(len(X)),
+            "features": FEATURES,
+        },
+        "params": {
+            k: model.get_params()[k]
+            for k in ("n_estimators", "max_depth", "min_samples_leaf", "random_state")
+        },
+        "evaluation": evaluation,
+        "serving": {
+            **serving_cost(model, X),
+            "batch_rows": int(len(X)),
+            "single_row_ms": round(1000 / rows_per_second(model, X.iloc[:1], repeat=20), 3),
+        },
+    }
+    if args is not None:
+        card["slo"] = {
+            "min_rows_per_sec": args.min_rows_per_sec,
+            "max_model_mb": args.max_model_mb,
+            "tolerance": args.tolerance,
+        }
+    if search_results is not None:
+        card["search"] = [
+            {k: v for k, v in r.items() if k not in ("key", "oob_curve")}
+            for r in search_results
+        ]
+
+    CARD_PATH.write_text(json.dumps(card, indent=2) + "\n")
+    return card
+
+
+def save_model(model):
+    # Served in-process; don't carry the training n_jobs into predict_proba
+    model.n_jobs = None
+
+    joblib.dump(model, MODEL_PATH)
+    print(f"\nModel saved as {MODEL_PATH.name}")
+
+    # Flattened copy for the "flat" inference engine (forest.py)
+    export_flat_forest(model, MODEL_PATH)
+    print("Flat model saved as lead_model.npz")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the lead model")
+    parser.add_argument("--search", action="store_true",
+                        help="OOB-scored search over trees, depth and min_samples_leaf")
+    parser.add_argument("--jobs", type=int, default=-1, help="training cores (-1: all)")
+    parser.add_argument("--save-labels", action="store_true",
+                        help="write a generated Converted column back to the CSV")
+    parser.add_argument("--depths", type=lambda v: None if v == "none" else int(v),
+                        nargs="+", default=[None, 16, 12, 8])
+    parser.add_argument("--leaves", type=int, nargs="+", default=[1, 2, 5, 10])
+    parser.add_argument("--max-trees", type=int, default=400)
+    parser.add_argument("--tree-step", type=int, default=25)
+    parser.add_argument("--patience", type=int, default=2)
+    parser.add_argument("--min-delta", type=float, default=0.001)
+    parser.add_argument("--tolerance", type=float, default=0.005,
+                        help="OOB accuracy a faster model may give up")
+    parser.add_argument("--min-rows-per-sec", type=float, default=0)
+    parser.add_argument("--max-model-mb", type=float, default=None)
+    parser.add_argument("--budget-minutes", type=float, default=60)
+    parser.add_argument("--fresh", action="store_true", help="ignore the search log")
+    args = parser.parse_args()
+
+    # -------------------------
+    # Load Clean Dataset
+    # -------------------------
+    df = ensure_converted(load_trade_data(), save=args.save_labels)
+
+    print("\nConverted distribution:")
+    print(df["Converted"].value_counts())
+
+    X = df[FEATURES]
+    y = df["Converted"]
+
+    if args.search:
+        results = search(X, y, file_signature(DATA_PATH), args)
+        chosen = pick_candidate(results, args)
+        print(f"\nChosen: {({k: chosen[k] for k in ('n_estimators', 'max_depth', 'min_samples_leaf')})}")
+
+        model = fit_forest(
+            X, y, chosen["n_estimators"], chosen["max_depth"], chosen["min_samples_leaf"], args.jobs
+        )
+        evaluation = {"method": "out-of-bag", "accuracy": round(model.oob_score_, 6)}
+        print("\nOOB Accuracy:", model.oob_score_)
+
+        save_model(model)
+        write_model_card(model, X, evaluation, results, args)
+    else:
+        # -------------------------
+        # Train/Test Split
+        # -------------------------
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=RANDOM_STATE
+        )
+
+        model = fit_forest(X_train, y_train, 100, None, 1, args.jobs, oob_score=False)
+
+        # -------------------------
+        # Evaluate
+        # -------------------------
+        y_pred = model.predict(X_test)
+        accuracy = accuracy_score(y_test, y_pred)
+
+        print("\nAccuracy:", accuracy)
+        print("\nClassification Report:\n")
+        print(classification_report(y_test, y_pred))
+
+        save_model(model)
+        write_model_card(model, X, {"method": "holdout 20%", "accuracy": round(accuracy, 6)})
+
+    print(f"Model card saved as {CARD_PATH.name}")